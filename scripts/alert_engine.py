@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Alert Engine - Quarter-over-Quarter Risk Transitions
+====================================================
+Consumes the combined trade + NTM panel one quarter at a time and emits
+typed alert events as products change state:
+
+    level_upgrade          risk_level / concentration_level moved up a level
+    threshold_crossing     china_momentum rose above MOMENTUM_THRESHOLD
+    new_export_restriction has_export_restriction switched on
+    new_ntms               ntm_count went up (informational, never open)
+    resolved               an open alert's condition no longer holds (a level
+                           back at or below where it was upgraded from,
+                           momentum back under the threshold, restriction
+                           lifted)
+
+Per-product state lives in a few numpy arrays indexed by product slot
+(level codes, flags, NTM count, and the quarter each alert opened), so a
+quarter is a handful of vectorized comparisons: linear in the products it
+contains. A product's first quarter only sets its baseline. Events are
+appended to a JSONL log; the state can be saved and reloaded to resume
+the stream.
+
+Usage:
+    python alert_engine.py
+    python alert_engine.py --input ../outputs/trade_ntm_combined.csv --log ../outputs/alerts.jsonl
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from classification import CONCENTRATION_BINS, RISK_BINS
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Columns read from the panel
+ALERT_COLUMNS = ['hs_code', 'date', 'risk_level', 'concentration_level', 'china_momentum',
+                 'has_export_restriction', 'ntm_count']
+
+# Momentum (share points per quarter) that opens a threshold alert, as in the trend assessment
+MOMENTUM_THRESHOLD = 3.0
+
+# Level fields and their labels, lowest first
+LEVEL_FIELDS = {
+    'risk_level': RISK_BINS['labels'],
+    'concentration_level': CONCENTRATION_BINS['labels']
+}
+
+# Alerts that stay open until resolved, one column each in the state arrays
+OPEN_ALERTS = ['risk_level', 'concentration_level', 'china_momentum', 'has_export_restriction']
+OPEN_ALERT_TYPES = {
+    'risk_level': 'level_upgrade',
+    'concentration_level': 'level_upgrade',
+    'china_momentum': 'threshold_crossing',
+    'has_export_restriction': 'new_export_restriction'
+}
+
+# Initial product slots (arrays double when full)
+INITIAL_CAPACITY = 1024
+
+def level_codes(values, labels):
+    """Position of each value in its ordered labels (-1 if unknown)"""
+    return pd.Categorical(values, categories=labels).codes.astype(np.int8)
+
+class AlertEngine:
+    """Per-product alert state over a stream of quarters"""
+
+    def __init__(self, log_path: Optional[str] = None, momentum_threshold: float = MOMENTUM_THRESHOLD,
+                 capacity: int = INITIAL_CAPACITY):
+        self.log_path = log_path
+        self.momentum_threshold = momentum_threshold
+        self.slots = {}          # hs_code -> slot
+        self.hs_codes = []       # slot -> hs_code
+        self.quarters = []       # quarter index -> label
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """(Re)size the state arrays, keeping the current values"""
+        old = getattr(self, 'state', None)
+        state = {
+            'seen': np.zeros(capacity, dtype=bool),
+            'risk_level': np.full(capacity, -1, dtype=np.int8),
+            'concentration_level': np.full(capacity, -1, dtype=np.int8),
+            'china_momentum': np.zeros(capacity, dtype=np.float32),
+            'has_export_restriction': np.zeros(capacity, dtype=bool),
+            'ntm_count': np.zeros(capacity, dtype=np.int32),
+            # Level a level alert was upgraded from
+            'upgraded_from': np.full((capacity, len(LEVEL_FIELDS)), -1, dtype=np.int8),
+            # Quarter index each open alert opened in (-1: closed)
+            'open_since': np.full((capacity, len(OPEN_ALERTS)), -1, dtype=np.int32)
+        }
+        if old is not None:
+            for name, values in old.items():
+                state[name][:len(values)] = values
+        self.state = state
+
+    def _slots_of(self, hs_codes) -> np.ndarray:
+        """Slots of the quarter's products, adding new ones"""
+        slots = np.empty(len(hs_codes), dtype=np.int64)
+        for i, hs_code in enumerate(hs_codes):
+            slot = self.slots.get(hs_code)
+            if slot is None:
+                slot = self.slots[hs_code] = len(self.hs_codes)
+                self.hs_codes.append(hs_code)
+            slots[i] = slot
+        if len(self.hs_codes) > len(self.state['seen']):
+            self._allocate(max(2 * len(self.state['seen']), len(self.hs_codes)))
+        return slots
+
+    def process_quarter(self, rows: pd.DataFrame) -> List[Dict]:
+        """Events of one quarter's rows (one per product), in product then rule order"""
+        if not len(rows):
+            return []
+        quarter = rows['date'].iloc[0]
+        if rows['date'].nunique() != 1:
+            raise ValueError("process_quarter takes the rows of a single quarter")
+        if self.quarters and quarter <= self.quarters[-1]:
+            raise ValueError(f"Quarter {quarter} is not after {self.quarters[-1]}")
+        self.quarters.append(quarter)
+        q = len(self.quarters) - 1
+
+        hs_codes = rows['hs_code'].astype(str).str.strip().tolist()
+        slots = self._slots_of(hs_codes)
+        state = self.state
+        seen = state['seen'][slots]
+
+        current = {field: level_codes(rows[field], labels) for field, labels in LEVEL_FIELDS.items()}
+        momentum = rows['china_momentum'].to_numpy(dtype=np.float32, na_value=np.nan)
+        restricted = rows['has_export_restriction'].fillna(False).to_numpy().astype(bool)
+        ntm_count = rows['ntm_count'].fillna(0).to_numpy().astype(np.int32)
+
+        above = np.nan_to_num(momentum, nan=-np.inf) > self.momentum_threshold
+        was_above = state['china_momentum'][slots] > self.momentum_threshold
+        was_restricted = state['has_export_restriction'][slots]
+        open_since = state['open_since'][slots]
+
+        # (rule column, event mask, resolve mask) per open alert
+        opened, resolved = {}, {}
+        for j, field in enumerate(LEVEL_FIELDS):
+            previous = state[field][slots]
+            upgraded_from = state['upgraded_from'][slots, j]
+            is_open = open_since[:, j] >= 0
+            opened[field] = seen & (previous >= 0) & (current[field] > previous)
+            resolved[field] = is_open & ~opened[field] & (current[field] >= 0) & (current[field] <= upgraded_from)
+            # Remember where a newly opened alert started from
+            state['upgraded_from'][slots, j] = np.where(opened[field] & ~is_open, previous, upgraded_from)
+        opened['china_momentum'] = seen & above & ~was_above
+        resolved['china_momentum'] = (open_since[:, 2] >= 0) & ~above
+        opened['has_export_restriction'] = seen & restricted & ~was_restricted
+        resolved['has_export_restriction'] = (open_since[:, 3] >= 0) & ~restricted
+        new_ntms = seen & (ntm_count > state['ntm_count'][slots])
+
+        events = self._events(quarter, hs_codes, slots, current, momentum, ntm_count,
+                              opened, resolved, new_ntms)
+
+        # Update the state
+        for j, field in enumerate(OPEN_ALERTS):
+            column = state['open_since'][:, j]
+            column[slots[resolved[field]]] = -1
+            column[slots[opened[field] & (open_since[:, j] < 0)]] = q
+        for field in LEVEL_FIELDS:
+            state[field][slots] = current[field]
+        state['china_momentum'][slots] = np.nan_to_num(momentum, nan=0.0)
+        state['has_export_restriction'][slots] = restricted
+        state['ntm_count'][slots] = ntm_count
+        state['seen'][slots] = True
+
+        self._log(events)
+        return events
+
+    def _events(self, quarter, hs_codes, slots, current, momentum, ntm_count,
+                opened, resolved, new_ntms) -> List[Dict]:
+        """Event dicts of the quarter's masks, only built for the rows that fired"""
+        state = self.state
+        fired = np.flatnonzero(np.logical_or.reduce(list(opened.values()) + list(resolved.values()) + [new_ntms]))
+        events = []
+        for i in fired.tolist():
+            base = {"quarter": quarter, "hs_code": hs_codes[i]}
+            slot = slots[i]
+            for field, labels in LEVEL_FIELDS.items():
+                if opened[field][i]:
+                    events.append({**base, "type": "level_upgrade", "field": field,
+                                   "from": labels[state[field][slot]], "to": labels[current[field][i]]})
+                elif resolved[field][i]:
+                    events.append({**base, "type": "resolved", "alert": "level_upgrade", "field": field,
+                                   "level": labels[current[field][i]]})
+            if opened['china_momentum'][i]:
+                events.append({**base, "type": "threshold_crossing", "field": "china_momentum",
+                               "value": round(float(momentum[i]), 2), "threshold": self.momentum_threshold})
+            elif resolved['china_momentum'][i]:
+                events.append({**base, "type": "resolved", "alert": "threshold_crossing",
+                               "field": "china_momentum",
+                               "value": None if np.isnan(momentum[i]) else round(float(momentum[i]), 2)})
+            if opened['has_export_restriction'][i]:
+                events.append({**base, "type": "new_export_restriction", "field": "has_export_restriction"})
+            elif resolved['has_export_restriction'][i]:
+                events.append({**base, "type": "resolved", "alert": "new_export_restriction",
+                               "field": "has_export_restriction"})
+            if new_ntms[i]:
+                events.append({**base, "type": "new_ntms", "field": "ntm_count",
+                               "from": int(state['ntm_count'][slot]), "to": int(ntm_count[i])})
+        return events
+
+    def _log(self, events: List[Dict]):
+        """Append events to the JSONL log"""
+        if self.log_path and events:
+            with open(self.log_path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+
+    def run(self, panel: pd.DataFrame) -> List[Dict]:
+        """Feed a panel quarter by quarter (quarters after the last one processed)"""
+        events = []
+        panel = panel[ALERT_COLUMNS]
+        if self.quarters:
+            panel = panel[panel['date'] > self.quarters[-1]]
+        for _, rows in panel.groupby('date', sort=True):
+            events.extend(self.process_quarter(rows))
+        return events
+
+    def open_alerts(self) -> pd.DataFrame:
+        """Open alerts: hs_code, alert type, field, quarter opened and current value"""
+        used = len(self.hs_codes)
+        slots, columns = np.nonzero(self.state['open_since'][:used] >= 0)
+        records = []
+        for slot, j in zip(slots.tolist(), columns.tolist()):
+            field = OPEN_ALERTS[j]
+            value = self.state[field][slot]
+            if field in LEVEL_FIELDS:
+                value = LEVEL_FIELDS[field][value] if value >= 0 else None
+            records.append({
+                'hs_code': self.hs_codes[slot],
+                'alert': OPEN_ALERT_TYPES[field],
+                'field': field,
+                'since': self.quarters[self.state['open_since'][slot, j]],
+                'current': value.item() if isinstance(value, np.generic) else value
+            })
+        return pd.DataFrame(records, columns=['hs_code', 'alert', 'field', 'since', 'current'])
+
+    def save_state(self, path: str):
+        """Write the state arrays and product / quarter lists to an .npz file"""
+        used = len(self.hs_codes)
+        np.savez_compressed(path, hs_codes=np.array(self.hs_codes, dtype=str),
+                            quarters=np.array(self.quarters, dtype=str),
+                            momentum_threshold=self.momentum_threshold,
+                            **{name: values[:used] for name, values in self.state.items()})
+
+    @classmethod
+    def load_state(cls, path: str, log_path: Optional[str] = None) -> 'AlertEngine':
+        """Engine resumed from save_state"""
+        with np.load(path) as saved:
+            hs_codes = saved['hs_codes'].tolist()
+            engine = cls(log_path, float(saved['momentum_threshold']), max(len(hs_codes), INITIAL_CAPACITY))
+            engine.hs_codes = hs_codes
+            engine.slots = {hs_code: slot for slot, hs_code in enumerate(hs_codes)}
+            engine.quarters = saved['quarters'].tolist()
+            for name in engine.state:
+                engine.state[name][:len(hs_codes)] = saved[name]
+        return engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the panel through the alert engine")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    parser.add_argument('--log', default=os.path.join(REPO_DIR, 'outputs', 'alerts.jsonl'),
+                        help="JSONL event log (appended)")
+    parser.add_argument('--state', help="State file (.npz): resumed if present, saved after the run")
+    args = parser.parse_args()
+
+    if args.state and os.path.exists(args.state):
+        engine = AlertEngine.load_state(args.state, args.log)
+    else:
+        engine = AlertEngine(args.log)
+    events = engine.run(pd.read_csv(args.input, usecols=ALERT_COLUMNS))
+    if args.state:
+        engine.save_state(args.state)
+
+    print("\n🚨 ALERT ENGINE")
+    print("=" * 60)
+    counts = pd.Series([event['type'] for event in events], dtype=object).value_counts()
+    for event_type, count in counts.items():
+        print(f"   {event_type:<24} {count:>6}")
+    print(f"\n   {len(events)} events over {len(engine.quarters)} quarters → {args.log}")
+    print(f"   Open alerts: {len(engine.open_alerts())}")
+
+if __name__ == "__main__":
+    main()
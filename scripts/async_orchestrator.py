@@ -0,0 +1,161 @@
+"""
+Async Orchestrator - Concurrent, Pipelined Agent Stages
+=======================================================
+AgentOrchestrator as a pipeline of awaitable stages, for agents that wait
+on slow external calls (such as the planned Gen AI agents):
+
+    history          product's quarters (DataRetrievalAgent.product_history)  \\
+    record           product-quarter row (DataRetrievalAgent.product_row)      > concurrent
+    measures         NTM measures in force (DataRetrievalAgent.active_measures) /
+    risk             RiskAssessmentAgent.assess_risk
+    diversification  StrategicDiversificationAgent.generate_recommendations
+
+The three data sub-steps are independent and run together; the data
+context is then built as DataRetrievalAgent.get_product_data does, and the
+risk and diversification stages follow in order. Results are the same as
+AgentOrchestrator.analyze_product's.
+
+Every stage has a concurrency cap and a timeout (STAGE_LIMITS, overridable
+per instance). Any stage can be replaced: coroutine functions are awaited
+under the timeout, plain functions (the agents themselves) run on the
+instance's thread pool, so a blocking call (a Parquet read, a remote
+request) never stalls the event loop and its cap and timeout apply too. A
+timed-out plain call cannot be interrupted: its thread finishes in the
+background and the result is dropped. analyze_many pipelines a batch, so
+one product's risk stage runs while others wait on their data;
+max_in_flight bounds the analyses open at once. A stage that times out or
+raises turns that product's result into an error dict, and the batch
+carries on.
+
+Usage:
+    orchestrator = AsyncAgentOrchestrator(AgentOrchestrator(df), limits={'risk': {'concurrency': 4}})
+    results = orchestrator.run_batch([('8542', '2025-Q2'), ('1006', None)])
+"""
+
+import asyncio
+import inspect
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from trade_agents import AgentOrchestrator
+
+# Concurrency cap (calls in flight) and timeout (seconds) of each stage
+STAGE_LIMITS = {
+    'history': {'concurrency': 32, 'timeout': 10.0},
+    'record': {'concurrency': 32, 'timeout': 10.0},
+    'measures': {'concurrency': 32, 'timeout': 10.0},
+    'risk': {'concurrency': 16, 'timeout': 30.0},
+    'diversification': {'concurrency': 16, 'timeout': 30.0}
+}
+
+# Analyses open at once in analyze_many
+DEFAULT_MAX_IN_FLIGHT = 64
+
+class StageError(Exception):
+    """A stage timed out or raised"""
+
+def agent_stages(orchestrator: AgentOrchestrator) -> Dict[str, Callable]:
+    """The orchestrator's agents as stage callables"""
+    data_agent = orchestrator.data_agent
+
+    def measures(hs_code, quarter, quarters):
+        if data_agent.ntm_index is None:
+            return {}
+        return data_agent.active_measures(hs_code, quarter, quarters)
+
+    return {
+        'history': data_agent.product_history,
+        'record': data_agent.product_row,
+        'measures': measures,
+        'risk': orchestrator.risk_agent.assess_risk,
+        'diversification': orchestrator.diversification_agent.generate_recommendations
+    }
+
+class AsyncAgentOrchestrator:
+    """Async, per-stage limited pipeline over an AgentOrchestrator's agents"""
+
+    def __init__(self, orchestrator: AgentOrchestrator, stages: Optional[Dict[str, Callable]] = None,
+                 limits: Optional[Dict[str, Dict]] = None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        unknown = set(stages or {}).union(limits or {}).difference(STAGE_LIMITS)
+        if unknown:
+            raise ValueError(f"Unknown stages {sorted(unknown)}; expected {list(STAGE_LIMITS)}")
+        self.orchestrator = orchestrator
+        self.stages = {**agent_stages(orchestrator), **(stages or {})}
+        self.limits = {name: {**limit, **(limits or {}).get(name, {})} for name, limit in STAGE_LIMITS.items()}
+        self.max_in_flight = max_in_flight
+        # Semaphores belong to an event loop: one set per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+        # Plain stage functions: enough threads for every cap at once (started on demand)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(limit['concurrency'] for name, limit in self.limits.items()
+                                   if not inspect.iscoroutinefunction(self.stages[name]))),
+            thread_name_prefix='agent-stage')
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = {stage: asyncio.Semaphore(limit['concurrency'])
+                                      for stage, limit in self.limits.items()}
+        return self._semaphores[loop][name]
+
+    async def _run(self, name: str, *args):
+        """One stage call under its concurrency cap and timeout"""
+        timeout = self.limits[name]['timeout']
+        async with self._semaphore(name):
+            try:
+                stage = self.stages[name]
+                if inspect.iscoroutinefunction(stage):
+                    call = stage(*args)
+                else:
+                    call = asyncio.get_running_loop().run_in_executor(self._executor, stage, *args)
+                result = await asyncio.wait_for(call, timeout)
+                if inspect.isawaitable(result):
+                    # A plain function that returned an awaitable
+                    result = await asyncio.wait_for(result, timeout)
+                return result
+            except asyncio.TimeoutError:
+                raise StageError(f"{name} stage timed out after {timeout}s")
+            except Exception as e:
+                raise StageError(f"{name} stage failed: {type(e).__name__}: {e}")
+
+    async def analyze_product(self, hs_code: str, quarter: Optional[str] = None) -> Dict:
+        """Complete analysis for a product"""
+        data_agent = self.orchestrator.data_agent
+        quarters = data_agent.get_quarters(hs_code).tolist()
+        if quarter is None and quarters:
+            quarter = quarters[-1]
+
+        try:
+            # Independent data sub-steps
+            history, latest, measures = await asyncio.gather(
+                self._run('history', hs_code),
+                self._run('record', hs_code, quarter),
+                self._run('measures', hs_code, quarter, quarters)
+            )
+            if not len(history['date']):
+                return {"error": f"No data found for HS code {hs_code}"}
+            if latest is None:
+                return {"error": f"No data found for HS code {hs_code} in {quarter}"}
+
+            data_context = data_agent.build_context(hs_code, quarter, latest, history, measures)
+            risk_assessment = await self._run('risk', data_context)
+            diversification_recs = await self._run('diversification', data_context, risk_assessment)
+        except StageError as e:
+            return {"error": str(e)}
+
+        return self.orchestrator.assemble(data_context, risk_assessment, diversification_recs)
+
+    async def analyze_many(self, items: List[Tuple[str, Optional[str]]]) -> List[Dict]:
+        """Analyses of (hs_code, quarter) pairs, pipelined, in input order"""
+        gate = asyncio.Semaphore(self.max_in_flight)
+
+        async def analyze(hs_code, quarter):
+            async with gate:
+                return await self.analyze_product(hs_code, quarter)
+
+        return await asyncio.gather(*(analyze(hs_code, quarter) for hs_code, quarter in items))
+
+    def run_batch(self, items: List[Tuple[str, Optional[str]]]) -> List[Dict]:
+        """analyze_many from synchronous code (starts its own event loop)"""
+        return asyncio.run(self.analyze_many(items))
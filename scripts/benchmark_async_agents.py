@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Async Agents Benchmark - Pipelined vs Sequential Analyses
+=========================================================
+Wraps every agent stage in a stub that waits a configurable latency before
+calling the real agent (standing in for remote / Gen AI calls), then
+analyses the latest quarter of 100 products:
+
+    sequential   one product at a time, stages one after another
+                 (AgentOrchestrator.analyze_product's order, blocking stubs)
+    async        AsyncAgentOrchestrator.analyze_many: data sub-steps
+                 concurrent, products pipelined under the stage caps
+                 - blocking: the sequential run's plain (sleeping) stages,
+                   run on the pipeline's thread pool
+                 - awaitable: the same latencies as coroutine stubs
+
+and, without stubs, the real agents sequentially and through the async
+pipeline. It first checks the async results equal AgentOrchestrator's,
+and that a stage slower than its timeout (awaitable or blocking) becomes
+an error result.
+
+Usage:
+    python benchmark_async_agents.py
+    python benchmark_async_agents.py --products 100 --latency-ms 20 --risk-concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from async_orchestrator import STAGE_LIMITS, AsyncAgentOrchestrator, agent_stages
+from benchmark_retrieval import make_combined
+from trade_agents import AgentOrchestrator
+
+# Latency of each stage relative to --latency-ms (model-backed stages are slower)
+LATENCY_WEIGHTS = {'history': 1, 'record': 1, 'measures': 1, 'risk': 3, 'diversification': 5}
+
+def stub_stage(func, latency, jitter, rng):
+    """Async stage: sleep latency (± jitter share), then call the agent"""
+    async def stage(*args):
+        await asyncio.sleep(latency * (1 + jitter * rng.uniform(-1, 1)))
+        return func(*args)
+    return stage
+
+def blocking_stage(func, latency, jitter, rng):
+    """Synchronous stage with the same latency, for the sequential run"""
+    def stage(*args):
+        time.sleep(latency * (1 + jitter * rng.uniform(-1, 1)))
+        return func(*args)
+    return stage
+
+def analyze_sequential(orchestrator, stages, hs_code, quarter=None):
+    """AgentOrchestrator.analyze_product over the given stages, one after another"""
+    data_agent = orchestrator.data_agent
+    quarters = data_agent.get_quarters(hs_code).tolist()
+    quarter = quarter or quarters[-1]
+    history = stages['history'](hs_code)
+    latest = stages['record'](hs_code, quarter)
+    measures = stages['measures'](hs_code, quarter, quarters)
+    data_context = data_agent.build_context(hs_code, quarter, latest, history, measures)
+    risk_assessment = stages['risk'](data_context)
+    return orchestrator.assemble(data_context, risk_assessment,
+                                 stages['diversification'](data_context, risk_assessment))
+
+def comparable(analysis):
+    """Analysis as JSON without its timestamp"""
+    return json.dumps({k: v for k, v in analysis.items() if k != 'timestamp'}, default=str, sort_keys=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the async agent pipeline")
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=10.0,
+                        help="Base stage latency (risk ×3, diversification ×5; default: 10)")
+    parser.add_argument('--jitter', type=float, default=0.2, help="Latency spread (default: ±20%%)")
+    parser.add_argument('--risk-concurrency', type=int, default=STAGE_LIMITS['risk']['concurrency'])
+    parser.add_argument('--diversification-concurrency', type=int,
+                        default=STAGE_LIMITS['diversification']['concurrency'])
+    args = parser.parse_args()
+
+    df = make_combined(args.products, 8)
+    items = [(hs_code, None) for hs_code in df['hs_code'].unique()]
+    latency = args.latency_ms / 1000
+
+    print("\n⏱️  ASYNC AGENTS BENCHMARK")
+    print("=" * 60)
+
+    # Same results as the synchronous orchestrator
+    orchestrator = AgentOrchestrator(df)
+    expected = [comparable(orchestrator.analyze_product(hs_code, quarter)) for hs_code, quarter in items]
+    actual = [comparable(analysis) for analysis in AsyncAgentOrchestrator(orchestrator).run_batch(items)]
+    assert expected == actual, "Async results differ from AgentOrchestrator.analyze_product"
+    print(f"   ✓ {len(items)} async analyses identical to the sequential orchestrator")
+
+    # Timeouts become error results, for awaitable and blocking stages alike
+    for make_stage in (stub_stage, blocking_stage):
+        slow = make_stage(agent_stages(orchestrator)['risk'], 0.05, 0, np.random.default_rng(0))
+        timed_out = AsyncAgentOrchestrator(orchestrator, stages={'risk': slow},
+                                           limits={'risk': {'timeout': 0.01}}).run_batch(items[:5])
+        assert all('timed out' in analysis.get('error', '') for analysis in timed_out)
+    print(f"   ✓ Risk stage over its timeout (awaitable and blocking): {timed_out[0]['error']}")
+
+    # Real agents, no stubs
+    start = time.perf_counter()
+    for hs_code, quarter in items:
+        orchestrator.analyze_product(hs_code, quarter)
+    t_real_sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    AsyncAgentOrchestrator(orchestrator).run_batch(items)
+    t_real_async = time.perf_counter() - start
+
+    # Sequential: the same stages, blocking, one product at a time
+    rng = np.random.default_rng(0)
+    blocking = {name: blocking_stage(func, latency * LATENCY_WEIGHTS[name], args.jitter, rng)
+                for name, func in agent_stages(orchestrator).items()}
+    start = time.perf_counter()
+    for hs_code, quarter in items:
+        analyze_sequential(orchestrator, blocking, hs_code, quarter)
+    t_sequential = time.perf_counter() - start
+
+    # Async: the same blocking stages, on the pipeline's thread pool
+    limits = {'risk': {'concurrency': args.risk_concurrency},
+              'diversification': {'concurrency': args.diversification_concurrency}}
+    rng = np.random.default_rng(0)
+    blocking = {name: blocking_stage(func, latency * LATENCY_WEIGHTS[name], args.jitter, rng)
+                for name, func in agent_stages(orchestrator).items()}
+    start = time.perf_counter()
+    results = AsyncAgentOrchestrator(orchestrator, stages=blocking, limits=limits).run_batch(items)
+    t_blocking = time.perf_counter() - start
+    assert not any('error' in analysis for analysis in results)
+
+    # Async: same latencies as awaitable stubs
+    rng = np.random.default_rng(0)
+    stubs = {name: stub_stage(func, latency * LATENCY_WEIGHTS[name], args.jitter, rng)
+             for name, func in agent_stages(orchestrator).items()}
+    pipeline = AsyncAgentOrchestrator(orchestrator, stages=stubs, limits=limits)
+    start = time.perf_counter()
+    results = pipeline.run_batch(items)
+    t_async = time.perf_counter() - start
+    assert not any('error' in analysis for analysis in results)
+
+    per_product = sum(LATENCY_WEIGHTS.values()) * args.latency_ms
+    print(f"\n   {len(items)} products, stage latencies {args.latency_ms:g} ms × {LATENCY_WEIGHTS} "
+          f"(±{args.jitter:.0%})")
+    print(f"   Caps: risk {args.risk_concurrency}, diversification {args.diversification_concurrency}")
+    print(f"\n   Sequential:         {t_sequential:>8.2f}s  (stage waits alone: "
+          f"{per_product * len(items) / 1000:.2f}s)")
+    print(f"   Async (blocking):   {t_blocking:>8.2f}s  {t_sequential / t_blocking:>6.1f}x")
+    print(f"   Async (awaitable):  {t_async:>8.2f}s  {t_sequential / t_async:>6.1f}x")
+    print(f"\n   Real agents, no latency: sequential {t_real_sequential * 1000:.1f} ms, "
+          f"async {t_real_async * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
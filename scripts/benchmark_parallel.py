@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Parallel Scaling Benchmark - Per-Product Stages
+===============================================
+Times compute_growth_rates + compute_trend_indicators serially and on a
+process pool of 1..N workers over a synthetic panel (10k products by
+default), checking that every parallel run matches the serial output.
+
+Usage:
+    python benchmark_parallel.py
+    python benchmark_parallel.py --products 10000 --quarters 20 --max-workers 16
+"""
+
+import argparse
+import os
+import time
+
+from compute_trade_indices import (
+    compute_market_shares, run_per_product_stages, run_per_product_stages_parallel
+)
+from synthetic_panel import generate_panel
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to max_workers (always including max_workers)"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+def timed(func, *args):
+    """Run func, return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the per-product stages")
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--quarters', type=int, default=20)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    panel = compute_market_shares(generate_panel(n_products=args.products, n_quarters=args.quarters))
+
+    print("\n⚡ PARALLEL SCALING BENCHMARK")
+    print("=" * 60)
+    print(f"   Panel: {args.products:,} products × {args.quarters} quarters = {len(panel):,} rows")
+    print(f"   CPUs available: {os.cpu_count()}")
+
+    expected, t_serial = timed(run_per_product_stages, panel.copy())
+    print(f"\n   {'Workers':>8} {'Seconds':>10} {'Speedup':>9}")
+    print("   " + "-" * 30)
+    print(f"   {'serial':>8} {t_serial:>10.2f} {1.0:>8.2f}x")
+
+    for workers in worker_counts(args.max_workers):
+        actual, seconds = timed(run_per_product_stages_parallel, panel.copy(), workers)
+        for col in expected.columns:
+            assert expected[col].equals(actual[col]), col
+        print(f"   {workers:>8} {seconds:>10.2f} {t_serial / seconds:>8.2f}x")
+
+    print("\n   ✓ All parallel runs match the serial output")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark - DataRetrievalAgent Lookups
+================================================
+Times DataRetrievalAgent.get_product_data on a combined trade + NTM table
+of 5k products × 80 quarters (400k rows) against the boolean-mask lookup
+it replaced (hs_code scan + copy, date scan, iloc[0].to_dict()).
+
+The table reuses the rows of outputs/trade_ntm_combined.csv under
+synthetic HS codes and quarter labels, so every column the agent reads is
+present with realistic values.
+
+Usage:
+    python benchmark_retrieval.py
+    python benchmark_retrieval.py --products 1000 --quarters 40 --lookups 500
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic_panel import hs_codes, quarter_labels
+from trade_agents import DataRetrievalAgent
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def make_combined(n_products, n_quarters, seed=0):
+    """Combined table with template rows under synthetic product / quarter keys"""
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    rows = rng.integers(0, len(template), size=n_products * n_quarters)
+    df = template.iloc[rows].reset_index(drop=True)
+    df['hs_code'] = np.repeat(hs_codes(n_products, rng), n_quarters).astype(str)
+    df['date'] = np.tile(quarter_labels(n_quarters, start='2005-Q1'), n_products)
+    return df
+
+def scan_lookup(df, hs_code, quarter):
+    """The previous lookup: full-column masks and a copy per call"""
+    product_data = df[df['hs_code'] == str(hs_code)].copy()
+    latest = product_data[product_data['date'] == quarter].iloc[0].to_dict()
+    return latest, product_data.tail(4)
+
+def per_call_us(func, queries):
+    """Mean microseconds per call over the queries"""
+    start = time.perf_counter()
+    for hs_code, quarter in queries:
+        func(hs_code, quarter)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataRetrievalAgent lookups")
+    parser.add_argument('--products', type=int, default=5_000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--lookups', type=int, default=2_000)
+    args = parser.parse_args()
+
+    df = make_combined(args.products, args.quarters)
+
+    print("\n🔍 RETRIEVAL BENCHMARK")
+    print("=" * 60)
+    print(f"   Table: {args.products:,} products × {args.quarters} quarters = {len(df):,} rows")
+
+    start = time.perf_counter()
+    agent = DataRetrievalAgent(df)
+    t_build = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(df), size=args.lookups)
+    queries = list(zip(df['hs_code'].to_numpy()[picks], df['date'].to_numpy()[picks]))
+
+    # Same records as the scan
+    for hs_code, quarter in queries[:50]:
+        context = agent.get_product_data(hs_code, quarter)
+        latest, recent = scan_lookup(df, hs_code, quarter)
+        assert context['current_metrics']['china_share'] == round(latest['china_share_us'], 2)
+        assert context['historical_trend']['quarters'] == recent['date'].tolist()
+
+    t_index = per_call_us(agent.get_product_data, queries)
+    t_scan = per_call_us(lambda hs, q: scan_lookup(df, hs, q), queries[:max(len(queries) // 20, 10)])
+
+    print(f"\n   Index build (once):    {t_build * 1000:>10.1f} ms")
+    print(f"   get_product_data:      {t_index:>10.1f} µs/call")
+    print(f"   mask + copy lookup:    {t_scan:>10.1f} µs/call ({t_scan / t_index:.0f}x slower)")
+    print("\n   ✓ Indexed lookups match the mask lookup")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - compute_trade_indices at Panel Scale
+======================================================
+Times each function of compute_trade_indices.py and the end-to-end `main`
+on synthetic panels (synthetic_panel.py) of 1k and 100k rows, and 10M rows
+on request. Stages run in pipeline order, each on a fresh copy of the
+previous stage's output; the best of --repeats runs is kept.
+
+Results are written as JSON together with the commit, library versions and
+CPU count. Pass a previous results file with --compare to flag functions
+that got slower by more than --threshold (exit status 1 on regressions).
+
+Usage:
+    python benchmark_suite.py --output bench_before.json
+    python benchmark_suite.py --sizes 1k,100k,10m --output bench_after.json --compare bench_before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import compute_trade_indices as cti
+from synthetic_panel import panel_for_rows
+
+# Stages in pipeline order (each takes and returns the panel)
+STAGES = [
+    cti.compute_market_shares,
+    cti.compute_concentration_hhi,
+    cti.compute_trade_intensity,
+    cti.compute_growth_rates,
+    cti.compute_diversification_metrics,
+    cti.compute_revealed_comparative_advantage,
+    cti.compute_risk_scores,
+    cti.compute_trend_indicators,
+    cti.add_metadata,
+]
+
+DEFAULT_SIZES = '1k,100k'
+
+def parse_size(text):
+    """'1k' -> 1000, '10m' -> 10000000"""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1])
+    return int(float(text[:-1]) * scale) if scale else int(text)
+
+def best_time(func, make_args, repeats):
+    """Best wall time of func(*make_args()) over repeats, plus the last result"""
+    best = None
+    for _ in range(repeats):
+        args = make_args()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def run_size(n_rows, repeats, main_format, workdir):
+    """Timings in seconds for every function at one panel size"""
+    panel = panel_for_rows(n_rows)
+    input_file = os.path.join(workdir, f'panel_{n_rows}.csv')
+    panel.to_csv(input_file, index=False)
+
+    timings = {}
+    df, timings['load_data'] = best_time(cti.load_data, lambda: (input_file,), repeats)
+    for stage in STAGES:
+        df, timings[stage.__name__] = best_time(stage, lambda: (df.copy(),), repeats)
+    _, timings['compute_global_aggregates'] = best_time(cti.compute_global_aggregates, lambda: (df,), repeats)
+    _, timings['generate_summary_stats'] = best_time(cti.generate_summary_stats, lambda: (df,), repeats)
+    _, timings['order_columns'] = best_time(cti.order_columns, lambda: (df,), repeats)
+
+    output_file = os.path.join(workdir, f'out_{n_rows}.csv')
+    argv = ['--input', input_file, '--output', output_file, '--no-cache', '--quiet',
+            '--format', main_format]
+    _, timings['main'] = best_time(cti.main, lambda: (argv,), repeats)
+
+    return {'rows': len(panel), 'products': int(panel['hs_code'].nunique()),
+            'quarters': int(panel['date'].nunique()), 'seconds': timings}
+
+def git_commit():
+    """Short hash of HEAD, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold, min_delta):
+    """Functions slower than baseline by more than threshold (and min_delta seconds)"""
+    regressions = []
+    for size, current in results['sizes'].items():
+        before = baseline.get('sizes', {}).get(size)
+        if before is None:
+            continue
+        for name, seconds in current['seconds'].items():
+            old = before['seconds'].get(name)
+            if old and seconds > old * (1 + threshold) and seconds - old > min_delta:
+                regressions.append({'size': size, 'function': name, 'baseline_s': old,
+                                    'current_s': seconds, 'ratio': round(seconds / old, 2)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indices pipeline on synthetic panels")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated row counts, e.g. 1k,100k,10m (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Runs per function at sizes up to 1M rows (larger sizes run once)")
+    parser.add_argument('--main-format', choices=['parquet', 'csv', 'both'], default='csv',
+                        help="Output format for the end-to-end main run (default: csv)")
+    parser.add_argument('--output', default='benchmark_results.json', help="Results JSON path")
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help="Flag regressions against a previous run")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Relative slowdown counted as a regression (default: 0.25)")
+    parser.add_argument('--min-delta', type=float, default=0.01,
+                        help="Ignore slowdowns smaller than this many seconds (default: 0.01)")
+    args = parser.parse_args()
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'main_format': args.main_format,
+        'sizes': {}
+    }
+
+    print("\n⏱️  INDICES PIPELINE BENCHMARK")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        for label in args.sizes.split(','):
+            n_rows = parse_size(label)
+            repeats = args.repeats if n_rows <= 1_000_000 else 1
+            result = run_size(n_rows, repeats, args.main_format, workdir)
+            results['sizes'][label.strip()] = result
+
+            print(f"\n   {label.strip()}: {result['rows']:,} rows "
+                  f"({result['products']:,} products × {result['quarters']} quarters)")
+            for name, seconds in result['seconds'].items():
+                print(f"   {name:<42} {seconds:>9.4f} s")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n   ✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        print(f"\n   Compared with {args.compare} (commit {baseline.get('commit')}):")
+        for item in regressions:
+            print(f"   ⚠️  {item['size']} {item['function']}: {item['baseline_s']:.4f}s → "
+                  f"{item['current_s']:.4f}s ({item['ratio']}x)")
+        if regressions:
+            sys.exit(1)
+        print("   ✓ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Supplier Engine Benchmark - Long-Format Shares and HHI
+======================================================
+Times compute_supplier_hhi and wide_view on a long supplier table of
+partners × products × quarters rows (200 × 5k × 80 = 80M by default) and
+checks the HHI against a dense NumPy reference on a sample of products.
+
+Usage:
+    python benchmark_suppliers.py
+    python benchmark_suppliers.py --partners 50 --products 1000 --quarters 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from supplier_panel import compute_supplier_hhi, wide_view
+
+def make_long(n_partners, n_products, n_quarters, seed=0):
+    """Long supplier table (partner-major) with log-normal flows"""
+    rng = np.random.default_rng(seed)
+    n_rows = n_partners * n_products * n_quarters
+    partners = ['china', 'india'] + [f'partner_{k}' for k in range(2, n_partners)]
+    return pd.DataFrame({
+        'importer': pd.Categorical.from_codes(np.zeros(n_rows, dtype=np.int8), ['us']),
+        'partner': pd.Categorical.from_codes(
+            np.repeat(np.arange(n_partners, dtype=np.int16), n_products * n_quarters), partners),
+        'hs_code': np.tile(np.repeat(np.arange(100, 100 + n_products, dtype=np.int32), n_quarters), n_partners),
+        'date': pd.Categorical.from_codes(
+            np.tile(np.arange(n_quarters, dtype=np.int16), n_partners * n_products),
+            [f"{2005 + q // 4}-Q{q % 4 + 1}" for q in range(n_quarters)]),
+        'value': rng.lognormal(10, 2, size=n_rows)
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the long-format supplier engine")
+    parser.add_argument('--partners', type=int, default=200)
+    parser.add_argument('--products', type=int, default=5_000)
+    parser.add_argument('--quarters', type=int, default=80)
+    args = parser.parse_args()
+
+    long = make_long(args.partners, args.products, args.quarters)
+
+    print("\n🌐 SUPPLIER ENGINE BENCHMARK")
+    print("=" * 60)
+    print(f"   Table: {args.partners} partners × {args.products:,} products × {args.quarters} quarters "
+          f"= {len(long):,} rows ({long.memory_usage().sum() / 1e9:.2f} GB)")
+
+    start = time.perf_counter()
+    hhi = compute_supplier_hhi(long)
+    t_hhi = time.perf_counter() - start
+
+    start = time.perf_counter()
+    view = wide_view(long)
+    t_view = time.perf_counter() - start
+
+    # Dense reference: values reshaped to partners × groups
+    sample = min(args.products, 50) * args.quarters
+    values = long['value'].to_numpy().reshape(args.partners, -1)[:, :sample]
+    fraction = values / values.sum(axis=0)
+    assert np.allclose(hhi['hhi'].to_numpy()[:sample], (fraction ** 2).sum(axis=0)), 'hhi'
+    assert np.array_equal(view['hhi_us_imports'].to_numpy()[:sample], hhi['hhi'].round(4).to_numpy()[:sample])
+
+    print(f"\n   compute_supplier_hhi: {t_hhi:>8.2f} s ({len(long) / t_hhi / 1e6:.1f}M rows/s)")
+    print(f"   wide_view:            {t_view:>8.2f} s ({len(long) / t_view / 1e6:.1f}M rows/s)")
+    print(f"\n   ✓ HHI matches the dense reference on {sample:,} product-quarters")
+
+if __name__ == "__main__":
+    main()
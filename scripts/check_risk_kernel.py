@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Risk Kernel Check - Array vs Scalar RiskAssessmentAgent
+=======================================================
+Checks that RiskAssessmentAgent.assess_risk_frame gives every row the same
+component scores and levels, overall score, urgency and disruption
+likelihood / impact as assess_risk on that row's data context:
+
+    - every product-quarter of outputs/trade_ntm_combined.csv, through
+      DataRetrievalAgent.get_product_data
+    - random rows concentrated on the bin thresholds and on decimal ties
+      of the rounding (e.g. a China share of 30.005)
+
+then times the kernel on a large frame.
+
+Usage:
+    python check_risk_kernel.py
+    python check_risk_kernel.py --rows 100000 --bench-rows 5000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from trade_agents import DataRetrievalAgent, RiskAssessmentAgent, RISK_INPUT_COLUMNS
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SEVERITIES = ['NONE', 'LOW', 'MEDIUM', 'HIGH']
+TRENDS = ['INCREASING', 'DECREASING', 'STABLE']
+
+def scalar_row(assessment):
+    """The kernel's columns from one assess_risk result"""
+    components = assessment['risk_components']
+    row = {}
+    for name in ['concentration', 'dependency', 'ntm_impact', 'trend']:
+        row[f'{name}_score'] = components[name]['score']
+        row[f'{name}_level'] = components[name]['level']
+    row.update(overall_risk_score=assessment['overall_risk_score'],
+               overall_risk_level=assessment['overall_risk_level'],
+               urgency=assessment['urgency'],
+               likelihood_score=assessment['disruption_likelihood']['score'],
+               impact_score=assessment['disruption_impact']['score'])
+    return row
+
+def context_of(row):
+    """Data context of a raw row, rounded as DataRetrievalAgent.get_product_data does"""
+    momentum = row['china_momentum']
+    return {
+        'current_metrics': {'hhi': round(row['hhi_us_imports'], 4),
+                            'china_share': round(row['china_share_us'], 2)},
+        'ntm_data': {'ntm_count': int(row['ntm_count']), 'ntm_severity': row['ntm_severity'],
+                     'has_sps': False, 'has_tbt': False},
+        'trends': {'china_trend': row['china_trend'],
+                   'china_momentum': round(momentum, 2) if pd.notna(momentum) else 0}
+    }
+
+def stress_frame(n_rows, seed=0):
+    """Raw rows around thresholds and rounding ties, plus uniform noise"""
+    rng = np.random.default_rng(seed)
+
+    def around(points, decimals, size):
+        # Exact thresholds, decimal ties next to them, and nearby values
+        base = rng.choice(points, size)
+        ties = base + rng.choice([-1.5, -0.5, 0.5, 1.5], size) / 10 ** decimals
+        noise = base + rng.normal(0, 10 ** -decimals, size)
+        return np.select([rng.random(size) < 1 / 3, rng.random(size) < 0.5], [base, ties], noise)
+
+    momentum = around([-3.0, 3.0], 2, n_rows)
+    momentum[rng.random(n_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'hhi_us_imports': np.where(rng.random(n_rows) < 0.5, around([0.15, 0.25], 4, n_rows),
+                                   rng.uniform(0, 1, n_rows)),
+        'china_share_us': np.where(rng.random(n_rows) < 0.5, around([30.0, 50.0, 70.0], 2, n_rows),
+                                   rng.uniform(0, 100, n_rows)),
+        'ntm_count': rng.choice([0, 1, 14, 15, 29, 30, 45], n_rows),
+        'ntm_severity': rng.choice(SEVERITIES, n_rows),
+        'china_trend': rng.choice(TRENDS, n_rows),
+        'china_momentum': momentum
+    })
+
+def uniform_frame(n_rows, seed=1):
+    """Raw rows with values spread over their whole ranges"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'hhi_us_imports': rng.uniform(0, 1, n_rows),
+        'china_share_us': rng.uniform(0, 100, n_rows),
+        'ntm_count': rng.integers(0, 50, n_rows),
+        'ntm_severity': pd.Categorical(rng.choice(SEVERITIES, n_rows)),
+        'china_trend': pd.Categorical(rng.choice(TRENDS, n_rows)),
+        'china_momentum': rng.normal(0, 5, n_rows)
+    })
+
+def compare(expected, actual, label):
+    """Assert the scalar rows equal the kernel frame, column by column"""
+    expected = pd.DataFrame(expected)
+    for col in expected.columns:
+        left = expected[col].to_numpy()
+        right = actual[col].astype(object).to_numpy() if isinstance(actual[col].dtype, pd.CategoricalDtype) \
+            else actual[col].to_numpy()
+        mismatches = np.flatnonzero(left != right)
+        assert not len(mismatches), f"{label}: {col} differs in {len(mismatches)} rows, e.g. row {mismatches[0]}"
+    print(f"   ✓ {label}: {len(expected):,} rows identical")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the array risk kernel against the scalar agent")
+    parser.add_argument('--rows', type=int, default=50_000, help="Random stress rows (default: 50000)")
+    parser.add_argument('--bench-rows', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    agent = RiskAssessmentAgent()
+
+    print("\n⚖️  RISK KERNEL CHECK")
+    print("=" * 60)
+
+    # Real panel, through the data agent
+    df = pd.read_csv(os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    df['hs_code'] = df['hs_code'].astype(str).str.strip()
+    data_agent = DataRetrievalAgent(df)
+    expected = [scalar_row(agent.assess_risk(data_agent.get_product_data(hs_code, quarter)))
+                for hs_code, quarter in zip(df['hs_code'], df['date'])]
+    compare(expected, agent.assess_risk_frame(df), "combined panel")
+
+    # Thresholds and rounding ties
+    stress = stress_frame(args.rows)
+    expected = [scalar_row(agent.assess_risk(context_of(row))) for row in stress.to_dict('records')]
+    compare(expected, agent.assess_risk_frame(stress), "stress rows")
+    labels = stress.astype({'ntm_severity': 'category', 'china_trend': 'category'})
+    compare(expected, agent.assess_risk_frame(labels), "stress rows, categorical labels")
+
+    # Throughput
+    bench = uniform_frame(args.bench_rows)
+    start = time.perf_counter()
+    agent.assess_risk_frame(bench)
+    elapsed = time.perf_counter() - start
+
+    # Scalar reference on the first 1000 rows
+    start = time.perf_counter()
+    for row in bench.head(1000).to_dict('records'):
+        agent.assess_risk(context_of(row))
+    per_row = (time.perf_counter() - start) / 1000
+
+    print(f"\n   assess_risk_frame: {args.bench_rows:,} rows in {elapsed:.2f}s "
+          f"({args.bench_rows / elapsed / 1e6:.1f}M rows/s)")
+    print(f"   assess_risk:       {per_row * 1e6:.1f} µs/row "
+          f"(~{per_row * args.bench_rows:.0f}s for the same rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Classification Bins - Shared Threshold Tables
+=============================================
+Threshold tables and vectorized labelling used by the indices pipeline
+(compute_trade_indices.py) and the Trade Risk AI Assistant agents, so both
+classify HHI, risk scores and China dependency with the same cut-offs.
+
+A bin table maps a numeric column to len(thresholds) + 1 ordered labels:
+    closed='right'  ->  label i+1 when value >  thresholds[i]
+    closed='left'   ->  label i+1 when value >= thresholds[i]
+Missing values fall into the lowest label, like the else-branch of the
+original if/elif classifiers.
+"""
+
+import numpy as np
+import pandas as pd
+
+# HHI concentration (hhi > 0.25 HIGH, > 0.15 MODERATE)
+CONCENTRATION_BINS = {
+    'thresholds': [0.15, 0.25],
+    'labels': ['LOW', 'MODERATE', 'HIGH'],
+    'closed': 'right'
+}
+
+# Geopolitical / overall risk score (>= 70 HIGH, >= 40 MEDIUM)
+RISK_BINS = {
+    'thresholds': [40, 70],
+    'labels': ['LOW', 'MEDIUM', 'HIGH'],
+    'closed': 'left'
+}
+
+# China share of US imports (> 70 CRITICAL, > 50 HIGH, > 30 MEDIUM)
+DEPENDENCY_BINS = {
+    'thresholds': [30, 50, 70],
+    'labels': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'],
+    'closed': 'right'
+}
+
+# Disruption likelihood from the overall risk score (>= 70 High, >= 50 Medium)
+LIKELIHOOD_BINS = {
+    'thresholds': [50, 70],
+    'labels': ['LOW', 'MEDIUM', 'HIGH'],
+    'closed': 'left'
+}
+
+# NTM burden from the number of measures in force (>= 10 HIGH, >= 5 MEDIUM, >= 1 LOW)
+NTM_SEVERITY_BINS = {
+    'thresholds': [1, 5, 10],
+    'labels': ['NONE', 'LOW', 'MEDIUM', 'HIGH'],
+    'closed': 'left'
+}
+
+# Labels for pairwise comparisons, ordered (left < right, equal, left > right)
+TREND_LABELS = ['DECREASING', 'STABLE', 'INCREASING']
+ADVANTAGE_LABELS = ['INDIA', 'NEUTRAL', 'CHINA']
+
+def bin_codes(values, bins):
+    """Return the int8 bin index of every value for a threshold table"""
+    values = np.asarray(values, dtype=float)
+    thresholds = np.asarray(bins['thresholds'], dtype=float)
+
+    # searchsorted counts thresholds strictly below (right-closed) or at/below (left-closed)
+    side = 'left' if bins['closed'] == 'right' else 'right'
+    codes = np.searchsorted(thresholds, values, side=side)
+
+    return np.where(np.isnan(values), 0, codes).astype(np.int8)
+
+def bin_index(value, bins):
+    """Return the bin index of a single value"""
+    return int(bin_codes([value], bins)[0])
+
+def classify(values, bins):
+    """Label values with an ordered Categorical from a threshold table"""
+    return pd.Categorical.from_codes(bin_codes(values, bins), categories=bins['labels'], ordered=True)
+
+def compare_codes(left, right):
+    """Return 0 where left < right, 2 where left > right, 1 otherwise (ties and NaN)"""
+    left = np.asarray(left, dtype=float)
+    right = np.asarray(right, dtype=float)
+    return ((left > right).astype(np.int8) - (left < right).astype(np.int8) + 1).astype(np.int8)
+
+def classify_comparison(left, right, labels):
+    """Label a pairwise comparison with an ordered Categorical (lower, equal, greater)"""
+    return pd.Categorical.from_codes(compare_codes(left, right), categories=labels, ordered=True)
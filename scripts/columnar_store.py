@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Columnar Store - Partitioned Parquet Datasets
+=============================================
+Writes and reads the trade panel as a Parquet dataset partitioned by year
+and hs_code (hive layout: year=2024/hs_code=8517/part-0.parquet).
+
+Label columns are stored as dictionary-encoded ordered categoricals and the
+partition keys are read back as strings, so loaders get the same dtypes the
+pipeline produced without re-parsing. Readers select columns and push
+hs_code / quarter predicates down to the partition and row-group level.
+
+Requires pyarrow.
+
+Usage (convert an existing CSV export):
+    python columnar_store.py ../outputs/trade_ntm_combined.csv
+"""
+
+import argparse
+import os
+import shutil
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional dependency, only needed for Parquet I/O
+    pa = None
+    ds = None
+
+PARTITION_COLUMNS = ['year', 'hs_code']
+
+# Low-cardinality label columns stored as categoricals
+LABEL_COLUMNS = ['concentration_level', 'risk_level', 'china_trend', 'india_trend',
+                 'rca_advantage', 'ntm_severity']
+
+def _require_pyarrow():
+    """Fail with an actionable message when pyarrow is missing"""
+    if pa is None:
+        raise ImportError("Parquet datasets need pyarrow: pip install pyarrow")
+
+def dataset_path(output_path):
+    """Directory of the Parquet dataset that goes with a CSV output path"""
+    return os.path.splitext(output_path)[0] + '.parquet'
+
+def partitioning():
+    """Hive partitioning on year / hs_code, both read back as strings"""
+    _require_pyarrow()
+    schema = pa.schema([('year', pa.string()), ('hs_code', pa.string())])
+    return ds.partitioning(schema, flavor='hive')
+
+def dataset_size(path):
+    """Total bytes of all files under a dataset directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def write_partitioned(df, path, basename_template='part-{i}.parquet', replace=True):
+    """Write df as a partitioned Parquet dataset, return its size in bytes
+
+    replace=True makes df the whole dataset: it is written to a staging
+    directory that is then swapped in for path, so partitions of earlier
+    runs cannot survive and readers never see a half-written dataset.
+    replace=False merges: partitions present in df replace any existing
+    files for the same year/hs_code, other partitions are left untouched.
+    """
+    _require_pyarrow()
+
+    df = df.copy()
+    for col in PARTITION_COLUMNS:
+        df[col] = df[col].astype(str)
+    for col in LABEL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    target = f"{path}.staging-{os.getpid()}" if replace else path
+    if replace:
+        shutil.rmtree(target, ignore_errors=True)
+    ds.write_dataset(
+        table, target,
+        format='parquet',
+        partitioning=partitioning(),
+        basename_template=basename_template,
+        existing_data_behavior='delete_matching'
+    )
+    if replace:
+        retired = f"{path}.retired-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, retired)
+        os.replace(target, path)
+        shutil.rmtree(retired, ignore_errors=True)
+    return dataset_size(path)
+
+def open_partitioned(path):
+    """Discover a partitioned dataset once (lists every file) for repeated reads"""
+    _require_pyarrow()
+    return ds.dataset(path, format='parquet', partitioning=partitioning())
+
+def read_partitioned(source, columns=None, hs_code=None, quarter=None):
+    """Read a partitioned dataset, optionally restricted to columns / hs_code / quarter
+
+    source is a dataset directory or an open_partitioned dataset, which
+    skips listing the files again. hs_code is matched against the partition
+    key (only that product's files are opened); quarter is pushed down as a
+    row filter on `date`.
+    """
+    _require_pyarrow()
+    dataset = source if isinstance(source, ds.Dataset) else open_partitioned(source)
+
+    predicate = None
+    if hs_code is not None:
+        predicate = ds.field('hs_code') == str(hs_code)
+    if quarter is not None:
+        quarter_filter = ds.field('date') == quarter
+        predicate = quarter_filter if predicate is None else predicate & quarter_filter
+
+    return dataset.to_table(columns=columns, filter=predicate).to_pandas()
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a CSV export to a partitioned Parquet dataset")
+    parser.add_argument('csv_path')
+    parser.add_argument('--output', help="Dataset directory (default: <csv_path without .csv>.parquet)")
+    args = parser.parse_args()
+
+    output = args.output or dataset_path(args.csv_path)
+    print(f"\n💾 Converting {args.csv_path} → {output}...")
+
+    df = pd.read_csv(args.csv_path, dtype={'hs_code': str, 'year': str})
+    size = write_partitioned(df, output)
+
+    print(f"   ✓ Saved {len(df)} rows with {len(df.columns)} columns")
+    print(f"   ✓ Dataset size: {size / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -7,24 +7,85 @@ for US-China-India bilateral trade analysis.
 
 Input: master_data_us_china_india.csv
 Output: trade_data_with_indices.csv
+
+Usage:
+    python compute_trade_indices.py                       # in-memory run (stage DAG, checkpointed)
+    python compute_trade_indices.py --target risk --risk-weights '{"china_share": 0.6}'
+    python compute_trade_indices.py --input master.csv --output out/indices.csv --no-cache
+    python compute_trade_indices.py --stream --chunksize 500000
+    python compute_trade_indices.py --workers 8           # parallel per-product stages
+    python compute_trade_indices.py --append-quarter new_quarter.csv
+    python compute_trade_indices.py --format both         # Parquet dataset + CSV export
+    python compute_trade_indices.py --quiet --profile     # per-stage timing/memory report
+    python compute_trade_indices.py --portfolio --workers 8   # + precomputed agent analyses
 """
 
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+import classification
+import supplier_panel
+from columnar_store import dataset_path, dataset_size, write_partitioned, read_partitioned
+from pipeline_dag import resolve_plan, run_stages
+from portfolio_batch import (
+    PORTFOLIO_FILENAME, combine_with_ntm, load_ntm_aggregates, portfolio_path, run_portfolio
+)
+from supplier_panel import partner_columns, wide_to_long, wide_view
+from stage_profiler import profiled_stage, profiling, disable as disable_profiling
+from classification import (
+    CONCENTRATION_BINS, RISK_BINS, TREND_LABELS, ADVANTAGE_LABELS,
+    classify, classify_comparison
+)
+
+logger = logging.getLogger(__name__)
+
+# Flow columns whose panel-wide totals feed trade intensity and RCA
+GLOBAL_TOTAL_COLUMNS = ['us_import_world', 'china_export_world', 'india_export_world']
+
+# Weights of the composite scores in compute_risk_scores
+RISK_SCORE_WEIGHTS = {
+    # geopolitical_risk_score
+    'china_share': 0.5,       # 50% weight on China share
+    'hhi': 0.3,               # 30% weight on concentration (HHI × 100)
+    'intensity': 4,           # 20% weight on trade intensity (capped, scaled)
+    'intensity_cap': 5,
+    # india_opportunity_score
+    'india_headroom': 0.4,    # room to grow (100 - India share)
+    'india_rca': 10,          # India's comparative advantage (capped)
+    'india_rca_cap': 5,
+    'china_dominance': 0.4    # current China dominance creates opportunity
+}
+
+# Suppliers with their own wide columns; further us_import_<partner>
+# columns only feed the HHI
+WIDE_PARTNERS = ['china', 'india']
+
+# Columns read by the per-product (groupby hs_code) stages
+PER_PRODUCT_INPUT_COLUMNS = ['hs_code', 'date',
+                             'us_import_china', 'us_import_india', 'us_import_world',
+                             'china_export_world', 'india_export_world',
+                             'china_share_us', 'india_share_us']
+
 def load_data(filepath):
     """Load and validate trade data"""
-    print("📊 Loading trade data...")
+    logger.info("📊 Loading trade data...")
     df = pd.read_csv(filepath)
-    print(f"   ✓ Loaded {len(df)} rows, {len(df.columns)} columns")
-    print(f"   ✓ Products: {df['hs_code'].nunique()}")
-    print(f"   ✓ Time periods: {df['date'].nunique()}")
+    logger.info(f"   ✓ Loaded {len(df)} rows, {len(df.columns)} columns")
+    logger.info(f"   ✓ Products: {df['hs_code'].nunique()}")
+    logger.info(f"   ✓ Time periods: {df['date'].nunique()}")
     return df
 
+@profiled_stage
 def compute_market_shares(df):
     """Compute market share percentages"""
-    print("\n📈 Computing market shares...")
+    logger.info("\n📈 Computing market shares...")
     
     # China's share of US imports
     df['china_share_us'] = (df['us_import_china'] / df['us_import_world'] * 100).round(2)
@@ -41,44 +102,58 @@ def compute_market_shares(df):
     # Other countries' share (rest of world)
     df['other_share_us'] = (100 - df['china_share_us'] - df['india_share_us']).round(2)
     
-    print(f"   ✓ Market shares calculated")
+    logger.info(f"   ✓ Market shares calculated")
     return df
 
+def additional_partners(df):
+    """Partners with us_import_<partner> columns beyond WIDE_PARTNERS"""
+    return [p for p in partner_columns(df) if p not in WIDE_PARTNERS]
+
+@profiled_stage
 def compute_concentration_hhi(df):
-    """Compute Hirschman-Herfindahl Index (HHI) for concentration"""
-    print("\n📊 Computing HHI concentration indices...")
+    """Compute Hirschman-Herfindahl Index (HHI) for concentration
+    
+    With only China and India reported, the rest of the world counts as one
+    supplier. When the panel has further us_import_<partner> columns the HHI
+    is taken over every partner with the long-format engine (supplier_panel.py).
+    """
+    logger.info("\n📊 Computing HHI concentration indices...")
     
     # HHI based on supplier concentration to US market
     # HHI = sum of squared market shares (higher = more concentrated)
-    df['hhi_us_imports'] = (
-        (df['china_share_us'] / 100) ** 2 + 
-        (df['india_share_us'] / 100) ** 2 + 
-        (df['other_share_us'] / 100) ** 2
-    ).round(4)
-    
-    # Concentration level classification
-    def classify_concentration(hhi):
-        if hhi > 0.25:
-            return 'HIGH'
-        elif hhi > 0.15:
-            return 'MODERATE'
-        else:
-            return 'LOW'
-    
-    df['concentration_level'] = df['hhi_us_imports'].apply(classify_concentration)
-    
-    print(f"   ✓ HHI indices calculated")
+    if additional_partners(df):
+        view = wide_view(wide_to_long(df))
+        view['date'] = view['date'].astype(df['date'].dtype)
+        df['hhi_us_imports'] = df[['hs_code', 'date']].merge(
+            view, on=['hs_code', 'date'], how='left')['hhi_us_imports'].to_numpy()
+    else:
+        df['hhi_us_imports'] = (
+            (df['china_share_us'] / 100) ** 2 + 
+            (df['india_share_us'] / 100) ** 2 + 
+            (df['other_share_us'] / 100) ** 2
+        ).round(4)
+    
+    # Concentration level classification (HIGH > 0.25, MODERATE > 0.15)
+    df['concentration_level'] = classify(df['hhi_us_imports'], CONCENTRATION_BINS)
+    
+    logger.info(f"   ✓ HHI indices calculated")
     return df
 
-def compute_trade_intensity(df):
-    """Compute Trade Intensity Index"""
-    print("\n🔄 Computing Trade Intensity Index...")
+@profiled_stage
+def compute_trade_intensity(df, world_trade_proxy=None):
+    """Compute Trade Intensity Index
+    
+    world_trade_proxy: panel-wide US import total; computed from df when not
+    given (streaming mode passes the value collected in the first pass).
+    """
+    logger.info("\n🔄 Computing Trade Intensity Index...")
     
     # Trade Intensity = (bilateral trade / total trade) / (partner's world trade / world total trade)
     # Simplified version: US import share from partner relative to partner's global export capacity
     
     # For China-US trade intensity
-    world_trade_proxy = df['us_import_world'].sum()  # Simplified proxy
+    if world_trade_proxy is None:
+        world_trade_proxy = df['us_import_world'].sum()  # Simplified proxy
     df['trade_intensity_china'] = (
         (df['us_import_china'] / df['us_import_world']) / 
         (df['china_export_world'] / world_trade_proxy)
@@ -90,12 +165,13 @@ def compute_trade_intensity(df):
         (df['india_export_world'] / world_trade_proxy)
     ).round(4)
     
-    print(f"   ✓ Trade Intensity indices calculated")
+    logger.info(f"   ✓ Trade Intensity indices calculated")
     return df
 
+@profiled_stage
 def compute_growth_rates(df):
     """Compute quarter-over-quarter growth rates"""
-    print("\n📈 Computing growth rates...")
+    logger.info("\n📈 Computing growth rates...")
     
     # Sort by product and date
     df = df.sort_values(['hs_code', 'date']).reset_index(drop=True)
@@ -107,12 +183,13 @@ def compute_growth_rates(df):
         df[growth_col] = df.groupby('hs_code')[col].pct_change() * 100
         df[growth_col] = df[growth_col].round(2)
     
-    print(f"   ✓ Growth rates calculated")
+    logger.info(f"   ✓ Growth rates calculated")
     return df
 
+@profiled_stage
 def compute_diversification_metrics(df):
     """Compute diversification and dependency metrics"""
-    print("\n🌐 Computing diversification metrics...")
+    logger.info("\n🌐 Computing diversification metrics...")
     
     # Diversification score (inverse of concentration)
     # Higher score = more diversified = less dependent on single source
@@ -128,12 +205,29 @@ def compute_diversification_metrics(df):
     # Trade balance implications
     df['china_india_ratio'] = (df['us_import_china'] / (df['us_import_india'] + 1)).round(2)  # +1 to avoid div by zero
     
-    print(f"   ✓ Diversification metrics calculated")
+    logger.info(f"   ✓ Diversification metrics calculated")
     return df
 
-def compute_revealed_comparative_advantage(df):
-    """Compute Revealed Comparative Advantage (RCA) indices"""
-    print("\n💪 Computing RCA (Revealed Comparative Advantage)...")
+def compute_date_totals(df):
+    """Per-date sums of the flow columns used as RCA denominators"""
+    return df.groupby('date')[GLOBAL_TOTAL_COLUMNS].sum()
+
+def compute_global_aggregates(df):
+    """Panel-wide aggregates needed by the cross-sectional stages"""
+    date_totals = compute_date_totals(df)
+    return {
+        'world_trade_proxy': date_totals['us_import_world'].sum(),
+        'date_totals': date_totals
+    }
+
+@profiled_stage
+def compute_revealed_comparative_advantage(df, date_totals=None):
+    """Compute Revealed Comparative Advantage (RCA) indices
+    
+    date_totals: per-date sums of GLOBAL_TOTAL_COLUMNS indexed by date;
+    computed from df when not given.
+    """
+    logger.info("\n💪 Computing RCA (Revealed Comparative Advantage)...")
     
     # RCA = (Product's share in country's exports) / (Product's share in world exports)
     # RCA > 1 indicates comparative advantage
@@ -141,120 +235,118 @@ def compute_revealed_comparative_advantage(df):
     # For each time period, we need world totals
     # Simplified: Using US import world as proxy for world demand
     
-    # China RCA for each product
-    china_total_exports = df.groupby('date')['china_export_world'].sum()
-    world_total_proxy = df.groupby('date')['us_import_world'].sum()
+    # Per-date totals broadcast back onto every row
+    if date_totals is None:
+        date_totals = compute_date_totals(df)
+    row_totals = date_totals.reindex(df['date'])
+    china_total_exports = row_totals['china_export_world'].to_numpy()
+    india_total_exports = row_totals['india_export_world'].to_numpy()
+    world_total_proxy = row_totals['us_import_world'].to_numpy()
     
-    df['china_rca'] = df.apply(
-        lambda row: (
-            (row['china_export_world'] / china_total_exports[row['date']]) /
-            (row['us_import_world'] / world_total_proxy[row['date']])
-        ) if china_total_exports[row['date']] > 0 and world_total_proxy[row['date']] > 0 else 0,
-        axis=1
-    ).round(4)
+    # World share of each product in its period (shared by both RCAs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        world_share = df['us_import_world'].to_numpy() / world_total_proxy
+    
+    # China RCA for each product (0 where a period total is not positive)
+    china_valid = (china_total_exports > 0) & (world_total_proxy > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        china_rca = (df['china_export_world'].to_numpy() / china_total_exports) / world_share
+    df['china_rca'] = pd.Series(np.where(china_valid, china_rca, 0.0), index=df.index).round(4)
     
     # India RCA for each product
-    india_total_exports = df.groupby('date')['india_export_world'].sum()
-    
-    df['india_rca'] = df.apply(
-        lambda row: (
-            (row['india_export_world'] / india_total_exports[row['date']]) /
-            (row['us_import_world'] / world_total_proxy[row['date']])
-        ) if india_total_exports[row['date']] > 0 and world_total_proxy[row['date']] > 0 else 0,
-        axis=1
-    ).round(4)
+    india_valid = (india_total_exports > 0) & (world_total_proxy > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        india_rca = (df['india_export_world'].to_numpy() / india_total_exports) / world_share
+    df['india_rca'] = pd.Series(np.where(india_valid, india_rca, 0.0), index=df.index).round(4)
     
     # RCA comparison: which country has stronger comparative advantage
-    df['rca_advantage'] = df.apply(
-        lambda row: 'CHINA' if row['china_rca'] > row['india_rca'] 
-        else 'INDIA' if row['india_rca'] > row['china_rca'] 
-        else 'NEUTRAL',
-        axis=1
-    )
-    
-    print(f"   ✓ RCA indices calculated")
+    df['rca_advantage'] = classify_comparison(df['china_rca'], df['india_rca'], ADVANTAGE_LABELS)
+    
+    logger.info(f"   ✓ RCA indices calculated")
     return df
 
-def compute_risk_scores(df):
-    """Compute composite risk scores"""
-    print("\n⚠️  Computing risk scores...")
+@profiled_stage
+def compute_risk_scores(df, weights=None):
+    """Compute composite risk scores
+    
+    weights: overrides for RISK_SCORE_WEIGHTS
+    """
+    logger.info("\n⚠️  Computing risk scores...")
+    w = {**RISK_SCORE_WEIGHTS, **(weights or {})}
     
     # Geopolitical risk score (0-100)
     # Based on: concentration + China dependency + trade intensity
     df['geopolitical_risk_score'] = (
-        (df['china_share_us'] * 0.5) +  # 50% weight on China share
-        (df['hhi_us_imports'] * 100 * 0.3) +  # 30% weight on concentration
-        (df['trade_intensity_china'].clip(upper=5) * 4)  # 20% weight on trade intensity (scaled)
+        (df['china_share_us'] * w['china_share']) +
+        (df['hhi_us_imports'] * 100 * w['hhi']) +
+        (df['trade_intensity_china'].clip(upper=w['intensity_cap']) * w['intensity'])
     ).round(2)
     
     # Normalize to 0-100
     df['geopolitical_risk_score'] = df['geopolitical_risk_score'].clip(upper=100)
     
-    # Risk level classification
-    def classify_risk(score):
-        if score >= 70:
-            return 'HIGH'
-        elif score >= 40:
-            return 'MEDIUM'
-        else:
-            return 'LOW'
-    
-    df['risk_level'] = df['geopolitical_risk_score'].apply(classify_risk)
+    # Risk level classification (HIGH >= 70, MEDIUM >= 40)
+    df['risk_level'] = classify(df['geopolitical_risk_score'], RISK_BINS)
     
     # Diversification opportunity score (0-100, higher = better opportunity for India)
     df['india_opportunity_score'] = (
-        (100 - df['india_share_us']) * 0.4 +  # Room to grow
-        (df['india_rca'].clip(upper=5) * 10) +  # India's comparative advantage
-        (df['china_share_us'] * 0.4)  # Current China dominance creates opportunity
+        (100 - df['india_share_us']) * w['india_headroom'] +  # Room to grow
+        (df['india_rca'].clip(upper=w['india_rca_cap']) * w['india_rca']) +  # India's comparative advantage
+        (df['china_share_us'] * w['china_dominance'])  # Current China dominance creates opportunity
     ).round(2)
     
     df['india_opportunity_score'] = df['india_opportunity_score'].clip(upper=100)
     
-    print(f"   ✓ Risk scores calculated")
+    logger.info(f"   ✓ Risk scores calculated")
     return df
 
+def trailing_mean(df, col, window=4):
+    """Per-product mean of the last `window` values (fewer at the start of a series)
+    
+    Each mean is summed from its own window, oldest value first, so it does
+    not carry rounding drift from earlier quarters and an incremental run
+    that only sees the last window reproduces it exactly.
+    """
+    grouped = df.groupby('hs_code')[col]
+    total = pd.Series(0.0, index=df.index)
+    count = pd.Series(0, index=df.index)
+    
+    for lag in range(window - 1, -1, -1):
+        values = grouped.shift(lag) if lag else df[col]
+        total = total + values.fillna(0)
+        count = count + values.notna()
+    
+    return total / count
+
+@profiled_stage
 def compute_trend_indicators(df):
     """Compute trend indicators (moving averages, momentum)"""
-    print("\n📉 Computing trend indicators...")
+    logger.info("\n📉 Computing trend indicators...")
     
     # Sort by product and date
     df = df.sort_values(['hs_code', 'date']).reset_index(drop=True)
     
     # 4-quarter moving average for China share
-    df['china_share_ma4'] = df.groupby('hs_code')['china_share_us'].transform(
-        lambda x: x.rolling(window=4, min_periods=1).mean()
-    ).round(2)
+    df['china_share_ma4'] = trailing_mean(df, 'china_share_us').round(2)
     
     # 4-quarter moving average for India share
-    df['india_share_ma4'] = df.groupby('hs_code')['india_share_us'].transform(
-        lambda x: x.rolling(window=4, min_periods=1).mean()
-    ).round(2)
+    df['india_share_ma4'] = trailing_mean(df, 'india_share_us').round(2)
     
     # Trend direction (comparing current to MA)
-    df['china_trend'] = df.apply(
-        lambda row: 'INCREASING' if row['china_share_us'] > row['china_share_ma4']
-        else 'DECREASING' if row['china_share_us'] < row['china_share_ma4']
-        else 'STABLE',
-        axis=1
-    )
-    
-    df['india_trend'] = df.apply(
-        lambda row: 'INCREASING' if row['india_share_us'] > row['india_share_ma4']
-        else 'DECREASING' if row['india_share_us'] < row['india_share_ma4']
-        else 'STABLE',
-        axis=1
-    )
+    df['china_trend'] = classify_comparison(df['china_share_us'], df['china_share_ma4'], TREND_LABELS)
+    df['india_trend'] = classify_comparison(df['india_share_us'], df['india_share_ma4'], TREND_LABELS)
     
     # Momentum (rate of change in market share)
     df['china_momentum'] = df.groupby('hs_code')['china_share_us'].diff().round(2)
     df['india_momentum'] = df.groupby('hs_code')['india_share_us'].diff().round(2)
     
-    print(f"   ✓ Trend indicators calculated")
+    logger.info(f"   ✓ Trend indicators calculated")
     return df
 
-def add_metadata(df):
+@profiled_stage
+def add_metadata(df, timestamp=None):
     """Add metadata and timestamps"""
-    print("\n🏷️  Adding metadata...")
+    logger.info("\n🏷️  Adding metadata...")
     
     # Quarter number (for easier sorting/analysis)
     def extract_quarter(date_str):
@@ -267,71 +359,196 @@ def add_metadata(df):
     df['year'] = df['date'].str.split('-').str[0]
     
     # Analysis timestamp
-    df['analysis_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if timestamp is None:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df['analysis_timestamp'] = timestamp
+    
+    logger.info(f"   ✓ Metadata added")
+    return df
+
+def run_per_product_stages(df):
+    """Per-product stages: growth rates and trend indicators"""
+    df = compute_growth_rates(df)
+    df = compute_trend_indicators(df)
+    return df
+
+def partition_by_product(df, n_partitions):
+    """Split a frame sorted by hs_code into up to n_partitions slices of whole products"""
+    codes = df['hs_code'].to_numpy()
+    product_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    
+    # Cut between products, at roughly equal numbers of products per slice
+    product_groups = np.array_split(product_starts, min(n_partitions, len(product_starts)))
+    bounds = [group[0] for group in product_groups if len(group)] + [len(df)]
+    
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+@profiled_stage
+def run_per_product_stages_parallel(df, workers, partitions_per_worker=4):
+    """Run the per-product stages across a process pool
+    
+    The panel is sorted by (hs_code, date) and cut into slices of whole
+    products; only PER_PRODUCT_INPUT_COLUMNS are shipped to the workers.
+    pool.map returns slices in submission order, so the reassembled columns
+    line up with the sorted panel exactly as in a serial run.
+    """
+    logger.info(f"\n⚡ Running per-product stages on {workers} workers...")
+    
+    df = df.sort_values(['hs_code', 'date']).reset_index(drop=True)
+    partitions = partition_by_product(df[PER_PRODUCT_INPUT_COLUMNS], workers * partitions_per_worker)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=disable_profiling) as pool:
+        results = list(pool.map(run_per_product_stages, partitions))
+    
+    computed = pd.concat(results, ignore_index=True)
+    for col in computed.columns.difference(PER_PRODUCT_INPUT_COLUMNS, sort=False):
+        df[col] = computed[col]
     
-    print(f"   ✓ Metadata added")
+    logger.info(f"   ✓ {len(partitions)} product partitions reassembled")
+    return df
+
+def compute_all_indices(df, aggregates=None, timestamp=None, workers=1):
+    """Run every compute stage in order
+    
+    aggregates: output of compute_global_aggregates / collect_global_aggregates;
+    when omitted the global totals are taken from df itself.
+    workers: with more than one worker, growth rates and trend indicators run
+    in a process pool after the cross-sectional stages have seen the whole panel.
+    """
+    aggregates = aggregates or {}
+    
+    if workers > 1:
+        # Cross-sectional stages need the whole panel (global sum, per-date totals)
+        df = compute_market_shares(df)
+        df = compute_concentration_hhi(df)
+        df = compute_trade_intensity(df, aggregates.get('world_trade_proxy'))
+        df = compute_diversification_metrics(df)
+        df = compute_revealed_comparative_advantage(df, aggregates.get('date_totals'))
+        df = compute_risk_scores(df)
+        df = run_per_product_stages_parallel(df, workers)
+        df = add_metadata(df, timestamp)
+        return df
+    
+    df = compute_market_shares(df)
+    df = compute_concentration_hhi(df)
+    df = compute_trade_intensity(df, aggregates.get('world_trade_proxy'))
+    df = compute_growth_rates(df)
+    df = compute_diversification_metrics(df)
+    df = compute_revealed_comparative_advantage(df, aggregates.get('date_totals'))
+    df = compute_risk_scores(df)
+    df = compute_trend_indicators(df)
+    df = add_metadata(df, timestamp)
     return df
 
+def build_stages(risk_weights=None, partners=()):
+    """Declared stage DAG of the in-memory pipeline (see pipeline_dag.py)
+    
+    Stages run on a panel sorted by (hs_code, date), the order that the
+    growth and trend stages sort into. partners: additional_partners of the
+    input, whose flows the HHI stage also reads.
+    """
+    flow_cols = ['us_import_china', 'us_import_india', 'us_import_world',
+                 'china_export_world', 'india_export_world']
+    supplier_cols = ['hs_code', 'date', 'us_import_world'] + [
+        f'us_import_{p}' for p in WIDE_PARTNERS + list(partners)]
+    return [
+        {'name': 'shares', 'func': compute_market_shares,
+         'reads': flow_cols,
+         'writes': ['china_share_us', 'india_share_us', 'us_share_china_exports',
+                    'us_share_india_exports', 'other_share_us']},
+        {'name': 'hhi', 'func': compute_concentration_hhi,
+         'reads': ['china_share_us', 'india_share_us', 'other_share_us'] + (supplier_cols if partners else []),
+         'writes': ['hhi_us_imports', 'concentration_level'],
+         'depends': [additional_partners, WIDE_PARTNERS, supplier_panel, classification]},
+        {'name': 'intensity', 'func': compute_trade_intensity,
+         'reads': flow_cols,
+         'writes': ['trade_intensity_china', 'trade_intensity_india']},
+        {'name': 'growth', 'func': compute_growth_rates,
+         'reads': ['hs_code', 'date'] + flow_cols,
+         'writes': [f'{col}_growth' for col in flow_cols]},
+        {'name': 'diversification', 'func': compute_diversification_metrics,
+         'reads': ['hhi_us_imports', 'china_share_us', 'us_import_china', 'us_import_india'],
+         'writes': ['diversification_score', 'china_dependency_risk', 'china_india_ratio']},
+        {'name': 'rca', 'func': compute_revealed_comparative_advantage,
+         'reads': ['date'] + GLOBAL_TOTAL_COLUMNS,
+         'writes': ['china_rca', 'india_rca', 'rca_advantage'],
+         'depends': [compute_date_totals, GLOBAL_TOTAL_COLUMNS, classification]},
+        {'name': 'risk', 'func': compute_risk_scores,
+         'reads': ['china_share_us', 'hhi_us_imports', 'trade_intensity_china',
+                   'india_share_us', 'india_rca'],
+         'writes': ['geopolitical_risk_score', 'risk_level', 'india_opportunity_score'],
+         'params': {'weights': {**RISK_SCORE_WEIGHTS, **(risk_weights or {})}},
+         'depends': [classification]},
+        {'name': 'trend', 'func': compute_trend_indicators,
+         'reads': ['hs_code', 'date', 'china_share_us', 'india_share_us'],
+         'writes': ['china_share_ma4', 'india_share_ma4', 'china_trend', 'india_trend',
+                    'china_momentum', 'india_momentum'],
+         'depends': [trailing_mean, classification]},
+        {'name': 'metadata', 'func': add_metadata,
+         'reads': ['date'],
+         'writes': ['quarter_num', 'year', 'analysis_timestamp'],
+         'cache': False}
+    ]
+
 def generate_summary_stats(df):
     """Generate and print summary statistics"""
-    print("\n" + "="*80)
-    print("📊 SUMMARY STATISTICS")
-    print("="*80)
+    logger.info("\n" + "="*80)
+    logger.info("📊 SUMMARY STATISTICS")
+    logger.info("="*80)
     
     # Overall stats
-    print(f"\n🌍 Overall Trade Volume (Average per Quarter):")
-    print(f"   US Imports from China: ${df['us_import_china'].mean():,.0f}K")
-    print(f"   US Imports from India:  ${df['us_import_india'].mean():,.0f}K")
-    print(f"   US Imports from World:  ${df['us_import_world'].mean():,.0f}K")
+    logger.info(f"\n🌍 Overall Trade Volume (Average per Quarter):")
+    logger.info(f"   US Imports from China: ${df['us_import_china'].mean():,.0f}K")
+    logger.info(f"   US Imports from India:  ${df['us_import_india'].mean():,.0f}K")
+    logger.info(f"   US Imports from World:  ${df['us_import_world'].mean():,.0f}K")
     
     # Market share averages
-    print(f"\n📊 Average Market Shares:")
-    print(f"   China's share of US imports: {df['china_share_us'].mean():.2f}%")
-    print(f"   India's share of US imports:  {df['india_share_us'].mean():.2f}%")
+    logger.info(f"\n📊 Average Market Shares:")
+    logger.info(f"   China's share of US imports: {df['china_share_us'].mean():.2f}%")
+    logger.info(f"   India's share of US imports:  {df['india_share_us'].mean():.2f}%")
     
     # Concentration
-    print(f"\n📈 Concentration Metrics:")
-    print(f"   Average HHI: {df['hhi_us_imports'].mean():.4f}")
-    print(f"   High concentration periods: {(df['concentration_level'] == 'HIGH').sum()} quarters")
+    logger.info(f"\n📈 Concentration Metrics:")
+    logger.info(f"   Average HHI: {df['hhi_us_imports'].mean():.4f}")
+    logger.info(f"   High concentration periods: {(df['concentration_level'] == 'HIGH').sum()} quarters")
     
     # Risk distribution
-    print(f"\n⚠️  Risk Distribution:")
+    logger.info(f"\n⚠️  Risk Distribution:")
     risk_counts = df['risk_level'].value_counts()
     for level in ['HIGH', 'MEDIUM', 'LOW']:
         count = risk_counts.get(level, 0)
         pct = count / len(df) * 100
-        print(f"   {level}: {count} observations ({pct:.1f}%)")
+        logger.info(f"   {level}: {count} observations ({pct:.1f}%)")
     
     # RCA comparison
-    print(f"\n💪 Comparative Advantage (RCA > 1):")
-    print(f"   China has advantage: {(df['china_rca'] > 1).sum()} observations")
-    print(f"   India has advantage:  {(df['india_rca'] > 1).sum()} observations")
+    logger.info(f"\n💪 Comparative Advantage (RCA > 1):")
+    logger.info(f"   China has advantage: {(df['china_rca'] > 1).sum()} observations")
+    logger.info(f"   India has advantage:  {(df['india_rca'] > 1).sum()} observations")
     
     # Product-level summary
-    print(f"\n📦 Product-Level Insights:")
+    logger.info(f"\n📦 Product-Level Insights:")
     product_summary = df.groupby('hs_code').agg({
         'china_share_us': 'mean',
         'india_share_us': 'mean',
         'geopolitical_risk_score': 'mean'
     }).round(2)
     
-    print("\n   Product    China Share    India Share    Avg Risk Score")
-    print("   " + "-"*60)
+    logger.info("\n   Product    China Share    India Share    Avg Risk Score")
+    logger.info("   " + "-"*60)
     for idx, row in product_summary.iterrows():
-        print(f"   {idx:<10} {row['china_share_us']:>10.2f}%    {row['india_share_us']:>10.2f}%    {row['geopolitical_risk_score']:>10.2f}")
+        logger.info(f"   {idx:<10} {row['china_share_us']:>10.2f}%    {row['india_share_us']:>10.2f}%    {row['geopolitical_risk_score']:>10.2f}")
     
-    print("\n" + "="*80)
+    logger.info("\n" + "="*80)
 
-def save_results(df, output_path):
-    """Save processed data to CSV"""
-    print(f"\n💾 Saving results to {output_path}...")
-    
-    # Reorder columns for better readability
+def order_columns(df):
+    """Select output columns in logical order"""
     base_cols = ['date', 'quarter_num', 'year', 'hs_code', 'product_name']
     
     trade_cols = ['us_import_china', 'us_import_india', 'us_import_world', 
                   'china_export_world', 'india_export_world']
     
+    partner_cols = [col for p in additional_partners(df) for col in (f'us_import_{p}', f'{p}_export_world')]
+    
     share_cols = ['china_share_us', 'india_share_us', 'other_share_us',
                   'us_share_china_exports', 'us_share_india_exports']
     
@@ -351,64 +568,403 @@ def save_results(df, output_path):
     meta_cols = ['analysis_timestamp']
     
     # Combine in logical order
-    ordered_cols = (base_cols + trade_cols + share_cols + concentration_cols + 
+    ordered_cols = (base_cols + trade_cols + partner_cols + share_cols + concentration_cols + 
                    growth_cols + trend_cols + index_cols + risk_cols + meta_cols)
     
     # Only include columns that exist
     final_cols = [col for col in ordered_cols if col in df.columns]
     
-    df_output = df[final_cols]
-    df_output.to_csv(output_path, index=False)
-    
-    print(f"   ✓ Saved {len(df_output)} rows with {len(df_output.columns)} columns")
-    print(f"   ✓ File size: ~{len(df_output) * len(df_output.columns) * 10 / 1024:.1f} KB")
+    return df[final_cols]
 
-def main():
-    """Main execution function"""
-    print("\n" + "="*80)
-    print("🚀 TRADE DATA ANALYSIS - COMPUTING INDICES & KEY RATIOS")
-    print("="*80)
+def write_output(df_output, output_path, output_format, part=0, merge=False):
+    """Write ordered output as a Parquet dataset and/or CSV, return the output's size on disk
+    
+    part 0 replaces the whole dataset, unless merge=True, which only replaces
+    the year/hs_code partitions present in df_output. part > 0 appends: CSV
+    rows are added without a header and Parquet files get a distinct name
+    (chunks never share an hs_code partition).
+    """
+    size = 0
+    if output_format in ('parquet', 'both'):
+        size += write_partitioned(df_output, dataset_path(output_path),
+                                  basename_template=f'part-{part}-{{i}}.parquet',
+                                  replace=part == 0 and not merge)
+    if output_format in ('csv', 'both'):
+        df_output.to_csv(output_path, mode='a' if part else 'w', header=not part, index=False)
+        size += os.path.getsize(output_path)
+    return size
+
+def target_output_path(output_path, target):
+    """Output path of a --target run (<stem>.<target>.csv next to the full output)"""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}.{target}{ext}"
+
+def save_results(df, output_path, output_format='parquet', merge=False):
+    """Save processed data as a Parquet dataset partitioned by year/hs_code and/or CSV
     
-    # File paths
-    input_file = '/mnt/user-data/uploads/master_data_us_china_india.csv'
-    output_file = '/mnt/user-data/outputs/trade_data_with_indices.csv'
+    The dataset is replaced as a whole; merge=True keeps partitions of the
+    existing dataset that df does not cover (see write_output).
+    """
+    logger.info(f"\n💾 Saving results to {output_path} ({output_format})...")
     
-    # Load data
-    df = load_data(input_file)
+    # Reorder columns for better readability
+    df_output = order_columns(df)
+    size = write_output(df_output, output_path, output_format, merge=merge)
     
-    # Compute all metrics
-    df = compute_market_shares(df)
-    df = compute_concentration_hhi(df)
-    df = compute_trade_intensity(df)
-    df = compute_growth_rates(df)
-    df = compute_diversification_metrics(df)
-    df = compute_revealed_comparative_advantage(df)
-    df = compute_risk_scores(df)
-    df = compute_trend_indicators(df)
-    df = add_metadata(df)
+    logger.info(f"   ✓ Saved {len(df_output)} rows with {len(df_output.columns)} columns")
+    logger.info(f"   ✓ Size on disk: {size / 1024:.1f} KB")
+
+def collect_global_aggregates(filepath, chunksize):
+    """First streaming pass: per-date totals and the world trade proxy
+    
+    Only the date, hs_code and flow-total columns are read. Also checks that
+    every hs_code forms a single contiguous block, which the second pass
+    relies on to keep each product's history inside one chunk.
+    """
+    logger.info("\n🧮 Pass 1: collecting global aggregates...")
+    
+    partial_totals = []
+    seen_codes = set()
+    last_code = None
+    n_rows = 0
+    
+    usecols = ['date', 'hs_code'] + GLOBAL_TOTAL_COLUMNS
+    for chunk in pd.read_csv(filepath, usecols=usecols, chunksize=chunksize):
+        n_rows += len(chunk)
+        partial_totals.append(compute_date_totals(chunk))
+        
+        # hs_code runs in this chunk (a run continuing from the last chunk is not new)
+        codes = chunk['hs_code'].to_numpy()
+        run_starts = np.r_[True, codes[1:] != codes[:-1]]
+        run_codes = list(codes[run_starts])
+        if run_codes[0] == last_code:
+            run_codes = run_codes[1:]
+        
+        repeated = seen_codes.intersection(run_codes)
+        if repeated or len(set(run_codes)) < len(run_codes):
+            raise ValueError(
+                "Streaming mode needs the input grouped by hs_code; "
+                f"hs_code {sorted(repeated)[0] if repeated else run_codes[0]} appears in more than one block"
+            )
+        seen_codes.update(run_codes)
+        last_code = codes[-1]
+    
+    date_totals = pd.concat(partial_totals).groupby(level=0).sum()
+    
+    logger.info(f"   ✓ Scanned {n_rows} rows, {len(seen_codes)} products, {len(date_totals)} periods")
+    return {
+        'world_trade_proxy': date_totals['us_import_world'].sum(),
+        'date_totals': date_totals
+    }
+
+def iter_product_chunks(filepath, chunksize):
+    """Yield chunks of roughly chunksize rows that never split an hs_code
+    
+    The trailing product of each raw chunk is held back and prepended to the
+    next one, so each yielded frame carries complete product histories.
+    """
+    carry = None
+    for chunk in pd.read_csv(filepath, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        
+        is_last_product = (chunk['hs_code'] == chunk['hs_code'].iloc[-1]).to_numpy()
+        carry = chunk[is_last_product]
+        ready = chunk[~is_last_product]
+        
+        if len(ready):
+            yield ready
+    
+    if carry is not None and len(carry):
+        yield carry
+
+def run_streaming(input_file, output_file, chunksize, workers=1, output_format='parquet'):
+    """Two-pass, bounded-memory version of the pipeline
+    
+    Pass 1 collects the global aggregates; pass 2 computes every index on
+    hs_code-aligned chunks and appends them to the output. Peak memory is
+    set by chunksize (plus the largest single product), not the panel.
+    """
+    aggregates = collect_global_aggregates(input_file, chunksize)
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    logger.info(f"\n🔁 Pass 2: computing indices in chunks of ~{chunksize} rows...")
+    n_rows = 0
+    for i, chunk in enumerate(iter_product_chunks(input_file, chunksize)):
+        chunk = compute_all_indices(chunk, aggregates, timestamp, workers)
+        write_output(order_columns(chunk), output_file, output_format, part=i)
+        n_rows += len(chunk)
+        logger.info(f"   ✓ Chunk {i + 1}: {len(chunk)} rows written ({n_rows} total)")
+    
+    # Measured once all chunks are appended
+    size = 0
+    if output_format in ('parquet', 'both'):
+        size += dataset_size(dataset_path(output_file))
+    if output_format in ('csv', 'both'):
+        size += os.path.getsize(output_file)
+    logger.info(f"\n💾 Saved {n_rows} rows to {output_file} ({output_format})")
+    logger.info(f"   ✓ Size on disk: {size / 1024:.1f} KB")
+    return aggregates
+
+def aggregates_path(output_path):
+    """Sidecar file holding the global aggregates of an output file"""
+    return os.path.splitext(output_path)[0] + '.aggregates.json'
+
+def save_aggregates(aggregates, output_path):
+    """Write global aggregates next to the output for later incremental runs"""
+    payload = {
+        'world_trade_proxy': aggregates['world_trade_proxy'].item()
+            if hasattr(aggregates['world_trade_proxy'], 'item') else aggregates['world_trade_proxy'],
+        'date_totals': aggregates['date_totals'].to_dict(orient='index')
+    }
+    with open(aggregates_path(output_path), 'w') as f:
+        json.dump(payload, f, indent=2)
+
+def load_aggregates(output_path):
+    """Read the aggregates sidecar of an output file (None if missing)"""
+    path = aggregates_path(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        payload = json.load(f)
+    date_totals = pd.DataFrame.from_dict(payload['date_totals'], orient='index')
+    date_totals.index.name = 'date'
+    return {
+        'world_trade_proxy': payload['world_trade_proxy'],
+        'date_totals': date_totals[GLOBAL_TOTAL_COLUMNS]
+    }
+
+def append_quarter(history, new_rows, aggregates=None, timestamp=None):
+    """Extend a computed panel with newly arrived periods
+    
+    history: a previous output (sorted by hs_code, date as save_results writes it)
+    new_rows: raw master-schema rows for periods not yet in history
+    aggregates: global aggregates of history (rebuilt from its flow columns if None)
+    
+    New rows get their per-product metrics from the last three stored rows of
+    each product, which covers pct_change, diff and the 4-quarter window.
+    The global aggregates are updated with the new periods only, and the
+    history columns that depend on them (trade intensity, geopolitical risk)
+    are recomputed column-wise. Returns (panel, updated aggregates).
+    """
+    logger.info(f"\n➕ Appending {new_rows['date'].nunique()} period(s), {len(new_rows)} rows...")
+    
+    overlap = set(new_rows['date']).intersection(history['date'].unique())
+    if overlap:
+        raise ValueError(f"Periods already present in history: {sorted(overlap)}")
+    
+    if aggregates is None:
+        aggregates = compute_global_aggregates(history)
+    
+    # Update global aggregates with the new periods only
+    new_totals = compute_date_totals(new_rows)
+    date_totals = pd.concat([aggregates['date_totals'], new_totals])
+    aggregates = {
+        'world_trade_proxy': aggregates['world_trade_proxy'] + new_totals['us_import_world'].sum(),
+        'date_totals': date_totals
+    }
+    
+    # Row-wise and cross-sectional metrics for the new rows
+    new = new_rows.sort_values(['hs_code', 'date']).reset_index(drop=True)
+    new = compute_market_shares(new)
+    new = compute_concentration_hhi(new)
+    new = compute_trade_intensity(new, aggregates['world_trade_proxy'])
+    new = compute_diversification_metrics(new)
+    new = compute_revealed_comparative_advantage(new, new_totals)
+    new = compute_risk_scores(new)
+    
+    # Per-product metrics from the stored tail of each product's history
+    tail = history.groupby('hs_code').tail(3)[PER_PRODUCT_INPUT_COLUMNS]
+    window = pd.concat([tail.assign(is_new=False), new[PER_PRODUCT_INPUT_COLUMNS].assign(is_new=True)],
+                       ignore_index=True)
+    window = run_per_product_stages(window)
+    window = window[window['is_new']].reset_index(drop=True)
+    for col in window.columns.difference(PER_PRODUCT_INPUT_COLUMNS + ['is_new'], sort=False):
+        new[col] = window[col]
+    
+    # Patch history columns that depend on the updated world_trade_proxy
+    history = compute_trade_intensity(history, aggregates['world_trade_proxy'])
+    history = compute_risk_scores(history)
+    
+    if timestamp is None:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    new = add_metadata(new, timestamp)
+    history['analysis_timestamp'] = timestamp
+    
+    panel = pd.concat([history, new], ignore_index=True)
+    panel = panel.sort_values(['hs_code', 'date'], kind='stable').reset_index(drop=True)
+    
+    logger.info(f"   ✓ Panel now has {len(panel)} rows")
+    return panel, aggregates
+
+def load_previous_output(previous_file, hs_code_dtype):
+    """Read a previous output, preferring its Parquet dataset over the CSV"""
+    if os.path.isdir(dataset_path(previous_file)):
+        history = read_partitioned(dataset_path(previous_file))
+        history['hs_code'] = history['hs_code'].astype(hs_code_dtype)
+        return history.sort_values(['hs_code', 'date']).reset_index(drop=True)
+    return pd.read_csv(previous_file)
+
+def run_append_quarter(previous_file, new_rows_file, output_file, output_format='parquet'):
+    """Incremental run: previous output + new period rows -> updated output"""
+    new_rows = load_data(new_rows_file)
+    history = load_previous_output(previous_file, new_rows['hs_code'].dtype)
     
-    # Generate summary
-    generate_summary_stats(df)
+    panel, aggregates = append_quarter(history, new_rows, load_aggregates(previous_file))
     
+    save_results(panel, output_file, output_format, merge=True)
+    save_aggregates(aggregates, output_file)
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def parse_args(argv=None):
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description="Compute trade indices and key ratios")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'data', 'master_data_us_china_india.csv'),
+                        help="Master trade data CSV")
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'outputs', 'trade_data_with_indices.csv'),
+                        help="Output path (CSV name; the Parquet dataset goes next to it)")
+    parser.add_argument('--target', metavar='STAGE',
+                        help="Run only the stages needed for this stage "
+                             f"({', '.join(stage['name'] for stage in build_stages())}) and write "
+                             "them to <output stem>.<STAGE>.csv, leaving the output untouched")
+    parser.add_argument('--cache-dir',
+                        help="Stage checkpoint directory (default: .stage_cache next to the output)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage")
+    parser.add_argument('--risk-weights', type=json.loads, default=None, metavar='JSON',
+                        help="Overrides for RISK_SCORE_WEIGHTS, e.g. '{\"china_share\": 0.6}'")
+    parser.add_argument('--stream', action='store_true',
+                        help="Two-pass chunked mode with memory bounded by --chunksize")
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                        help="Rows per chunk in streaming mode (default: 100000)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes for the per-product stages (default: 1, serial)")
+    parser.add_argument('--append-quarter', metavar='NEW_ROWS_CSV',
+                        help="Incremental mode: add these raw rows to the previous output")
+    parser.add_argument('--previous', metavar='PATH',
+                        help="Previous output for --append-quarter (default: the output file)")
+    parser.add_argument('--format', dest='output_format', choices=['parquet', 'csv', 'both'],
+                        default='parquet',
+                        help="Output format: partitioned Parquet dataset, CSV export, or both")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage wall time, rows/sec and memory to a JSON run report")
+    parser.add_argument('--profile-report', metavar='PATH',
+                        help="Run report path (default: <output without ext>.profile.json)")
+    parser.add_argument('--cprofile-stage', metavar='FUNC',
+                        help="Also run this compute_* function under cProfile "
+                             "(stats in <output without ext>.<FUNC>.pstats; implies --profile)")
+    parser.add_argument('--portfolio', action='store_true',
+                        help="Also run the agents on every product-quarter "
+                             f"(table in {PORTFOLIO_FILENAME} next to the output)")
+    parser.add_argument('--ntm', default=os.path.join(REPO_DIR, 'outputs', 'ntm_quarterly_aggregated.csv'),
+                        help="Quarterly NTM aggregates joined in for --portfolio (see ntm_etl.py)")
+    parser.add_argument('--quiet', action='store_true', help="Only log warnings and errors")
+    return parser.parse_args(argv)
+
+def run_mode(args, input_file, output_file):
+    """Run the pipeline in the mode selected by args, return the mode name"""
+    if args.append_quarter:
+        # Incremental mode: only the new period(s) are computed from scratch
+        run_append_quarter(args.previous or output_file, args.append_quarter, output_file,
+                           args.output_format)
+        return 'append'
+
+    if args.stream:
+        # Streaming mode: summary statistics need the whole panel, so they are skipped
+        aggregates = run_streaming(input_file, output_file, args.chunksize, args.workers,
+                                   args.output_format)
+        save_aggregates(aggregates, output_file)
+        return 'stream'
+
+    if args.workers > 1:
+        # Parallel mode: per-product stages on a process pool, no checkpoints
+        df = load_data(input_file)
+        df = compute_all_indices(df, workers=args.workers)
+        generate_summary_stats(df)
+        save_results(df, output_file, args.output_format)
+        save_aggregates(compute_global_aggregates(df), output_file)
+        return 'parallel'
+
+    # Stage DAG mode: load data
+    df = load_data(input_file)
+    df = df.sort_values(['hs_code', 'date']).reset_index(drop=True)
+
+    # Compute the stages needed for the target, reusing unchanged checkpoints
+    cache_dir = None if args.no_cache else (
+        args.cache_dir or os.path.join(os.path.dirname(os.path.abspath(output_file)), '.stage_cache'))
+    stages = build_stages(args.risk_weights, additional_partners(df))
+    targets = [args.target, 'metadata'] if args.target else None  # metadata holds the partition keys
+    logger.info(f"\n🧩 Running {len(resolve_plan(stages, targets))} stage(s)"
+                f"{' for ' + args.target if args.target else ''}...")
+    df, status = run_stages(df, stages, targets, cache_dir)
+    logger.info(f"   ✓ {list(status.values()).count('cached')} reused, "
+                f"{list(status.values()).count('computed')} computed")
+
+    if args.target:
+        # Partial frame: written beside the output, which keeps every column for its readers
+        save_results(df, target_output_path(output_file, args.target), args.output_format)
+        return 'dag'
+
+    # Generate summary (needs the full set of indices)
+    generate_summary_stats(df)
+
     # Save results
-    save_results(df, output_file)
-    
-    print("\n" + "="*80)
-    print("✅ ANALYSIS COMPLETE!")
-    print("="*80)
-    print(f"\n📂 Output file: {output_file}")
-    print("\n📋 Computed Metrics:")
-    print("   ✓ Market shares (China, India, Others)")
-    print("   ✓ HHI concentration indices")
-    print("   ✓ Trade intensity indices")
-    print("   ✓ Growth rates (quarter-over-quarter)")
-    print("   ✓ Diversification scores")
-    print("   ✓ RCA (Revealed Comparative Advantage)")
-    print("   ✓ Risk scores (Geopolitical, Dependency)")
-    print("   ✓ Trend indicators (Moving averages, Momentum)")
-    print("   ✓ India opportunity scores")
-    print("\n🎯 Ready for Gen AI analysis and visualization!")
-    print("\n")
+    save_results(df, output_file, args.output_format)
+    save_aggregates(compute_global_aggregates(df), output_file)
+    return 'dag'
+
+def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    logging.basicConfig(format='%(message)s', level=logging.WARNING if args.quiet else logging.INFO)
+    
+    logger.info("\n" + "="*80)
+    logger.info("🚀 TRADE DATA ANALYSIS - COMPUTING INDICES & KEY RATIOS")
+    logger.info("="*80)
+    
+    # File paths
+    input_file = args.input
+    output_file = args.output
+    output_stem = os.path.splitext(output_file)[0]
+    
+    profile = args.profile or args.cprofile_stage is not None
+    cprofile_path = f"{output_stem}.{args.cprofile_stage}.pstats" if args.cprofile_stage else None
+    with profiling(profile, cprofile_stage=args.cprofile_stage, cprofile_path=cprofile_path) as profiler:
+        mode = run_mode(args, input_file, output_file)
+        
+        if args.portfolio:
+            # Batch agent analyses over the saved output (every run mode writes one)
+            indices = load_previous_output(output_file, np.int64)
+            run_portfolio(combine_with_ntm(indices, load_ntm_aggregates(args.ntm)),
+                          portfolio_path(output_file), args.workers)
+    
+    if profiler is not None:
+        report_path = args.profile_report or f"{output_stem}.profile.json"
+        profiler.write_report(report_path, mode=mode, input=input_file, output=output_file,
+                              workers=args.workers)
+        logger.info(f"\n⏱️  Stage profile: {report_path}")
+        for record in profiler.records:
+            logger.info(f"   {record['stage']:<40} {record['wall_time_s']:>9.3f}s "
+                        f"{record['rows']:>10} rows")
+    
+    logger.info("\n" + "="*80)
+    logger.info("✅ ANALYSIS COMPLETE!")
+    logger.info("="*80)
+    if args.target:
+        output_file = target_output_path(output_file, args.target)
+    logger.info(f"\n📂 Output file: {output_file}")
+    logger.info("\n📋 Computed Metrics:")
+    logger.info("   ✓ Market shares (China, India, Others)")
+    logger.info("   ✓ HHI concentration indices")
+    logger.info("   ✓ Trade intensity indices")
+    logger.info("   ✓ Growth rates (quarter-over-quarter)")
+    logger.info("   ✓ Diversification scores")
+    logger.info("   ✓ RCA (Revealed Comparative Advantage)")
+    logger.info("   ✓ Risk scores (Geopolitical, Dependency)")
+    logger.info("   ✓ Trend indicators (Moving averages, Momentum)")
+    logger.info("   ✓ India opportunity scores")
+    logger.info("\n🎯 Ready for Gen AI analysis and visualization!")
+    logger.info("\n")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Fake Model Server - Local Stand-in for a Text-Generation API
+============================================================
+Speaks the protocol ModelNarrativeProvider expects, offline:
+
+    POST /v1/generate   {"model": ..., "prompts": [...]} -> {"completions": [...]}
+    GET  /stats         calls and prompts served so far
+
+Each call sleeps --latency-ms plus --per-prompt-ms per prompt, then answers
+every prompt with a deterministic Markdown text built from its FACTS block,
+so repeated prompts get identical completions.
+
+Usage:
+    python fake_model_server.py --port 8070 --latency-ms 200
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8070
+
+def complete(model, prompt):
+    """Deterministic completion of one prompt"""
+    facts = json.loads(prompt.split("FACTS:\n", 1)[1].split("\n\nDATA:", 1)[0])
+    lines = [f"**Generated narrative** ({model})", ""]
+    for key, value in sorted(facts.items()):
+        if isinstance(value, list):
+            lines += [f"**{key.replace('_', ' ').title()}:**"] + [f"- {item}" for item in value]
+        elif not isinstance(value, dict):
+            lines.append(f"- {key.replace('_', ' ').title()}: {value}")
+    return "\n".join(lines)
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, dict(self.server.stats))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/v1/generate":
+            self._send(404, {"error": "not found"})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompts = request["prompts"]
+        time.sleep(self.server.latency + self.server.per_prompt * len(prompts))
+        with self.server.lock:
+            self.server.stats["calls"] += 1
+            self.server.stats["prompts"] += len(prompts)
+            self.server.stats["largest_batch"] = max(self.server.stats["largest_batch"], len(prompts))
+        self._send(200, {"completions": [complete(request.get("model", "fake"), prompt) for prompt in prompts]})
+
+def make_server(port=0, latency_ms=100.0, per_prompt_ms=10.0):
+    """Fake model server on localhost (port 0 picks a free one)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeModelHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.per_prompt = per_prompt_ms / 1000
+    server.lock = threading.Lock()
+    server.stats = {"calls": 0, "prompts": 0, "largest_batch": 0}
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake completions for ModelNarrativeProvider")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=100.0, help="Per call (default: 100)")
+    parser.add_argument('--per-prompt-ms', type=float, default=10.0, help="Per prompt (default: 10)")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency_ms, args.per_prompt_ms)
+    print(f"🤖 Fake model server on http://127.0.0.1:{server.server_port}/v1/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
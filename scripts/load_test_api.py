@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+API Load Test - Latency and Throughput of trade_api.py
+======================================================
+Starts trade_api.py on a free local port (or targets --url), then drives
+it from client threads at increasing concurrency. Each thread keeps one
+keep-alive connection and sends:
+
+    /analyze      for a hot set of product-quarters (the same few keys an
+                  analyst deployment sees all day), most requests
+    /portfolio    the summary, the rest (--portfolio-share)
+
+Per concurrency level it reports throughput, p50 / p99 latency and errors.
+Everything runs offline against the files in outputs/. The client threads
+share one interpreter, so at high concurrency the client can become the
+bottleneck; compare levels run on the same machine.
+
+Usage:
+    python load_test_api.py
+    python load_test_api.py --concurrency 1,8,32 --requests 4000 --workers 4
+    python load_test_api.py --url http://127.0.0.1:8050
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds to wait for a started server to answer /health
+STARTUP_TIMEOUT = 60
+
+def free_port():
+    """A TCP port that is free on localhost right now"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def get_json(host, port, path):
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+def wait_for_server(host, port, process=None):
+    """Poll /health until the server answers (raises if it exits or times out)"""
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"trade_api.py exited with code {process.returncode}")
+        try:
+            return get_json(host, port, "/health")
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"No answer from http://{host}:{port}/health after {STARTUP_TIMEOUT}s")
+
+def hot_paths(input_file, n_keys, seed=0):
+    """/analyze paths of n_keys random product-quarters of the combined table"""
+    df = pd.read_csv(input_file, usecols=['hs_code', 'date'])
+    rows = df.sample(n=min(n_keys, len(df)), random_state=seed)
+    return [f"/analyze?hs_code={str(hs).strip()}&quarter={quarter}"
+            for hs, quarter in zip(rows['hs_code'], rows['date'])]
+
+def run_level(host, port, paths, concurrency, n_requests):
+    """(latencies in seconds, errors, wall seconds) of n_requests over `concurrency` threads"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = -(-n_requests // concurrency)
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(offset):
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        own, failed = [], 0
+        barrier.wait()
+        for i in range(per_thread):
+            path = paths[(offset + i) % len(paths)]
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                failed += response.status != 200
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+            own.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i * 7,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors[0], time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the trade risk JSON API")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    parser.add_argument('--url', help="Running server to test (default: start trade_api.py)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes of the started server")
+    parser.add_argument('--concurrency', default="1,2,4,8,16,32",
+                        help="Comma-separated client thread counts (default: 1,2,4,8,16,32)")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per level (default: 2000)")
+    parser.add_argument('--hot-keys', type=int, default=20, help="Product-quarters in the hot set")
+    parser.add_argument('--portfolio-share', type=float, default=0.1,
+                        help="Share of /portfolio requests (default: 0.1)")
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPT_DIR, 'trade_api.py'), '--input', args.input,
+             '--port', str(port), '--workers', str(args.workers)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        health = wait_for_server(host, port, process)
+        paths = hot_paths(args.input, args.hot_keys)
+        n_portfolio = round(len(paths) * args.portfolio_share / (1 - args.portfolio_share))
+        paths += ["/portfolio"] * n_portfolio
+        np.random.default_rng(0).shuffle(paths)
+
+        print("\n🚦 API LOAD TEST")
+        print("=" * 60)
+        print(f"   Server: http://{host}:{port} ({health['products']} products, "
+              f"{health['workers']} worker(s))")
+        print(f"   Mix: {args.hot_keys} hot /analyze keys, {args.portfolio_share:.0%} /portfolio, "
+              f"{args.requests:,} requests per level")
+
+        # Warm-up: fill the workers' result caches
+        run_level(host, port, paths, 1, len(paths) * 2)
+
+        print(f"\n   {'Clients':>7} {'Req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'Errors':>7}")
+        for concurrency in [int(level) for level in args.concurrency.split(',')]:
+            latencies, errors, elapsed = run_level(host, port, paths, concurrency, args.requests)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(f"   {concurrency:>7} {len(latencies) / elapsed:>9,.0f} {p50:>8.2f} {p99:>8.2f} {errors:>7}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
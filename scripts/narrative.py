@@ -0,0 +1,274 @@
+"""
+Narrative - Pluggable Prose for Agent Findings
+==============================================
+The agents' narratives (RiskAssessmentAgent's risk narrative and
+StrategicDiversificationAgent's executive summary) come from a
+NarrativeProvider. A request is a dict:
+
+    kind           'risk' or 'summary'
+    data_context   DataRetrievalAgent context of the product-quarter
+    facts          what the text must state (level, score, vulnerabilities,
+                   drivers / primary strategy, expected outcomes)
+
+Backends:
+
+    TemplateNarrativeProvider  the fixed Markdown templates (default)
+    ModelNarrativeProvider     a text-generation server over HTTP/JSON
+
+The model provider never generates the same text twice. Each request is
+content-addressed (SHA-256 of the normalized request, model and prompt
+version) and its text persisted under cache_dir. Identical requests in
+flight share one generation. Concurrent misses are sent in batches of up
+to batch_size prompts, collected for at most batch_window seconds. If the
+server fails, the template text is returned, marked degraded, and
+nothing is cached; callers should not cache results built from it either.
+
+Model server protocol: POST {"model": ..., "prompts": [...]} to the
+endpoint, answer {"completions": [...]} (see fake_model_server.py).
+"""
+
+import hashlib
+from abc import ABC, abstractmethod
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompts change, so cached texts of old prompts stop matching
+PROMPT_VERSION = 1
+
+PROMPT_INSTRUCTIONS = {
+    'risk': ("Write a short risk assessment summary in Markdown for a trade analyst. "
+             "State the overall risk level and score, the primary vulnerabilities and the key "
+             "risk drivers given in FACTS; use DATA only for context. Do not invent numbers."),
+    'summary': ("Write a short executive summary in Markdown recommending a sourcing "
+                "diversification action. State the priority action, target, timeline, feasibility "
+                "and expected impact given in FACTS; use DATA only for context. Do not invent numbers.")
+}
+
+def render_template(kind: str, facts: Dict) -> str:
+    """Template text of a request's facts"""
+    if kind == 'risk':
+        narrative = f"""
+**Risk Assessment Summary**
+
+Overall Risk: **{facts['level']}** (Score: {facts['score']}/100)
+
+**Primary Vulnerabilities:**
+{chr(10).join(f"- {v}" for v in facts['vulnerabilities'])}
+
+**Key Risk Drivers:**
+{chr(10).join(f"- {d}" for d in facts['key_drivers'])}
+        """
+        return narrative.strip()
+
+    primary = facts['primary']
+    if not primary:
+        return "Current sourcing strategy is adequately diversified. Continue monitoring."
+    outcomes = facts['outcomes']
+    summary = f"""
+**Strategic Diversification Recommendation**
+
+**Priority Action:** {primary['name']}
+- **Target:** {primary['target']}
+- **Timeline:** {primary['timeline']}
+- **Feasibility:** {primary['feasibility']}
+
+**Expected Impact:**
+- Reduce China dependency by {outcomes['china_dependency']['reduction']}%
+- Improve market concentration (HHI) by {outcomes['market_concentration']['improvement']}%
+- Risk level: {outcomes['risk_reduction']['from']} → {outcomes['risk_reduction']['to']}
+
+**Implementation:** Start with pilot phase, scale gradually based on validation results.
+        """
+    return summary.strip()
+
+def normalize(value):
+    """JSON-ready copy: numpy values as Python ones, NaN as None"""
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [normalize(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def canonical_json(value) -> str:
+    """Stable JSON of a normalized value (sorted keys, no whitespace)"""
+    return json.dumps(normalize(value), sort_keys=True, separators=(',', ':'), default=str)
+
+class NarrativeProvider(ABC):
+    """Turns agent findings into prose; subclasses implement version and generate"""
+
+    @abstractmethod
+    def version(self) -> str:
+        """Identifies the provider's output (part of the agents' config version)"""
+
+    @abstractmethod
+    def generate(self, requests: List[Dict]) -> List[str]:
+        """Texts of narrative requests, in order"""
+
+    def generate_marked(self, requests: List[Dict]) -> List[Tuple[str, bool]]:
+        """(text, degraded) of narrative requests; degraded texts are fallbacks not to be cached"""
+        return [(text, False) for text in self.generate(requests)]
+
+    def narrate(self, kind: str, data_context: Dict, facts: Dict) -> str:
+        """Text of one request"""
+        return self.narrate_marked(kind, data_context, facts)[0]
+
+    def narrate_marked(self, kind: str, data_context: Dict, facts: Dict) -> Tuple[str, bool]:
+        """(text, degraded) of one request"""
+        return self.generate_marked([{"kind": kind, "data_context": data_context, "facts": facts}])[0]
+
+class TemplateNarrativeProvider(NarrativeProvider):
+    """The fixed Markdown templates"""
+
+    def version(self) -> str:
+        return "template"
+
+    def generate(self, requests: List[Dict]) -> List[str]:
+        return [render_template(request['kind'], request['facts']) for request in requests]
+
+class ModelNarrativeProvider(NarrativeProvider):
+    """Model-generated narratives with a persistent cache, coalescing and batching"""
+
+    def __init__(self, endpoint: str, cache_dir: str, model: str = "default",
+                 batch_size: int = 8, batch_window: float = 0.01, timeout: float = 60.0,
+                 fallback: Optional[NarrativeProvider] = None):
+        self.endpoint = endpoint
+        self.cache_dir = cache_dir
+        self.model = model
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.fallback = fallback or TemplateNarrativeProvider()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._queue = queue.Queue()
+        self._batcher = None
+        self.stats = {"cache_hits": 0, "coalesced": 0, "generated": 0, "model_calls": 0, "failures": 0}
+
+    def version(self) -> str:
+        return f"model:{self.model}:prompt-v{PROMPT_VERSION}"
+
+    def cache_key(self, request: Dict) -> str:
+        """Content address of a request for this model and prompt version"""
+        return hashlib.sha256(canonical_json({
+            "kind": request['kind'], "data_context": request['data_context'],
+            "facts": request['facts'], "provider": self.version()
+        }).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_cache(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)['text']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_cache(self, key: str, text: str):
+        """Write atomically, so concurrent readers never see a partial file"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"text": text, "model": self.model, "created": time.time()}, f)
+        os.replace(tmp, path)
+
+    def prompt(self, request: Dict) -> str:
+        """Prompt text of a request"""
+        return (f"{PROMPT_INSTRUCTIONS[request['kind']]}\n\n"
+                f"FACTS:\n{canonical_json(request['facts'])}\n\n"
+                f"DATA:\n{canonical_json(request['data_context'])}")
+
+    def generate(self, requests: List[Dict]) -> List[str]:
+        return [text for text, _ in self.generate_marked(requests)]
+
+    def generate_marked(self, requests: List[Dict]) -> List[Tuple[str, bool]]:
+        futures = [self._submit(request) for request in requests]
+        texts = []
+        for request, future in zip(requests, futures):
+            try:
+                texts.append((future.result(self.timeout), False))
+            except Exception as e:
+                logger.warning(f"   ⚠️  Narrative generation failed ({e}); using the template")
+                texts.append((self.fallback.generate([request])[0], True))
+        return texts
+
+    def _submit(self, request: Dict) -> Future:
+        """Future of a request's text: cached, already in flight, or queued"""
+        key = self.cache_key(request)
+        with self._lock:
+            if key in self._in_flight:
+                self.stats["coalesced"] += 1
+                return self._in_flight[key]
+            text = self._read_cache(key)
+            future = Future()
+            if text is not None:
+                self.stats["cache_hits"] += 1
+                future.set_result(text)
+                return future
+            self._in_flight[key] = future
+            if self._batcher is None or not self._batcher.is_alive():
+                self._batcher = threading.Thread(target=self._run_batches, daemon=True)
+                self._batcher.start()
+        self._queue.put((key, request, future))
+        return future
+
+    def _run_batches(self):
+        """Batcher thread: collect queued requests, one model call per batch"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._generate_batch(batch)
+
+    def _generate_batch(self, batch: List[tuple]):
+        try:
+            texts = self._call_model([self.prompt(request) for _, request, _ in batch])
+            if len(texts) != len(batch):
+                raise ValueError(f"{len(texts)} completions for {len(batch)} prompts")
+        except Exception as e:
+            with self._lock:
+                self.stats["failures"] += len(batch)
+                for key, _, future in batch:
+                    self._in_flight.pop(key, None)
+                    future.set_exception(e)
+            return
+
+        for (key, _, future), text in zip(batch, texts):
+            self._write_cache(key, text)
+        with self._lock:
+            self.stats["generated"] += len(batch)
+            for (key, _, future), text in zip(batch, texts):
+                self._in_flight.pop(key, None)
+                future.set_result(text)
+
+    def _call_model(self, prompts: List[str]) -> List[str]:
+        """One request to the model server for a batch of prompts"""
+        self.stats["model_calls"] += 1
+        body = json.dumps({"model": self.model, "prompts": prompts}).encode()
+        request = urllib.request.Request(self.endpoint, data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())['completions']
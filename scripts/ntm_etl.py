@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+NTM ETL - Quarterly NTM Aggregates from a Raw TRAINS Export
+===========================================================
+Builds ntm_quarterly_aggregated.csv (one row per product-quarter of the
+trade panel) from a UNCTAD TRAINS "NTM details" CSV export.
+
+The export holds one row per measure with long, multi-line quoted
+regulation texts. It is read in chunks and only four columns are kept:
+    NTM code, Hs code(s), Implementation date, Markets affected by NTM(s)
+Each chunk is reduced right away to (measure, HS4, NTM code, date) pairs
+for the products of the panel, so memory depends on the number of
+matching pairs, not on the size of the dump.
+
+Each measure gets a validity interval for the partners: it starts at the
+later of its implementation date and the market's "[Valid From: ...]"
+date, and ends at "[Excluded From: ...]" when every partner is excepted
+(open otherwise). Per product-quarter, the measures in force at the end of
+the quarter give:
+    ntm_count                  distinct measures
+    ntm_codes                  first 10 distinct NTM codes, in file order
+    has_sps / has_tbt          any chapter A (SPS) / B (TBT) measure
+    has_export_restriction     any chapter P measure
+    technical_measure_count    measures in chapters A-C (UNCTAD technical)
+    non_technical_count        all other measures
+    ntm_severity               NTM_SEVERITY_BINS on ntm_count
+The counts are computed for all quarters at once with bincounts over
+(product, first quarter in force) and (product, first quarter out of force)
+followed by cumulative sums. ntm_index.py answers the same question for a
+single product and date.
+
+HS lists such as "010129(Only wildlife), 0306, 2710..." are split, the
+qualifiers dropped and codes of 4+ digits mapped to HS4. Chapter-level
+(2-digit) entries are not expanded to their headings.
+
+Usage:
+    python ntm_etl.py
+    python ntm_etl.py --input trains_dump.csv --chunksize 20000 --partners China,India
+"""
+
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from classification import NTM_SEVERITY_BINS, classify
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# TRAINS export columns that are read, and their short names
+RAW_COLUMNS = {
+    'NTM code': 'ntm_code',
+    'Hs code(s)': 'hs_codes',
+    'Implementation date': 'implementation_date',
+    'Markets affected by NTM(s)': 'markets'
+}
+
+# Partners of the trade panel; a measure counts when it affects any of them
+DEFAULT_PARTNERS = ['China', 'India']
+
+# UNCTAD MAST chapters: A SPS, B TBT, C pre-shipment (technical); P export measures
+TECHNICAL_CHAPTERS = ['A', 'B', 'C']
+MAX_LISTED_CODES = 10
+
+AGGREGATE_COLUMNS = ['hs_code', 'date', 'ntm_count', 'ntm_codes', 'has_sps', 'has_tbt',
+                     'has_export_restriction', 'technical_measure_count', 'non_technical_count',
+                     'ntm_severity']
+
+_ANNOTATION = re.compile(r'\[[^\]]*\]')
+_VALID_FROM = re.compile(r'Valid From:\s*([^\]]+)\]')
+_EXCLUDED_FROM = re.compile(r'Excluded From:\s*([^\]]+)\]')
+_HS_CODE = re.compile(r'(?:^|,)\s*(\d{4,})')
+
+def parse_markets(text):
+    """(applies to the world, listed countries, excepted countries) of a markets field
+
+    'World [Valid From: ...] (except Canada [Excluded From: ...])' or
+    'Senegal, Pakistan, India [Valid From: ...]'; validity annotations are dropped.
+    """
+    text = _ANNOTATION.sub('', str(text))
+    excepted = set()
+    if '(except' in text:
+        text, _, rest = text.partition('(except')
+        excepted = {name.strip() for name in rest.rstrip(' )').split(',') if name.strip()}
+    countries = {name.strip() for name in text.split(',') if name.strip()}
+    return 'World' in countries, countries - {'World'}, excepted
+
+def _annotation_date(pattern, text):
+    """First date of an annotation such as '[Valid From: 23 Aug 2007]' (NaT if none)"""
+    match = pattern.search(text)
+    return pd.to_datetime(match.group(1).strip(), format='%d %b %Y', errors='coerce') if match else pd.NaT
+
+def market_interval(markets, partners):
+    """(valid from, valid until) of a markets field for the partners, None if never affected
+
+    partners=None takes every market. The end is NaT (open) unless all
+    partners are excepted from a 'World' measure, which then ends at their
+    '[Excluded From: ...]' date.
+    """
+    text = str(markets)
+    listed, _, excepted_text = text.partition('(except')
+    valid_from = _annotation_date(_VALID_FROM, listed)
+    if partners is None:
+        return valid_from, pd.NaT
+
+    world, countries, excepted = parse_markets(text)
+    if world:
+        if any(partner not in excepted for partner in partners):
+            return valid_from, pd.NaT
+        excluded_from = _annotation_date(_EXCLUDED_FROM, excepted_text)
+        return (valid_from, excluded_from) if pd.notna(excluded_from) else None
+    return (valid_from, pd.NaT) if any(partner in countries for partner in partners) else None
+
+def explode_hs4(hs_codes):
+    """(row label, HS4 string) pairs from a Series of HS code lists, deduplicated"""
+    codes = hs_codes.fillna('').str.extractall(_HS_CODE)[0]
+    pairs = pd.DataFrame({'row': codes.index.get_level_values(0), 'hs4': codes.str[:4].to_numpy()})
+    return pairs.drop_duplicates()
+
+def read_measure_pairs(filepath, hs4_codes, chunksize=5000, partners=DEFAULT_PARTNERS):
+    """(measure, hs4, ntm_code, start, end) pairs for the given HS4 codes
+
+    measure is the row number in the export; start/end is the validity
+    interval for the partners (see market_interval; NaT start = always, NaT
+    end = open). partners=None keeps every market, hs4_codes=None every product.
+    """
+    hs4_codes = None if hs4_codes is None else set(hs4_codes)
+    parts = []
+    reader = pd.read_csv(filepath, usecols=list(RAW_COLUMNS), dtype=str, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.rename(columns=RAW_COLUMNS)
+
+        # Few distinct market strings: parse each once
+        markets = chunk['markets'].fillna('World')
+        intervals = {text: market_interval(text, partners) for text in markets.unique()}
+        affected = markets.map(lambda text: intervals[text] is not None).to_numpy(dtype=bool)
+        chunk, markets = chunk[affected], markets[affected]
+        valid_from = pd.to_datetime(markets.map(lambda text: intervals[text][0]))
+        valid_until = pd.to_datetime(markets.map(lambda text: intervals[text][1]))
+        implemented = pd.to_datetime(chunk['implementation_date'], format='%d-%m-%Y', errors='coerce')
+        chunk = chunk.assign(start=implemented.where(implemented >= valid_from, valid_from)
+                                   .fillna(implemented),
+                             end=valid_until)
+
+        pairs = explode_hs4(chunk['hs_codes'])
+        if hs4_codes is not None:
+            pairs = pairs[pairs['hs4'].isin(hs4_codes)]
+        measures = chunk.loc[pairs['row']]
+        parts.append(pd.DataFrame({
+            'measure': pairs['row'].to_numpy(),
+            'hs4': pairs['hs4'].to_numpy(),
+            'ntm_code': measures['ntm_code'].str.strip().to_numpy(),
+            'start': measures['start'].to_numpy(),
+            'end': measures['end'].to_numpy()
+        }))
+
+    columns = ['measure', 'hs4', 'ntm_code', 'start', 'end']
+    parts = [part for part in parts if len(part)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+def quarter_ends(quarters):
+    """Last day of each 'YYYY-Qn' label"""
+    return pd.PeriodIndex([q.replace('-', '') for q in quarters], freq='Q').end_time.normalize()
+
+def aggregate_quarterly(pairs, grid):
+    """NTM aggregates for every (hs_code, date) row of grid
+
+    A measure is in force in the quarters whose last day falls in
+    [start, end); a missing start counts as always, a missing end as open.
+    """
+    grid = grid[['hs_code', 'date']].drop_duplicates().sort_values(['hs_code', 'date'])
+    products = np.sort(grid['hs_code'].unique())
+    quarters = np.sort(grid['date'].unique())
+    n_products, n_quarters = len(products), len(quarters)
+
+    hs4 = pd.Index([f"{int(code):04d}" for code in products])
+    pairs = pairs.sort_values('measure', kind='stable')
+    product = hs4.get_indexer(pairs['hs4'])
+    ends = quarter_ends(quarters).to_numpy()
+    first_quarter = np.searchsorted(ends, pairs['start'].to_numpy(dtype='datetime64[ns]'))
+    first_quarter[pairs['start'].isna().to_numpy()] = 0
+    last_quarter = np.searchsorted(ends, pairs['end'].to_numpy(dtype='datetime64[ns]'))
+    last_quarter[pairs['end'].isna().to_numpy()] = n_quarters
+    in_window = (product >= 0) & (first_quarter < last_quarter)
+    pairs = pairs[in_window]
+    product = product[in_window]
+    first_quarter, last_quarter = first_quarter[in_window], last_quarter[in_window]
+
+    chapter = pairs['ntm_code'].str[0].to_numpy()
+    size = n_products * (n_quarters + 1)
+    start_cell = product * (n_quarters + 1) + first_quarter
+    end_cell = product * (n_quarters + 1) + last_quarter
+
+    def in_force(weights=None):
+        """(products × quarters) count of measures in force, optionally weighted"""
+        change = (np.bincount(start_cell, weights=weights, minlength=size)
+                  - np.bincount(end_cell, weights=weights, minlength=size))
+        return change.reshape(n_products, n_quarters + 1)[:, :n_quarters].cumsum(axis=1).astype(np.int64)
+
+    counts = in_force()
+    technical = in_force(np.isin(chapter, TECHNICAL_CHAPTERS))
+    sps = in_force(chapter == 'A')
+    tbt = in_force(chapter == 'B')
+    export = in_force(chapter == 'P')
+
+    # Code lists only change in quarters where measures come into or go out of
+    # force: list the codes in force at those change points (in file order,
+    # merge keeps the left order) and carry each list forward to the next one
+    spans = pd.DataFrame({'product': product, 'first': first_quarter, 'last': last_quarter,
+                          'ntm_code': pairs['ntm_code'].to_numpy()})
+    change_points = pd.concat([
+        spans[['product', 'first']].set_axis(['product', 'quarter'], axis=1),
+        spans.loc[spans['last'] < n_quarters, ['product', 'last']].set_axis(['product', 'quarter'], axis=1)
+    ]).drop_duplicates().sort_values(['product', 'quarter'])
+    active = spans.merge(change_points, on='product')
+    active = active[(active['first'] <= active['quarter']) & (active['quarter'] < active['last'])]
+    active = active.drop_duplicates(['product', 'quarter', 'ntm_code'])
+    active = active.groupby(['product', 'quarter']).head(MAX_LISTED_CODES)
+    listed = (active.groupby(['product', 'quarter'])['ntm_code'].agg(';'.join)
+              .reindex(pd.MultiIndex.from_frame(change_points), fill_value=''))
+    source = np.full((n_products, n_quarters), -1)
+    source[change_points['product'].to_numpy(), change_points['quarter'].to_numpy()] = np.arange(len(listed))
+    code_lists = np.append(listed.to_numpy(dtype=object), '')[np.maximum.accumulate(source, axis=1)]
+
+    full = pd.DataFrame({
+        'hs_code': np.repeat(products, n_quarters),
+        'date': np.tile(quarters, n_products),
+        'ntm_count': counts.ravel(),
+        'ntm_codes': code_lists.ravel(),
+        'has_sps': (sps.ravel() > 0).astype(np.int64),
+        'has_tbt': (tbt.ravel() > 0).astype(np.int64),
+        'has_export_restriction': (export.ravel() > 0).astype(np.int64),
+        'technical_measure_count': technical.ravel(),
+        'non_technical_count': (counts - technical).ravel(),
+    })
+    full['ntm_severity'] = classify(full['ntm_count'], NTM_SEVERITY_BINS)
+    return grid.merge(full, on=['hs_code', 'date'], how='left')[AGGREGATE_COLUMNS]
+
+def run_etl(input_file, master_file, output_file, chunksize=5000, partners=DEFAULT_PARTNERS):
+    """Aggregate a TRAINS export onto the product-quarters of the master data"""
+    print(f"\n🛃 Aggregating NTMs from {input_file}...")
+    grid = pd.read_csv(master_file, usecols=['hs_code', 'date'])
+    hs4_codes = {f"{int(code):04d}" for code in grid['hs_code'].unique()}
+
+    pairs = read_measure_pairs(input_file, hs4_codes, chunksize, partners)
+    print(f"   ✓ {pairs['measure'].nunique()} measures on {pairs['hs4'].nunique()} of "
+          f"{len(hs4_codes)} products ({len(pairs)} measure-product pairs)")
+
+    result = aggregate_quarterly(pairs, grid)
+    result.to_csv(output_file, index=False)
+    print(f"   ✓ Saved {len(result)} product-quarters to {output_file}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate a raw TRAINS NTM export by product and quarter")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'data', 'NTM_details_-_data.csv'),
+                        help="TRAINS 'NTM details' CSV export")
+    parser.add_argument('--master', default=os.path.join(REPO_DIR, 'data', 'master_data_us_china_india.csv'),
+                        help="Trade panel whose hs_code / date rows are aggregated")
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'outputs', 'ntm_quarterly_aggregated.csv'))
+    parser.add_argument('--chunksize', type=int, default=5000, help="Export rows per chunk (default: 5000)")
+    parser.add_argument('--partners', default='all',
+                        help="Comma-separated affected markets to keep, or 'all' (default: all, "
+                             "as in outputs/ntm_quarterly_aggregated.csv)")
+    args = parser.parse_args()
+
+    partners = None if args.partners == 'all' else [p.strip() for p in args.partners.split(',')]
+    run_etl(args.input, args.master, args.output, args.chunksize, partners)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+NTM Interval Index - Point-in-Time Measure Lookups
+==================================================
+Validity intervals [start, end) of NTM measures per HS4 product, as built
+by ntm_etl.read_measure_pairs, stored as flat NumPy arrays:
+
+    start_keys   (product, start day) sorted; measures in this order
+    end_keys     (product, end day) sorted, with positions into the above
+
+A key packs the product index and the day number into one int64, so every
+product's intervals form a contiguous, sorted run and a lookup is a
+binary search:
+    count_active(hs, date)     O(log n)      started minus ended
+    changes(hs, d1, d2)        O(log n + k)  contiguous runs of starts / ends
+    active(hs, date)           O(log n + m)  m = measures started by date
+(active lists the measures started by the date and drops the ones that
+have ended; TRAINS measures rarely end, so m is close to k.) The bulk
+forms take arrays of products and dates and run the same searches
+vectorized over the whole panel.
+
+Dates are 'YYYY-Qn' quarter labels (meaning the last day of the quarter)
+or anything pandas.Timestamp accepts.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from ntm_etl import DEFAULT_PARTNERS, quarter_ends, read_measure_pairs
+
+# Day numbers are offset into [0, 2**DAY_BITS); start/end sentinels cover
+# "always" (no start date) and "open" (no end date)
+DAY_BITS = 20
+DAY_OFFSET = 2 ** (DAY_BITS - 1)
+ALWAYS = 0
+OPEN = 2 ** DAY_BITS - 1
+
+_QUARTER = re.compile(r'\d{4}-Q[1-4]')
+
+def hs4_label(hs_code):
+    """Zero-padded HS4 string ('306' / 306 -> '0306')"""
+    return f"{int(hs_code):04d}"
+
+def to_day(dates, missing):
+    """Offset day numbers of dates (quarter labels or datetimes); missing for NaT"""
+    dates = np.atleast_1d(np.asarray(dates, dtype=object))
+    if all(isinstance(date, str) and _QUARTER.fullmatch(date) for date in dates):
+        # Quarter labels: the day before the first day of the next quarter
+        next_month = np.array([int(date[:4]) * 12 + int(date[-1]) * 3 for date in dates]) - 1970 * 12
+        days = next_month.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) - 1
+        return np.clip(days + DAY_OFFSET, 1, OPEN - 1)
+
+    values = pd.Series(dates)
+    is_quarter = values.map(lambda date: isinstance(date, str) and bool(_QUARTER.fullmatch(date)))
+    timestamps = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    if is_quarter.any():
+        timestamps[is_quarter] = quarter_ends(values[is_quarter].tolist())
+    if (~is_quarter).any():
+        timestamps[~is_quarter] = pd.to_datetime(values[~is_quarter])
+    days = timestamps.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return np.where(timestamps.isna().to_numpy(), missing, np.clip(days + DAY_OFFSET, 1, OPEN - 1))
+
+def from_day(days):
+    """Dates of offset day numbers (NaT for the sentinels)"""
+    days = np.asarray(days, dtype=np.int64)
+    dates = (days - DAY_OFFSET).astype('datetime64[D]').astype('datetime64[ns]')
+    return pd.to_datetime(np.where((days == ALWAYS) | (days == OPEN), np.datetime64('NaT'), dates))
+
+class NTMIntervalIndex:
+    """Measures in force per HS4 product at any date"""
+
+    def __init__(self, pairs):
+        """Build from (measure, hs4, ntm_code, start, end) pairs"""
+        start = to_day(pairs['start'].to_numpy(), ALWAYS)
+        end = to_day(pairs['end'].to_numpy(), OPEN)
+        valid = start < end
+
+        self.products = pd.Index(np.sort(pairs['hs4'][valid].unique()))
+        product = self.products.get_indexer(pairs['hs4'][valid])
+        keys = (product.astype(np.int64) << DAY_BITS) | start[valid]
+        order = np.argsort(keys, kind='stable')
+
+        self.start_keys = keys[order]
+        self.start_days = start[valid][order]
+        self.end_days = end[valid][order]
+        self.measures = pairs['measure'].to_numpy()[valid][order]
+        self.codes = pairs['ntm_code'].to_numpy()[valid][order]
+
+        end_keys = (product[order].astype(np.int64) << DAY_BITS) | self.end_days
+        self.end_order = np.argsort(end_keys, kind='stable')
+        self.end_keys = end_keys[self.end_order]
+
+    @classmethod
+    def from_export(cls, filepath, hs4_codes=None, chunksize=5000, partners=DEFAULT_PARTNERS):
+        """Index a raw TRAINS export (see ntm_etl.read_measure_pairs)"""
+        return cls(read_measure_pairs(filepath, hs4_codes, chunksize, partners))
+
+    def __len__(self):
+        return len(self.start_keys)
+
+    def _keys(self, hs_codes, dates):
+        """(product index, key at date) arrays; product index -1 when unknown"""
+        labels = [hs4_label(code) for code in np.atleast_1d(hs_codes)]
+        product = self.products.get_indexer(labels).astype(np.int64)
+        day = to_day(dates, ALWAYS)
+        return product, (np.maximum(product, 0) << DAY_BITS) | day
+
+    def _frame(self, positions):
+        """Measures at positions of the start-ordered arrays"""
+        return pd.DataFrame({
+            'measure': self.measures[positions],
+            'ntm_code': self.codes[positions],
+            'start': from_day(self.start_days[positions]),
+            'end': from_day(self.end_days[positions])
+        })
+
+    def count_active(self, hs_codes, dates):
+        """Number of measures in force for each (hs_code, date) pair (broadcast)"""
+        hs_codes, dates = np.broadcast_arrays(np.atleast_1d(hs_codes), np.atleast_1d(dates))
+        product, key = self._keys(hs_codes.ravel(), dates.ravel())
+        base = np.maximum(product, 0) << DAY_BITS
+        started = (np.searchsorted(self.start_keys, key, side='right')
+                   - np.searchsorted(self.start_keys, base))
+        ended = (np.searchsorted(self.end_keys, key, side='right')
+                 - np.searchsorted(self.end_keys, base))
+        return np.where(product >= 0, started - ended, 0).reshape(hs_codes.shape)
+
+    def active(self, hs_code, date):
+        """Measures in force for one product at a date, in start order"""
+        product, key = self._keys([hs_code], [date])
+        if product[0] < 0:
+            return self._frame(np.empty(0, dtype=np.int64))
+        lo = np.searchsorted(self.start_keys, product[0] << DAY_BITS)
+        hi = np.searchsorted(self.start_keys, key[0], side='right')
+        positions = np.arange(lo, hi)
+        return self._frame(positions[self.end_days[positions] > (key[0] & OPEN)])
+
+    def active_bulk(self, hs_codes, dates):
+        """Measures in force for many (hs_code, date) pairs, with a `query` column
+
+        The runs of started measures of all queries are expanded at once
+        (np.repeat over run lengths) and filtered on their end days.
+        """
+        product, key = self._keys(hs_codes, dates)
+        lo = np.searchsorted(self.start_keys, np.maximum(product, 0) << DAY_BITS)
+        hi = np.where(product >= 0, np.searchsorted(self.start_keys, key, side='right'), lo)
+        lengths = hi - lo
+        query = np.repeat(np.arange(len(key)), lengths)
+        positions = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        keep = self.end_days[positions] > (key[query] & OPEN)
+        frame = self._frame(positions[keep])
+        frame.insert(0, 'query', query[keep])
+        return frame
+
+    def changes(self, hs_code, before, after):
+        """Measures that came into / went out of force between two dates
+
+        Returns {'added': ..., 'removed': ...}: added measures started in
+        (before, after] and are still in force at after; removed ones were in
+        force at before and ended in (before, after].
+        """
+        product, keys = self._keys([hs_code, hs_code], [before, after])
+        if product[0] < 0:
+            empty = self._frame(np.empty(0, dtype=np.int64))
+            return {'added': empty, 'removed': empty}
+        before_key, after_key = keys
+        before_day, after_day = before_key & OPEN, after_key & OPEN
+
+        lo = np.searchsorted(self.start_keys, before_key, side='right')
+        hi = np.searchsorted(self.start_keys, after_key, side='right')
+        added = np.arange(lo, hi)
+        added = added[self.end_days[added] > after_day]
+
+        lo = np.searchsorted(self.end_keys, before_key, side='right')
+        hi = np.searchsorted(self.end_keys, after_key, side='right')
+        removed = self.end_order[lo:hi]
+        removed = removed[self.start_days[removed] <= before_day]
+
+        return {'added': self._frame(added), 'removed': self._frame(np.sort(removed))}
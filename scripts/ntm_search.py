@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+NTM Search - BM25 Index over Measure Descriptions
+=================================================
+Full-text search over the free-text fields of a TRAINS export (measure
+description, regulation title, issuing agency and the MAST code
+description), keyed by HS4 product.
+
+The index is a directory of flat arrays written once and memory-mapped on
+open, so opening it costs nothing and a query only touches the postings of
+its terms:
+
+    terms.npy                  sorted vocabulary (binary search per query term)
+    offsets.npy                postings of term i are [offsets[i], offsets[i + 1])
+    postings_doc/_tf.npy       document ids and field-weighted term frequencies
+    doc_length.npy             field-weighted document lengths
+    hs4.npy, hs4_offsets.npy,  documents listing each HS4 product
+    hs4_docs.npy
+    records.bin, records_offsets.npy
+                               one JSON record per document, read for the hits only
+    meta.json                  document count, average length, BM25 parameters
+
+Ranking is BM25 with per-field weights on the term frequencies:
+
+    score(d, q) = sum over terms t of q:
+        idf(t) * tf(t, d) * (k1 + 1) / (tf(t, d) + k1 * (1 - b + b * len(d) / avg_len))
+
+Usage:
+    python ntm_search.py build
+    python ntm_search.py query "traceability" --hs 0306
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from ntm_etl import REPO_DIR, explode_hs4
+from ntm_index import hs4_label
+
+# Export columns that are indexed and the weight of a term occurrence in each
+FIELD_WEIGHTS = {
+    'Measure description': 1.0,
+    'Regulation title': 2.0,
+    'Issuing agency(ies)': 2.0,
+    'Ntm description': 2.0
+}
+
+# Export columns kept in the result records (besides the indexed fields)
+RECORD_COLUMNS = {
+    'NTM code': 'ntm_code',
+    'Hs code(s)': 'hs_codes',
+    'Implementation date': 'implementation_date'
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_TERM_LENGTH = 32
+SNIPPET_LENGTH = 240
+
+STOPWORDS = {
+    'a', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'shall', 'such', 'that', 'the', 'this',
+    'to', 'which', 'with'
+}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+def default_index_path(export_path):
+    """Index directory that goes with an export path"""
+    return os.path.splitext(export_path)[0] + '.search'
+
+def tokenize(text):
+    """Lower-cased terms of a text; stopwords dropped, plural 's' stripped"""
+    terms = []
+    for term in _TOKEN.findall(str(text).lower()):
+        if term in STOPWORDS or len(term) < 2 or len(term) > MAX_TERM_LENGTH:
+            continue
+        if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+def weighted_terms(row):
+    """Field-weighted term frequencies and length of one export row"""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(row.get(field, '')):
+            counts[term] += weight
+    return counts, sum(counts.values())
+
+def build_index(export_path, index_path=None, chunksize=5000):
+    """Write the search index of a TRAINS export; returns the index directory"""
+    index_path = index_path or default_index_path(export_path)
+    os.makedirs(index_path, exist_ok=True)
+
+    vocabulary = {}
+    term_ids, doc_ids, frequencies, lengths = [], [], [], []
+    hs4_pairs = []
+    records = bytearray()
+    record_offsets = [0]
+
+    n_docs = 0
+    columns = list(FIELD_WEIGHTS) + list(RECORD_COLUMNS)
+    for chunk in pd.read_csv(export_path, usecols=columns, dtype=str, chunksize=chunksize):
+        chunk = chunk.fillna('')
+        for doc, row in enumerate(chunk.to_dict('records'), start=n_docs):
+            counts, length = weighted_terms(row)
+            term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in counts)
+            doc_ids.extend([doc] * len(counts))
+            frequencies.extend(counts.values())
+            lengths.append(length)
+
+            record = {short: row[column].strip() for column, short in RECORD_COLUMNS.items()}
+            record.update(measure=doc,
+                          description=row['Measure description'].strip(),
+                          regulation_title=row['Regulation title'].strip(),
+                          agency=row['Issuing agency(ies)'].strip())
+            records += json.dumps(record).encode('utf-8')
+            record_offsets.append(len(records))
+
+        pairs = explode_hs4(chunk['Hs code(s)'])
+        hs4_pairs.append(pd.DataFrame({'hs4': pairs['hs4'].to_numpy(),
+                                       'doc': pairs['row'].to_numpy() - chunk.index[0] + n_docs}))
+        n_docs += len(chunk)
+
+    # Postings grouped by term in vocabulary order (stable: doc ids stay sorted)
+    terms = np.array(sorted(vocabulary), dtype=f'<U{MAX_TERM_LENGTH}')
+    rank = np.empty(len(vocabulary), dtype=np.int64)
+    rank[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+    term_ids = rank[np.asarray(term_ids, dtype=np.int64)]
+    order = np.argsort(term_ids, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(terms)))])
+
+    hs4 = pd.concat(hs4_pairs, ignore_index=True).sort_values(['hs4', 'doc'], kind='stable')
+    products, counts = np.unique(hs4['hs4'].to_numpy(dtype=str), return_counts=True)
+
+    arrays = {
+        'terms': terms,
+        'offsets': offsets.astype(np.int64),
+        'postings_doc': np.asarray(doc_ids, dtype=np.int32)[order],
+        'postings_tf': np.asarray(frequencies, dtype=np.float32)[order],
+        'doc_length': np.asarray(lengths, dtype=np.float32),
+        'hs4': products.astype('<U4'),
+        'hs4_offsets': np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        'hs4_docs': hs4['doc'].to_numpy(dtype=np.int32),
+        'records_offsets': np.asarray(record_offsets, dtype=np.int64)
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_path, f'{name}.npy'), array)
+    with open(os.path.join(index_path, 'records.bin'), 'wb') as f:
+        f.write(records)
+    with open(os.path.join(index_path, 'meta.json'), 'w') as f:
+        json.dump({'source': os.path.abspath(export_path), 'n_docs': n_docs,
+                   'avg_length': float(np.mean(lengths)) if lengths else 0.0,
+                   'k1': BM25_K1, 'b': BM25_B, 'field_weights': FIELD_WEIGHTS}, f, indent=2)
+    return index_path
+
+def snippet(text, terms, length=SNIPPET_LENGTH):
+    """Window of text around the first occurrence of any query term"""
+    text = ' '.join(text.split())
+    lower = text.lower()
+    hits = [lower.find(term) for term in terms if lower.find(term) >= 0]
+    start = max(min(hits) - length // 4, 0) if hits else 0
+    window = text[start:start + length]
+    return ('…' if start else '') + window + ('…' if start + length < len(text) else '')
+
+class NTMSearchIndex:
+    """Memory-mapped BM25 index written by build_index"""
+
+    def __init__(self, index_path):
+        self.path = index_path
+        with open(os.path.join(index_path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        load = lambda name: np.load(os.path.join(index_path, f'{name}.npy'), mmap_mode='r')
+        self.terms = load('terms')
+        self.offsets = load('offsets')
+        self.postings_doc = load('postings_doc')
+        self.postings_tf = load('postings_tf')
+        self.doc_length = load('doc_length')
+        self.hs4 = load('hs4')
+        self.hs4_offsets = load('hs4_offsets')
+        self.hs4_docs = load('hs4_docs')
+        self.records_offsets = load('records_offsets')
+        self.records = np.memmap(os.path.join(index_path, 'records.bin'), dtype=np.uint8, mode='r') \
+            if self.records_offsets[-1] else np.empty(0, dtype=np.uint8)
+
+    @classmethod
+    def open_or_build(cls, export_path, index_path=None):
+        """Open the index of an export, (re)building it when missing or older than the export"""
+        index_path = index_path or default_index_path(export_path)
+        meta = os.path.join(index_path, 'meta.json')
+        if not os.path.exists(meta) or os.path.getmtime(meta) < os.path.getmtime(export_path):
+            build_index(export_path, index_path)
+        return cls(index_path)
+
+    def __len__(self):
+        return self.meta['n_docs']
+
+    def postings(self, term):
+        """(doc ids, weighted term frequencies) of one term; empty if unknown"""
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.postings_doc[lo:hi], self.postings_tf[lo:hi]
+
+    def product_docs(self, hs_code):
+        """Sorted ids of the documents listing an HS4 product"""
+        label = hs4_label(hs_code)
+        i = np.searchsorted(self.hs4, label)
+        if i == len(self.hs4) or self.hs4[i] != label:
+            return np.empty(0, dtype=np.int32)
+        return self.hs4_docs[self.hs4_offsets[i]:self.hs4_offsets[i + 1]]
+
+    def record(self, doc):
+        """Stored fields of one document"""
+        lo, hi = self.records_offsets[doc], self.records_offsets[doc + 1]
+        return json.loads(self.records[lo:hi].tobytes().decode('utf-8'))
+
+    def scores(self, query, hs_code=None):
+        """(doc ids, BM25 scores) of the documents matching any query term"""
+        k1, b = self.meta['k1'], self.meta['b']
+        n_docs, avg_length = self.meta['n_docs'], self.meta['avg_length'] or 1.0
+        allowed = None if hs_code is None else self.product_docs(hs_code)
+
+        docs, contributions = [], []
+        for term in set(tokenize(query)):
+            doc, tf = self.postings(term)
+            if not len(doc):
+                continue
+            idf = np.log(1 + (n_docs - len(doc) + 0.5) / (len(doc) + 0.5))
+            if allowed is not None:
+                keep = np.isin(doc, allowed, assume_unique=True)
+                doc, tf = doc[keep], tf[keep]
+            norm = k1 * (1 - b + b * self.doc_length[doc] / avg_length)
+            docs.append(doc)
+            contributions.append(idf * tf * (k1 + 1) / (tf + norm))
+
+        if not docs:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        ids, position = np.unique(np.concatenate(docs), return_inverse=True)
+        return ids, np.bincount(position, weights=np.concatenate(contributions))
+
+    def search(self, query, hs_code=None, k=10):
+        """Top-k measures for a query, optionally restricted to one HS product
+
+        Returns a DataFrame with score, measure (export row), ntm_code,
+        regulation_title, agency, implementation_date and a snippet of the
+        measure description around the first query term.
+        """
+        ids, scores = self.scores(query, hs_code)
+        top = np.argsort(-scores, kind='stable')[:k]
+        terms = set(tokenize(query))
+
+        rows = []
+        for i in top:
+            record = self.record(ids[i])
+            rows.append({
+                'score': round(float(scores[i]), 4),
+                'measure': record['measure'],
+                'ntm_code': record['ntm_code'],
+                'regulation_title': record['regulation_title'],
+                'agency': record['agency'],
+                'implementation_date': record['implementation_date'],
+                'snippet': snippet(record['description'], terms)
+            })
+        return pd.DataFrame(rows, columns=['score', 'measure', 'ntm_code', 'regulation_title',
+                                           'agency', 'implementation_date', 'snippet'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the BM25 index of a TRAINS NTM export")
+    parser.add_argument('command', choices=['build', 'query'])
+    parser.add_argument('text', nargs='?', default='', help="Query text (query command)")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'data', 'NTM_details_-_data.csv'),
+                        help="TRAINS 'NTM details' CSV export")
+    parser.add_argument('--index', default=None, help="Index directory (default: <input stem>.search)")
+    parser.add_argument('--hs', default=None, help="Restrict results to one HS4 product")
+    parser.add_argument('-k', type=int, default=10, help="Number of results (default: 10)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(f"\n🔎 Indexing {args.input}...")
+        start = time.perf_counter()
+        path = build_index(args.input, args.index)
+        index = NTMSearchIndex(path)
+        print(f"   ✓ {len(index):,} measures, {len(index.terms):,} terms, "
+              f"{len(index.postings_doc):,} postings in {time.perf_counter() - start:.2f}s → {path}")
+        return
+
+    index = NTMSearchIndex.open_or_build(args.input, args.index)
+    start = time.perf_counter()
+    results = index.search(args.text, args.hs, args.k)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\n🔎 '{args.text}'" + (f" in HS {hs4_label(args.hs)}" if args.hs else '')
+          + f": {len(results)} results in {elapsed:.1f} ms")
+    for row in results.itertuples():
+        print(f"\n   [{row.score:.2f}] {row.ntm_code} · {row.agency} · {row.implementation_date}")
+        print(f"   {row.regulation_title}")
+        print(f"   {row.snippet}")
+
+if __name__ == "__main__":
+    main()
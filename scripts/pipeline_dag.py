@@ -0,0 +1,169 @@
+"""
+Pipeline DAG - Declared Stages with Checkpointing
+=================================================
+Runs a list of declared stages over a DataFrame. Each stage is a dict:
+
+    {
+        'name': 'risk',                      # unique stage name
+        'func': compute_risk_scores,         # func(df, **params) -> df
+        'reads': ['china_share_us', ...],    # columns the stage needs
+        'writes': ['risk_level', ...],       # columns the stage adds
+        'params': {'weights': {...}},        # optional keyword arguments
+        'depends': [classify, RISK_BINS],    # optional helpers, modules and tables it uses
+        'cache': True                        # optional, default True
+    }
+
+Dependencies are derived from the columns: a stage depends on every
+earlier stage that writes one of its reads. Each stage gets a key hashing
+PIPELINE_VERSION, its name, source code, params, the source of its
+declared helpers and modules and the values of its declared tables, the
+input columns it reads (each hashed once per run) and the keys of the
+stages it depends on, which stand for the columns they write. A change
+anywhere only invalidates the stages downstream of it; input columns no
+stage reads invalidate nothing. Bump PIPELINE_VERSION when a stage's
+output changes in a way none of these capture. The written columns are
+checkpointed as <cache_dir>/<stage>-<key>.pkl and reused when the key
+matches.
+
+Stages receive only their declared read columns, in the row order of the
+input frame (which they must preserve, e.g. by running on a frame already
+sorted the way they sort).
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Salt of every checkpoint key
+PIPELINE_VERSION = 1
+
+def stage_dependencies(stages):
+    """Map each stage name to the names of the stages it reads from
+
+    Raises ValueError when a column is written twice or a stage reads a
+    column that only a later stage writes.
+    """
+    writer = {}
+    deps = {}
+    for stage in stages:
+        deps[stage['name']] = sorted({writer[col] for col in stage['reads'] if col in writer})
+        for col in stage['writes']:
+            if col in writer:
+                raise ValueError(f"Column '{col}' written by both '{writer[col]}' and '{stage['name']}'")
+            writer[col] = stage['name']
+
+    # A read that is written later would make the declared order invalid
+    for i, stage in enumerate(stages):
+        later = {col for s in stages[i:] for col in s['writes']}
+        early_reads = later.intersection(stage['reads'])
+        if early_reads:
+            raise ValueError(f"Stage '{stage['name']}' reads {sorted(early_reads)} before they are written")
+    return deps
+
+def resolve_plan(stages, target=None):
+    """Stages needed to produce target (a name or list of names; all stages when None), in declared order"""
+    if target is None:
+        return list(stages)
+
+    targets = [target] if isinstance(target, str) else list(target)
+    names = [stage['name'] for stage in stages]
+    unknown = [name for name in targets if name not in names]
+    if unknown:
+        raise ValueError(f"Unknown stage '{unknown[0]}'. Available: {', '.join(names)}")
+
+    deps = stage_dependencies(stages)
+    needed = set()
+    pending = targets
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(deps[name])
+    return [stage for stage in stages if stage['name'] in needed]
+
+def hash_column(series):
+    """Content hash of a column (name and values, not the index)"""
+    digest = hashlib.sha256()
+    digest.update(str(series.name).encode())
+    digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def reads_key(df, columns, column_keys):
+    """Hash of the input columns a stage reads; column_keys memoises the per-column hashes"""
+    digest = hashlib.sha256()
+    digest.update(str(len(df)).encode())
+    for col in sorted(columns):
+        if col not in column_keys:
+            column_keys[col] = hash_column(df[col])
+        digest.update(column_keys[col].encode())
+    return digest.hexdigest()
+
+def dependency_fingerprint(dependency):
+    """Source of a helper function or module, JSON of a table"""
+    if inspect.ismodule(dependency) or callable(dependency):
+        return inspect.getsource(dependency)
+    return json.dumps(dependency, sort_keys=True, default=str)
+
+def stage_key(stage, input_key, dep_keys):
+    """Checkpoint key of a stage from its definition and its inputs' keys"""
+    digest = hashlib.sha256()
+    digest.update(str(PIPELINE_VERSION).encode())
+    digest.update(stage['name'].encode())
+    digest.update(inspect.getsource(stage['func']).encode())
+    digest.update(json.dumps(stage.get('params', {}), sort_keys=True, default=str).encode())
+    for dependency in stage.get('depends', []):
+        digest.update(dependency_fingerprint(dependency).encode())
+    digest.update(input_key.encode())
+    for key in dep_keys:
+        digest.update(key.encode())
+    return digest.hexdigest()[:20]
+
+def run_stages(df, stages, target=None, cache_dir=None):
+    """Run the stages needed for target, reusing checkpoints from cache_dir
+
+    Returns (df with all written columns, {stage name: 'computed' | 'cached'}).
+    """
+    deps = stage_dependencies(stages)
+    plan = resolve_plan(stages, target)
+
+    df = df.reset_index(drop=True)
+    # Columns written by a stage are covered by that stage's key
+    stage_columns = {col for stage in stages for col in stage['writes']}
+    column_keys = {}
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    keys = {}
+    status = {}
+    for stage in plan:
+        name = stage['name']
+        reads = [col for col in stage['reads'] if col not in stage_columns]
+        keys[name] = stage_key(stage, reads_key(df, reads, column_keys), [keys[d] for d in deps[name]])
+        use_cache = cache_dir and stage.get('cache', True)
+        path = os.path.join(cache_dir, f"{name}-{keys[name]}.pkl") if use_cache else None
+
+        if path and os.path.exists(path):
+            written = pd.read_pickle(path)
+            status[name] = 'cached'
+            logger.info(f"   ⏭️  {name}: reused checkpoint {keys[name]}")
+        else:
+            result = stage['func'](df[stage['reads']].copy(), **stage.get('params', {}))
+            missing = [col for col in stage['writes'] if col not in result.columns]
+            if missing:
+                raise ValueError(f"Stage '{name}' did not write declared columns {missing}")
+
+            written = result[stage['writes']].reset_index(drop=True)
+            if path:
+                written.to_pickle(path)
+            status[name] = 'computed'
+
+        for col in stage['writes']:
+            df[col] = written[col]
+
+    return df, status
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Portfolio Batch - Precomputed Agent Analyses
+============================================
+Runs the full AgentOrchestrator (data -> risk -> recommendations) for every
+(hs_code, quarter) of the combined trade + NTM table and stores the results
+as one Parquet file, sorted by (hs_code, date):
+
+    scalar columns    overall risk score / level, urgency, the four component
+                      scores, disruption likelihood / impact, the primary
+                      recommendation and its expected outcomes
+    analysis          the complete analysis as JSON, read for one row at a
+                      time (row-group statistics prune the file by hs_code)
+
+Labels are stored as dictionary-encoded categoricals. Products are split
+into slices that are analysed on a process pool.
+
+The assistant serves the dashboard from the scalar columns and "Analyze"
+clicks from the stored JSON; only product-quarters missing from the table
+are computed live. The schema metadata records the versions the table was
+built from: a content fingerprint of the combined table (data_version) and
+the agents' scoring configuration (config_version). The assistant ignores
+a table whose versions differ from its own.
+
+Requires pyarrow.
+
+Usage:
+    python portfolio_batch.py
+    python portfolio_batch.py --input ../outputs/trade_ntm_combined.csv --workers 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import _require_pyarrow, pa
+from result_cache import fingerprint
+from trade_agents import AgentOrchestrator
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed for Parquet I/O
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Written next to the pipeline outputs
+PORTFOLIO_FILENAME = 'portfolio_analysis.parquet'
+
+# NTM aggregate columns (ntm_etl.AGGREGATE_COLUMNS) and their values for
+# product-quarters without measures
+NTM_DEFAULTS = {
+    'ntm_count': 0, 'ntm_codes': np.nan, 'has_sps': False, 'has_tbt': False,
+    'has_export_restriction': False, 'technical_measure_count': 0,
+    'non_technical_count': 0, 'ntm_severity': 'NONE'
+}
+
+# Scalar columns of the table besides hs_code / date / product_name
+LABEL_COLUMNS = ['overall_risk_level', 'urgency', 'primary_strategy', 'primary_timeline',
+                 'primary_feasibility', 'expected_risk_level']
+SCORE_COLUMNS = {
+    'overall_risk_score': np.float32,
+    'concentration_score': np.int16,
+    'dependency_score': np.int16,
+    'ntm_impact_score': np.int16,
+    'trend_score': np.int16,
+    'likelihood_score': np.int8,
+    'impact_score': np.int8,
+    'china_share_target': np.float32,
+    'china_share_reduction': np.float32,
+    'hhi_target': np.float32,
+    'hhi_improvement': np.float32
+}
+
+TABLE_COLUMNS = ['hs_code', 'date', 'product_name', 'overall_risk_score', 'overall_risk_level',
+                 'urgency', 'concentration_score', 'dependency_score', 'ntm_impact_score',
+                 'trend_score', 'likelihood_score', 'impact_score', 'primary_strategy',
+                 'primary_target', 'primary_timeline', 'primary_feasibility', 'expected_risk_level',
+                 'china_share_target', 'china_share_reduction', 'hhi_target', 'hhi_improvement',
+                 'analysis']
+
+# Rows per Parquet row group (the unit a single-row read decodes)
+ROW_GROUP_SIZE = 4096
+
+# Schema metadata keys of the versions the table was built from
+VERSION_KEYS = ['data_version', 'config_version']
+
+def portfolio_path(output_path):
+    """Portfolio table that goes with a pipeline output path"""
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)), PORTFOLIO_FILENAME)
+
+def combine_with_ntm(indices, ntm):
+    """Combined trade + NTM table: indices left-joined with the quarterly NTM aggregates
+
+    ntm=None gives every product-quarter the no-measure defaults, and so do
+    product-quarters the aggregates do not cover (e.g. an appended quarter).
+    """
+    if ntm is None:
+        return indices.assign(**NTM_DEFAULTS)
+    combined = indices.merge(ntm, on=['hs_code', 'date'], how='left', indicator=True)
+    missing = combined.pop('_merge') == 'left_only'
+    if missing.any():
+        uncovered = combined.loc[missing, ['hs_code', 'date']].astype(str).agg(' '.join, axis=1)
+        logger.warning(f"   ⚠️  {missing.sum()} product-quarters have no NTM aggregates, using the "
+                       f"no-measure defaults: {', '.join(uncovered.head(10))}"
+                       f"{' ...' if missing.sum() > 10 else ''}")
+        for col, default in NTM_DEFAULTS.items():
+            if col in ntm.columns and pd.notna(default):
+                combined[col] = combined[col].fillna(default).astype(ntm[col].dtype)
+    return combined
+
+def data_version(combined):
+    """Content fingerprint of a combined table, the same from the CSV or the Parquet dataset
+
+    Rows are taken in (hs_code, date) order and columns by name; values that
+    parse as numbers are compared as floats, the rest as text, so load-time
+    dtypes (int or str hs_code, categorical labels) do not matter. The
+    analysis_timestamp of the indices is not read by the agents and is left out.
+    """
+    columns = {}
+    for col in sorted(combined.columns.difference(['analysis_timestamp'])):
+        values = combined[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            numeric = pd.to_numeric(values.astype(object), errors='coerce')
+            values = numeric if numeric.notna().sum() == values.notna().sum() else values
+        if pd.api.types.is_numeric_dtype(values):
+            columns[col] = values.astype(float)
+        else:
+            columns[col] = values.astype(object).fillna('').astype(str)
+    frame = pd.DataFrame(columns).sort_values(['hs_code', 'date'], kind='stable')
+    return fingerprint(list(frame.columns), *(frame[col] for col in frame.columns))
+
+def config_version():
+    """Scoring configuration of the batch run's agents (template narratives)"""
+    return AgentOrchestrator(pd.DataFrame(columns=['hs_code', 'date'])).agent_config_version()
+
+def analysis_row(analysis):
+    """Scalar columns of one orchestrator result"""
+    risk = analysis['risk_assessment']
+    components = risk['risk_components']
+    recommendations = analysis['diversification_recommendations']
+    primary = recommendations['primary_recommendation'] or {}
+    outcomes = recommendations['expected_outcomes'] or {}
+    dependency = outcomes.get('china_dependency', {})
+    concentration = outcomes.get('market_concentration', {})
+    return {
+        'overall_risk_score': risk['overall_risk_score'],
+        'overall_risk_level': risk['overall_risk_level'],
+        'urgency': risk['urgency'],
+        'concentration_score': components['concentration']['score'],
+        'dependency_score': components['dependency']['score'],
+        'ntm_impact_score': components['ntm_impact']['score'],
+        'trend_score': components['trend']['score'],
+        'likelihood_score': risk['disruption_likelihood']['score'],
+        'impact_score': risk['disruption_impact']['score'],
+        'primary_strategy': primary.get('name'),
+        'primary_target': primary.get('target'),
+        'primary_timeline': primary.get('timeline'),
+        'primary_feasibility': primary.get('feasibility'),
+        'expected_risk_level': outcomes.get('risk_reduction', {}).get('to'),
+        'china_share_target': dependency.get('target', np.nan),
+        'china_share_reduction': dependency.get('reduction', np.nan),
+        'hhi_target': concentration.get('target_hhi', np.nan),
+        'hhi_improvement': concentration.get('improvement', np.nan)
+    }
+
+def analyze_partition(df):
+    """Analyses of every product-quarter of a slice of whole products"""
+    orchestrator = AgentOrchestrator(df)
+    rows = []
+    for hs_code, quarter in zip(df['hs_code'].tolist(), df['date'].tolist()):
+        analysis = orchestrator.analyze_product(hs_code, quarter)
+        if 'error' in analysis:
+            continue
+        rows.append({
+            'hs_code': hs_code,
+            'date': quarter,
+            'product_name': analysis['product_info']['name'],
+            **analysis_row(analysis),
+            'analysis': json.dumps(analysis, default=str)
+        })
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS)
+
+def build_portfolio(combined, workers=1, partitions_per_worker=4):
+    """Portfolio table of a combined trade + NTM frame
+
+    With more than one worker, slices of whole products are analysed on a
+    process pool; results come back in submission order, so the table is
+    the same as a serial run's.
+    """
+    # Imported here: compute_trade_indices imports this module for its batch step
+    from compute_trade_indices import partition_by_product
+
+    df = combined.assign(hs_code=combined['hs_code'].astype(str).str.strip())
+    df = df.sort_values(['hs_code', 'date'], kind='stable').reset_index(drop=True)
+    if workers > 1:
+        partitions = partition_by_product(df, workers * partitions_per_worker)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(analyze_partition, partitions))
+        table = pd.concat(parts, ignore_index=True)
+    else:
+        table = analyze_partition(df)
+
+    for col, dtype in SCORE_COLUMNS.items():
+        table[col] = table[col].astype(dtype)
+    for col in LABEL_COLUMNS:
+        table[col] = table[col].astype('category')
+    return table
+
+def save_portfolio(table, path, versions=None):
+    """Write the table as one zstd-compressed Parquet file, return bytes written
+
+    versions ({VERSION_KEYS name: value}) is stored in the schema metadata.
+    """
+    _require_pyarrow()
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    if versions:
+        metadata = {**(arrow_table.schema.metadata or {}),
+                    **{key.encode(): str(value).encode() for key, value in versions.items()}}
+        arrow_table = arrow_table.replace_schema_metadata(metadata)
+    pq.write_table(arrow_table, path, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+    return os.path.getsize(path)
+
+def load_portfolio(path, columns=None):
+    """Read the table (all columns but the analysis JSON by default)"""
+    _require_pyarrow()
+    if columns is None:
+        columns = [name for name in pq.read_schema(path).names if name != 'analysis']
+    return pq.read_table(path, columns=columns).to_pandas()
+
+def portfolio_versions(path):
+    """Versions recorded in the table's schema metadata (None for unrecorded ones)"""
+    _require_pyarrow()
+    metadata = pq.read_schema(path).metadata or {}
+    return {key: metadata[key.encode()].decode() if key.encode() in metadata else None
+            for key in VERSION_KEYS}
+
+def load_analysis(path, hs_code, quarter):
+    """Stored analysis of one product-quarter (None if absent)"""
+    _require_pyarrow()
+    rows = pq.read_table(path, columns=['analysis'],
+                         filters=[('hs_code', '=', str(hs_code)), ('date', '=', quarter)])
+    return json.loads(rows.column('analysis')[0].as_py()) if rows.num_rows else None
+
+def load_ntm_aggregates(ntm_file):
+    """Quarterly NTM aggregates written by ntm_etl.py (None if the file is missing)"""
+    if ntm_file and os.path.exists(ntm_file):
+        return pd.read_csv(ntm_file)
+    logger.warning(f"   ⚠️  NTM aggregates not found ({ntm_file}); analysing without measures")
+    return None
+
+def run_portfolio(combined, output_file, workers=1):
+    """Analyse every product-quarter of a combined table and save the portfolio table"""
+    logger.info(f"\n🤖 Precomputing agent analyses for {len(combined)} product-quarters...")
+    start = time.perf_counter()
+    table = build_portfolio(combined, workers)
+    elapsed = time.perf_counter() - start
+    versions = {'data_version': data_version(combined), 'config_version': config_version()}
+    size = save_portfolio(table, output_file, versions)
+
+    logger.info(f"   ✓ {len(table)} analyses in {elapsed:.1f}s on {workers} worker(s)")
+    logger.info(f"   ✓ Saved to {output_file} ({size / 1024:.1f} KB)")
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute agent analyses for every product-quarter")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'),
+                        help="Combined trade + NTM table (already has the NTM columns)")
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'outputs', PORTFOLIO_FILENAME))
+    parser.add_argument('--workers', type=int, default=1, help="Processes (default: 1, serial)")
+    args = parser.parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO)
+
+    run_portfolio(pd.read_csv(args.input), args.output, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Product Snapshot - Materialized Latest-Quarter View
+===================================================
+Each product's latest quarter from the combined trade + NTM table, as shown
+by the assistant's selectors and portfolio dashboard:
+
+    latest      one row per hs_code (sorted): the last non-null value of
+                every SNAPSHOT_COLUMNS column in date order, like
+                sort_values('date').groupby('hs_code').last()
+    summary     latest with display names, highest risk score first
+    top(view)   first rows of a precomputed ordering (TOP_VIEWS)
+
+The orderings are computed when the snapshot is built or refreshed, so
+reads are slices. refresh() folds newly arrived rows into the products
+they touch: rows later than a product's snapshot quarter are merged with
+its snapshot row; backfilled rows make that product be recomputed from its
+full history.
+"""
+
+from typing import Optional
+
+import pandas as pd
+
+# Source columns and their display names, in display order
+SNAPSHOT_COLUMNS = {
+    'hs_code': 'HS Code',
+    'product_name': 'Product',
+    'date': 'Quarter',
+    'china_share_us': 'China %',
+    'india_share_us': 'India %',
+    'geopolitical_risk_score': 'Risk Score',
+    'risk_level': 'Risk Level',
+    'ntm_count': 'NTMs',
+    'ntm_severity': 'NTM Severity',
+    'india_opportunity_score': 'India Opportunity'
+}
+
+# Top-N views and the summary column each ranks by (descending)
+TOP_VIEWS = {
+    'risk': 'Risk Score',
+    'opportunity': 'India Opportunity'
+}
+
+def latest_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Last non-null SNAPSHOT_COLUMNS values of each product in date order, indexed by hs_code"""
+    ordered = df[list(SNAPSHOT_COLUMNS)].sort_values(['hs_code', 'date'], kind='stable')
+    return ordered.groupby('hs_code').last()
+
+class LatestSnapshot:
+    """Latest quarter of every product with precomputed orderings
+
+    The frames handed out are shared; treat them as read-only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.latest = latest_rows(df)
+        self._materialize()
+
+    def __len__(self) -> int:
+        return len(self.latest)
+
+    def _materialize(self):
+        """Display frame and the top-N orderings of the current latest rows"""
+        summary = self.latest.reset_index()[list(SNAPSHOT_COLUMNS)].rename(columns=SNAPSHOT_COLUMNS)
+        # Same sort as the groupby summary this replaces (ties keep its order)
+        self.summary = summary.sort_values('Risk Score', ascending=False)
+        self._views = {
+            view: self.summary if column == 'Risk Score'
+            else summary.sort_values(column, ascending=False, kind='stable')
+            for view, column in TOP_VIEWS.items()
+        }
+
+    def top(self, view: str, n: int = 5) -> pd.DataFrame:
+        """First n products of a TOP_VIEWS ordering"""
+        if view not in self._views:
+            raise ValueError(f"Unknown view '{view}'; expected one of {sorted(self._views)}")
+        return self._views[view].head(n)
+
+    def refresh(self, new_rows: pd.DataFrame, history: Optional[pd.DataFrame] = None):
+        """Fold new rows into the snapshot
+
+        `history` is the full table including new_rows. It is only read for
+        products that received rows at or before their snapshot quarter.
+        """
+        new_rows = new_rows[list(SNAPSHOT_COLUMNS)]
+        if not len(new_rows):
+            return
+        products = pd.unique(new_rows['hs_code'])
+        known = self.latest.index.intersection(products)
+
+        # Products whose new rows all come after their snapshot quarter
+        earliest = new_rows.groupby('hs_code')['date'].min()
+        backfilled = known[earliest.loc[known].to_numpy() <= self.latest.loc[known, 'date'].to_numpy()]
+        if len(backfilled) and history is None:
+            raise ValueError(f"Rows at or before the snapshot quarter for {list(backfilled)}; pass history")
+
+        appended = new_rows[~new_rows['hs_code'].isin(backfilled)]
+        parts = [self.latest.drop(products, errors='ignore'),
+                 latest_rows(pd.concat([self.latest.loc[known.difference(backfilled)].reset_index(),
+                                        appended], ignore_index=True))]
+        if len(backfilled):
+            parts.append(latest_rows(history[history['hs_code'].isin(backfilled)]))
+        self.latest = pd.concat(parts).sort_index()
+        self._materialize()
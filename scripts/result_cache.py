@@ -0,0 +1,118 @@
+"""
+Result Cache - Bounded LRU Memo for Agent Analyses
+==================================================
+Thread-safe least-recently-used cache for AgentOrchestrator.analyze_product
+results. Keys carry the versions the result depends on:
+
+    (hs_code, quarter, dataset version, agent config version)
+
+so a reloaded dataset or re-tuned agent never serves a stale analysis; old
+entries simply age out. The versions are short content fingerprints:
+
+    fingerprint    SHA-256 over arrays (hashed element-wise) and JSON-able config
+    dataset_files  (path, size, mtime) of every file under a dataset directory
+
+The cache keeps hit / miss / eviction counters. One instance can be shared
+by every session of an app (st.cache_resource) or by every thread of a
+server.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Entries kept by default (pickled analyses are ~5 KB each)
+DEFAULT_MAXSIZE = 256
+
+# Hex digits kept of a fingerprint
+FINGERPRINT_LENGTH = 16
+
+def fingerprint(*parts) -> str:
+    """Short SHA-256 fingerprint of arrays and JSON-serializable values"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (np.ndarray, pd.Series, pd.Index)):
+            # hash_array handles object / categorical columns as well as numbers
+            digest.update(pd.util.hash_array(np.asarray(part)).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()[:FINGERPRINT_LENGTH]
+
+def dataset_files(path: str) -> list:
+    """(relative path, size, mtime) of every file under a directory, sorted"""
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            stat = os.stat(os.path.join(root, name))
+            files.append((os.path.relpath(os.path.join(root, name), path), stat.st_size, stat.st_mtime_ns))
+    return sorted(files)
+
+class LRUResultCache:
+    """Bounded, thread-safe LRU mapping with hit / miss counters
+
+    Values are stored as given; callers that hand results to code which may
+    mutate them should store immutable values (AgentOrchestrator stores
+    pickled analyses).
+    Concurrent misses on one key may both compute; the last put wins.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value (marked most recently used), None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries over maxsize"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Counters, size and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,139 @@
+"""
+Stage Profiler - Per-Stage Timing and Memory
+============================================
+Instrumentation for the compute_* stages of compute_trade_indices.py.
+
+Stages are wrapped with @profiled_stage. While no profiler is active the
+wrapper is a single global lookup, so disabled profiling costs nothing
+measurable. Inside `with profiling(...) as profiler:` every stage call
+records:
+    - wall time and rows/sec
+    - bytes allocated (tracemalloc peak above the stage's starting level)
+      and bytes still held when the stage returns
+    - peak RSS delta (growth of the process high-water mark, if available)
+and one chosen stage can additionally be run under cProfile with the
+stats dumped to a .pstats file.
+"""
+
+import cProfile
+import functools
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# Profiler collecting records, or None when profiling is disabled
+_active = None
+
+def _peak_rss_bytes():
+    """Process peak resident set size in bytes (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def profiled_stage(func):
+    """Record timing and memory for func whenever a profiler is active"""
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return func(df, *args, **kwargs)
+        return profiler.run(func, df, *args, **kwargs)
+    return wrapper
+
+def disable():
+    """Turn profiling off in this process (used as a worker-pool initializer)"""
+    global _active
+    _active = None
+
+class StageProfiler:
+    """Collects one record per profiled stage call"""
+
+    def __init__(self, cprofile_stage=None, cprofile_path=None, trace_memory=True):
+        self.cprofile_stage = cprofile_stage
+        self.cprofile_path = cprofile_path
+        self.trace_memory = trace_memory
+        self.records = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+
+    def run(self, func, df, *args, **kwargs):
+        """Call func(df, ...) and append its record"""
+        name = func.__name__
+        rows = len(df)
+        rss_before = _peak_rss_bytes()
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            mem_before, _ = tracemalloc.get_traced_memory()
+
+        profile = cProfile.Profile() if name == self.cprofile_stage else None
+        start = time.perf_counter()
+        if profile is not None:
+            result = profile.runcall(func, df, *args, **kwargs)
+        else:
+            result = func(df, *args, **kwargs)
+        wall_time = time.perf_counter() - start
+
+        record = {
+            'stage': name,
+            'rows': rows,
+            'wall_time_s': round(wall_time, 6),
+            'rows_per_s': round(rows / wall_time, 1) if wall_time > 0 else None
+        }
+        if self.trace_memory:
+            mem_after, mem_peak = tracemalloc.get_traced_memory()
+            record['bytes_allocated'] = mem_peak - mem_before
+            record['bytes_retained'] = mem_after - mem_before
+        rss_after = _peak_rss_bytes()
+        record['peak_rss_delta_bytes'] = rss_after - rss_before if rss_before is not None else None
+
+        if profile is not None and self.cprofile_path:
+            profile.dump_stats(self.cprofile_path)
+            record['pstats_path'] = self.cprofile_path
+
+        self.records.append(record)
+        return result
+
+    def report(self, **run_info):
+        """Run report as a JSON-serializable dict"""
+        return {
+            'started_at': self.started_at,
+            'total_wall_time_s': round(time.perf_counter() - self._start, 6),
+            **run_info,
+            'stages': self.records
+        }
+
+    def write_report(self, path, **run_info):
+        """Write the run report as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.report(**run_info), f, indent=2)
+
+@contextmanager
+def profiling(enabled=True, **kwargs):
+    """Activate a StageProfiler for the duration of the block (yields None when disabled)"""
+    global _active
+    if not enabled:
+        yield None
+        return
+
+    profiler = StageProfiler(**kwargs)
+    started_tracing = profiler.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        if started_tracing:
+            tracemalloc.stop()
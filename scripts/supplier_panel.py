@@ -0,0 +1,151 @@
+"""
+Supplier Panel - Long-Format Shares and HHI over N Partners
+===========================================================
+The wide master schema has one us_import_<partner> column per supplier
+plus the world total. This module works on the long form of the same data:
+
+    importer | partner | hs_code | date | value
+
+one row per supplier flow. Shares and the Herfindahl-Hirschman index are
+computed for any number of partners with flat NumPy group sums (np.bincount
+over integer group ids), so the cost is linear in the number of rows and
+independent of the partner count. With categorical keys and an int32
+hs_code a row takes 16 bytes, so 200 partners × 5k products × 80 quarters
+(80M rows) fit in ~1.3 GB.
+
+A supplier table must be complete: the values of each (importer, hs_code,
+date) group add up to the importer's total imports. wide_to_long adds the
+residual (world minus the listed partners) as partner 'other' to make it so.
+wide_view turns the result back into the wide share/HHI columns used by
+compute_trade_indices.py and trade_risk_assistant.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+LONG_COLUMNS = ['importer', 'partner', 'hs_code', 'date', 'value']
+GROUP_KEYS = ['importer', 'hs_code', 'date']
+
+# Partner name of the world-minus-listed-partners residual
+RESIDUAL_PARTNER = 'other'
+
+def partner_columns(df, importer='us'):
+    """Partners with a {importer}_import_<partner> column in a wide frame"""
+    prefix = f'{importer}_import_'
+    return [col[len(prefix):] for col in df.columns
+            if col.startswith(prefix) and col != f'{prefix}world' and not col.endswith('_growth')]
+
+def wide_to_long(df, importer='us', partners=None, residual=True):
+    """Long supplier table from wide {importer}_import_<partner> columns
+
+    partners defaults to every partner column present. With residual=True the
+    difference between {importer}_import_world and the listed partners is
+    added as partner RESIDUAL_PARTNER (clipped at zero). Keys are categoricals.
+    """
+    partners = partner_columns(df, importer) if partners is None else list(partners)
+    n_rows = len(df)
+
+    values = [df[f'{importer}_import_{p}'].to_numpy(dtype=float) for p in partners]
+    names = list(partners)
+    if residual:
+        world = df[f'{importer}_import_world'].to_numpy(dtype=float)
+        values.append(np.clip(world - np.sum(values, axis=0), 0, None) if values else world)
+        names.append(RESIDUAL_PARTNER)
+
+    return pd.DataFrame({
+        'importer': pd.Categorical.from_codes(np.zeros(n_rows * len(names), dtype=np.int8), [importer]),
+        'partner': pd.Categorical.from_codes(np.repeat(np.arange(len(names), dtype=np.int16), n_rows), names),
+        'hs_code': np.tile(df['hs_code'].to_numpy(), len(names)),
+        'date': pd.Categorical(np.tile(df['date'].to_numpy(), len(names))),
+        'value': np.concatenate(values) if values else np.empty(0)
+    })
+
+def _codes(series):
+    """(integer codes, uniques) of a key column; categoricals reuse their codes"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, uniques
+
+def group_ids(long, keys=GROUP_KEYS):
+    """Dense group id per row of long and a frame with each group's keys"""
+    gid = np.zeros(len(long), dtype=np.int64)
+    levels = []
+    for key in keys:
+        codes, uniques = _codes(long[key])
+        gid = gid * len(uniques) + codes
+        levels.append(uniques)
+
+    # Compact the (mixed-radix) key space to the groups that occur: a
+    # bincount over the key space when it is small, a sort otherwise
+    space = int(np.prod([len(uniques) for uniques in levels]))
+    if space <= 4 * len(gid) + 1024:
+        present = np.bincount(gid, minlength=space) > 0
+        occupied = np.flatnonzero(present)
+        gid = (np.cumsum(present) - 1)[gid]
+    else:
+        occupied, gid = np.unique(gid, return_inverse=True)
+    group_keys = {}
+    for key, uniques in zip(reversed(keys), reversed(levels)):
+        occupied, code = np.divmod(occupied, len(uniques))
+        group_keys[key] = uniques.take(code)
+    return gid, pd.DataFrame({key: group_keys[key] for key in keys})
+
+def compute_partner_shares(long):
+    """Add each partner's share (percent) of its (importer, hs_code, date) total"""
+    gid, _ = group_ids(long)
+    totals = np.bincount(gid, weights=long['value'].to_numpy(dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = long['value'].to_numpy(dtype=float) / totals[gid] * 100
+    long = long.copy()
+    long['share'] = share
+    return long
+
+def compute_supplier_hhi(long):
+    """HHI (0-1, sum of squared shares), supplier count and largest share per group
+
+    Returns one row per (importer, hs_code, date) with columns hhi,
+    n_suppliers (partners with a positive flow) and top_share (percent).
+    Groups with zero total imports get NaN.
+    """
+    gid, groups = group_ids(long)
+    value = long['value'].to_numpy(dtype=float)
+    n_groups = len(groups)
+
+    totals = np.bincount(gid, weights=value, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = value / totals[gid]
+        groups['hhi'] = np.bincount(gid, weights=fraction ** 2, minlength=n_groups)
+        groups.loc[totals == 0, 'hhi'] = np.nan
+    groups['n_suppliers'] = np.bincount(gid, weights=value > 0, minlength=n_groups).astype(np.int32)
+    groups['top_share'] = pd.Series(fraction * 100).groupby(gid).max().to_numpy()
+    return groups
+
+def wide_view(long, importer='us', partners=('china', 'india')):
+    """Wide share / HHI columns for one importer, keyed by hs_code and date
+
+    Produces <partner>_share_<importer> for the listed partners (rounded like
+    compute_market_shares), other_share_<importer> for all remaining
+    suppliers combined, and hhi_<importer>_imports over every partner.
+    """
+    if (long['importer'] != importer).any():
+        long = long[long['importer'] == importer]
+    gid, view = group_ids(long, ['hs_code', 'date'])
+    value = long['value'].to_numpy(dtype=float)
+
+    totals = np.bincount(gid, weights=value, minlength=len(view))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = value / totals[gid] * 100
+        hhi = np.bincount(gid, weights=(share / 100) ** 2, minlength=len(view))
+    hhi[totals == 0] = np.nan
+
+    listed = np.zeros(len(view))
+    for partner in partners:
+        col = np.zeros(len(view))
+        mask = (long['partner'] == partner).to_numpy()
+        col[gid[mask]] = share[mask]
+        view[f'{partner}_share_{importer}'] = col.round(2)
+        listed += view[f'{partner}_share_{importer}'].to_numpy()
+    view[f'other_share_{importer}'] = (100 - listed).round(2)
+    view[f'hhi_{importer}_imports'] = hhi.round(4)
+    return view
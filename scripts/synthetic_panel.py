@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Synthetic Panel - Trade Panels in the Master Data Schema
+========================================================
+Generates HS × quarter panels with the columns of
+master_data_us_china_india.csv (date, hs_code, product_name, us_import_*,
+*_export_world) for benchmarks and scale tests.
+
+Each product gets a log-normal size, a drifting quarterly random walk with
+seasonality and Dirichlet-distributed partner shares of US imports, so
+shares and concentration look like real Comtrade data rather than uniform
+noise. Realistic irregularities are included:
+    - whole (product, partner) series that are zero (partner does not supply)
+    - sporadic zero quarters in partner flows
+    - gaps: missing product-quarters
+Partners beyond China and India add us_import_<partner> and
+<partner>_export_world columns after the master columns. Rows are sorted by
+(hs_code, date), so the output also works as --stream input.
+
+Usage:
+    python synthetic_panel.py --rows 100000 --output ../data/synthetic_100k.csv
+    python synthetic_panel.py --products 5000 --quarters 80 --partners 5 --output panel.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Supplier countries, in column order (the pipeline reads the first two)
+PARTNERS = ['china', 'india', 'vietnam', 'mexico', 'germany', 'japan', 'korea',
+            'taiwan', 'canada', 'thailand']
+
+def quarter_labels(n_quarters, start='2020-Q3'):
+    """Consecutive 'YYYY-Qn' labels beginning at start"""
+    year, quarter = start.split('-Q')
+    first = int(year) * 4 + int(quarter) - 1
+    return [f"{q // 4}-Q{q % 4 + 1}" for q in range(first, first + n_quarters)]
+
+def hs_codes(n_products, rng):
+    """Sorted unique HS codes (4-digit while they fit, 6-digit beyond)"""
+    low, high = (101, 10_000) if n_products <= 5_000 else (100_000, 1_000_000)
+    if n_products > high - low:
+        raise ValueError(f"At most {high - low} products supported")
+    return np.sort(rng.choice(np.arange(low, high), size=n_products, replace=False))
+
+def generate_panel(n_products=12, n_quarters=20, n_partners=2, zero_fraction=0.05,
+                   gap_fraction=0.02, start='2020-Q3', seed=0):
+    """Synthetic trade panel in the master data schema
+
+    zero_fraction: probability that a (product, partner) series is all zero,
+    and separately that a single partner quarter is zero. gap_fraction:
+    probability that a product-quarter row is missing (each product keeps
+    its first quarter). Flows are in thousands of USD, as in the master data.
+    """
+    if not 2 <= n_partners <= len(PARTNERS):
+        raise ValueError(f"n_partners must be between 2 and {len(PARTNERS)}")
+    rng = np.random.default_rng(seed)
+    partners = PARTNERS[:n_partners]
+    shape = (n_products, n_quarters)
+
+    # US imports from the world: product size × drifting seasonal random walk
+    size = rng.lognormal(mean=14.5, sigma=1.5, size=(n_products, 1))
+    drift = rng.normal(0.01, 0.03, size=(n_products, 1))
+    walk = np.cumsum(rng.normal(0, 0.08, size=shape) + drift, axis=1)
+    season = 0.05 * np.sin(np.arange(n_quarters) * np.pi / 2 + rng.uniform(0, 2 * np.pi, size=(n_products, 1)))
+    world = size * np.exp(walk + season)
+
+    # Partner shares (last slot is the rest of the world), jittered per quarter
+    shares = rng.dirichlet(np.full(n_partners + 1, 0.6), size=n_products)[:, None, :]
+    weights = shares * rng.lognormal(0, 0.15, size=shape + (n_partners + 1,))
+    weights[..., :n_partners] *= rng.random((n_products, 1, n_partners)) >= zero_fraction
+    weights[..., :n_partners] *= rng.random(shape + (n_partners,)) >= zero_fraction
+    imports = world[..., None] * weights / weights.sum(axis=2, keepdims=True)
+
+    # Partner exports to the world: the US takes a product-specific share
+    us_share = rng.beta(2, 8, size=(n_products, 1, n_partners))
+    exports = np.maximum(imports[..., :n_partners] / us_share,
+                         world[..., None] * rng.uniform(0.05, 0.5, size=(n_products, 1, n_partners)))
+
+    codes = hs_codes(n_products, rng)
+    columns = {
+        'date': np.tile(np.array(quarter_labels(n_quarters, start), dtype=object), n_products),
+        'hs_code': np.repeat(codes, n_quarters),
+        'product_name': np.repeat(np.array([f"Synthetic product {code}" for code in codes], dtype=object),
+                                  n_quarters),
+    }
+    for k, partner in enumerate(partners[:2]):
+        columns[f'us_import_{partner}'] = imports[..., k].ravel()
+    columns['us_import_world'] = world.ravel()
+    for k, partner in enumerate(partners[:2]):
+        columns[f'{partner}_export_world'] = exports[..., k].ravel()
+    for k, partner in enumerate(partners[2:], start=2):
+        columns[f'us_import_{partner}'] = imports[..., k].ravel()
+        columns[f'{partner}_export_world'] = exports[..., k].ravel()
+
+    df = pd.DataFrame(columns)
+    for col in df.columns[3:]:
+        # world and export flows stay positive so shares and ratios are defined
+        floor = 0 if col.startswith('us_import_') and col != 'us_import_world' else 1
+        df[col] = np.maximum(np.rint(df[col].to_numpy()), floor).astype(np.int64)
+
+    keep = rng.random(len(df)) >= gap_fraction
+    keep[::n_quarters] = True
+    return df[keep].reset_index(drop=True)
+
+def panel_for_rows(n_rows, n_quarters=20, **kwargs):
+    """Panel of about n_rows rows (n_rows // n_quarters products, minus gaps)"""
+    return generate_panel(n_products=max(1, n_rows // n_quarters), n_quarters=n_quarters, **kwargs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic trade panel in the master data schema")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--rows', type=int, help="Approximate row count (sets --products)")
+    size.add_argument('--products', type=int, default=12)
+    parser.add_argument('--quarters', type=int, default=20)
+    parser.add_argument('--partners', type=int, default=2,
+                        help=f"Supplier countries, 2-{len(PARTNERS)} ({', '.join(PARTNERS)})")
+    parser.add_argument('--zero-fraction', type=float, default=0.05)
+    parser.add_argument('--gap-fraction', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help="CSV path")
+    args = parser.parse_args()
+
+    options = dict(n_quarters=args.quarters, n_partners=args.partners, zero_fraction=args.zero_fraction,
+                   gap_fraction=args.gap_fraction, seed=args.seed)
+    if args.rows:
+        df = panel_for_rows(args.rows, **options)
+    else:
+        df = generate_panel(n_products=args.products, **options)
+
+    df.to_csv(args.output, index=False)
+    print(f"✓ Wrote {len(df):,} rows ({df['hs_code'].nunique():,} products × "
+          f"{df['date'].nunique()} quarters, {args.partners} partners) to {args.output}")
+
+if __name__ == "__main__":
+    main()
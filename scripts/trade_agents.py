@@ -0,0 +1,1069 @@
+"""
+Trade Agents - Data, Risk and Diversification Agents
+====================================================
+The three agents of the Trade Risk AI Assistant and the orchestrator that
+chains them, free of any Streamlit dependency so they run in batch jobs
+and worker processes as well as in the app:
+
+    DataRetrievalAgent            product-quarter context from the combined table
+    RiskAssessmentAgent           component scores, overall risk and narrative
+    StrategicDiversificationAgent sourcing strategies and expected outcomes
+    AgentOrchestrator             data -> risk -> recommendations for one product-quarter,
+                                  memoized in an optional LRUResultCache
+"""
+
+import pickle
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from classification import (
+    CONCENTRATION_BINS, RISK_BINS, DEPENDENCY_BINS, LIKELIHOOD_BINS, bin_codes, bin_index
+)
+from columnar_store import open_partitioned, read_partitioned
+from narrative import NarrativeProvider, TemplateNarrativeProvider
+from ntm_index import NTMIntervalIndex
+from product_snapshot import LatestSnapshot
+from result_cache import LRUResultCache, dataset_files, fingerprint
+
+# Columns read for a product's historical trend
+HISTORY_COLUMNS = ['date', 'china_share_us', 'india_share_us', 'geopolitical_risk_score']
+
+# Columns read by RiskAssessmentAgent.assess_risk_frame
+RISK_INPUT_COLUMNS = ['hhi_us_imports', 'china_share_us', 'ntm_count', 'ntm_severity',
+                      'china_trend', 'china_momentum']
+
+def python_round(values, decimals):
+    """Python's round(value, decimals) over an array
+    
+    np.round scales by 10**decimals first, which can push a value that is
+    just below a decimal tie (28.15 is stored as 28.149999...) over it. The
+    values within 1e-6 of a tie are rounded with round() instead.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if len(ties):
+        # Tie values repeat (e.g. weighted sums of a few scores): round each once
+        unique, inverse = np.unique(values[ties], return_inverse=True)
+        rounded[ties] = np.array([round(value, decimals) for value in unique.tolist()])[inverse]
+    return rounded
+
+def label_mask(values, label):
+    """values == label over an array or Series; categoricals compare codes"""
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        values = pd.Categorical(values)
+        position = values.categories.get_indexer([label])[0]
+        return values.codes == position if position >= 0 else np.zeros(len(values), dtype=bool)
+    return np.asarray(values, dtype=object) == label
+
+def is_degraded(analysis: Dict) -> bool:
+    """Whether an analysis carries a fallback narrative of a failed model call"""
+    return bool(analysis['risk_assessment'].get('narrative_degraded') or
+                analysis['diversification_recommendations'].get('summary_degraded'))
+
+# ============================================================================
+# AGENT 1: DATA RETRIEVAL AGENT
+# ============================================================================
+
+class DataRetrievalAgent:
+    """Agent responsible for fetching and contextualizing trade data
+    
+    With a Parquet `dataset`, df only needs SUMMARY_COLUMNS; product rows are
+    read on demand with hs_code / quarter predicates pushed down to the files.
+    The dataset's files are listed once, on the first read, not per lookup.
+    With an `ntm_index`, the NTM data lists the measures in force in the
+    selected quarter and the changes since the previous one.
+    
+    df is indexed once at construction: its columns are kept as arrays
+    sorted by (hs_code, date), so each product is a contiguous slice and
+    each product-quarter a row offset. Lookups are dict hits and views.
+    """
+    
+    def __init__(self, df: pd.DataFrame, dataset: Optional[str] = None,
+                 ntm_index: Optional[NTMIntervalIndex] = None):
+        self.df = df
+        self.dataset = dataset
+        self.ntm_index = ntm_index
+        self.name = "📊 Data Retrieval Agent"
+        self._snapshot = None
+        self._partitioned = None
+        self._build_index()
+    
+    def _build_index(self):
+        """Column arrays sorted by (hs_code, date), product slices and row offsets"""
+        ordered = self.df.sort_values(['hs_code', 'date'], kind='stable')
+        self._columns = {col: ordered[col].to_numpy() for col in ordered.columns}
+        
+        hs_codes = self._columns['hs_code'].astype(str)
+        dates = self._columns['date']
+        starts = np.flatnonzero(np.r_[True, hs_codes[1:] != hs_codes[:-1]]) if len(hs_codes) else []
+        stops = np.r_[starts[1:], len(hs_codes)] if len(hs_codes) else []
+        self._products = {hs_codes[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+        
+        # First row of each (hs_code, date), like the boolean mask + iloc[0] it replaces
+        # (built back to front so earlier rows win)
+        keys = list(zip(hs_codes.tolist(), dates.tolist()))
+        self._rows = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+    
+    def get_quarters(self, hs_code: str) -> np.ndarray:
+        """Quarters of one product in ascending order (a view, empty if unknown)"""
+        rows = self._products.get(str(hs_code), slice(0, 0))
+        return self._columns['date'][rows]
+    
+    def get_product_name(self, hs_code: str) -> str:
+        """Product name of an HS code ('' if unknown)"""
+        rows = self._products.get(str(hs_code))
+        return self._columns['product_name'][rows.start] if rows is not None else ''
+    
+    def version(self) -> str:
+        """Fingerprint of the data behind the answers (table, dataset files, NTM index)"""
+        columns = sorted(self._columns)
+        parts = [columns] + [self._columns[col] for col in columns]
+        if self.dataset is not None:
+            parts.append(dataset_files(self.dataset))
+        if self.ntm_index is not None:
+            index = self.ntm_index
+            parts += [index.start_keys, index.start_days, index.end_days, index.codes]
+        return fingerprint(*parts)
+    
+    def partitioned(self):
+        """The Parquet dataset, discovered on first use"""
+        if self._partitioned is None:
+            self._partitioned = open_partitioned(self.dataset)
+        return self._partitioned
+    
+    def product_history(self, hs_code: str) -> Dict[str, np.ndarray]:
+        """HISTORY_COLUMNS of all quarters of one product, in date order"""
+        if self.dataset is not None:
+            history = read_partitioned(self.partitioned(), columns=HISTORY_COLUMNS, hs_code=hs_code)
+            history = history.sort_values('date')
+            return {col: history[col].to_numpy() for col in HISTORY_COLUMNS}
+        rows = self._products.get(str(hs_code), slice(0, 0))
+        return {col: self._columns[col][rows] for col in HISTORY_COLUMNS}
+    
+    def product_row(self, hs_code: str, quarter: str) -> Optional[Dict]:
+        """Full record of one product-quarter (None if missing)"""
+        if self.dataset is not None:
+            rows = read_partitioned(self.partitioned(), hs_code=hs_code, quarter=quarter)
+            return rows.iloc[0].to_dict() if len(rows) else None
+        row = self._rows.get((str(hs_code), quarter))
+        if row is None:
+            return None
+        # Native Python scalars, as DataFrame.to_dict returns
+        record = {col: values[row] for col, values in self._columns.items()}
+        return {col: value.item() if isinstance(value, np.generic) else value
+                for col, value in record.items()}
+    
+    def active_measures(self, hs_code: str, quarter: str, quarters: List[str]) -> Dict:
+        """Measures in force in the quarter and changes since the previous quarter"""
+        active = self.ntm_index.active(hs_code, quarter)
+        result = {
+            "active_measures": [
+                {"ntm_code": row.ntm_code, "measure": int(row.measure),
+                 "in_force_since": row.start.date().isoformat() if pd.notna(row.start) else None}
+                for row in active.itertuples()
+            ]
+        }
+        earlier = [q for q in quarters if q < quarter]
+        if earlier:
+            changes = self.ntm_index.changes(hs_code, max(earlier), quarter)
+            result["added_since_previous_quarter"] = changes['added']['ntm_code'].tolist()
+            result["removed_since_previous_quarter"] = changes['removed']['ntm_code'].tolist()
+        return result
+    
+    def get_product_data(self, hs_code: str, quarter: Optional[str] = None) -> Dict:
+        """Retrieve data for specific product and quarter"""
+        
+        # Product's quarters, in date order
+        product_data = self.product_history(hs_code)
+        
+        if not len(product_data['date']):
+            return {"error": f"No data found for HS code {hs_code}"}
+        
+        # Get latest quarter if not specified
+        if quarter is None:
+            quarter = product_data['date'][-1]
+        
+        # Get specific quarter data
+        latest = self.product_row(hs_code, quarter)
+        
+        if latest is None:
+            return {"error": f"No data found for HS code {hs_code} in {quarter}"}
+        
+        measures = (self.active_measures(hs_code, quarter, product_data['date'].tolist())
+                    if self.ntm_index is not None else {})
+        return self.build_context(hs_code, quarter, latest, product_data, measures)
+    
+    def build_context(self, hs_code: str, quarter: str, latest: Dict,
+                      product_data: Dict[str, np.ndarray], measures: Dict) -> Dict:
+        """Data context from a product's record, history and point-in-time measures"""
+        
+        # Calculate historical trends (last 4 quarters)
+        recent = {col: values[-4:] for col, values in product_data.items()}
+        
+        context = {
+            "hs_code": hs_code,
+            "product_name": latest['product_name'],
+            "quarter": quarter,
+            "current_metrics": {
+                "china_share": round(latest['china_share_us'], 2),
+                "india_share": round(latest['india_share_us'], 2),
+                "other_share": round(latest['other_share_us'], 2),
+                "china_dependency_risk": round(latest['china_dependency_risk'], 2),
+                "geopolitical_risk_score": round(latest['geopolitical_risk_score'], 2),
+                "risk_level": latest['risk_level'],
+                "hhi": round(latest['hhi_us_imports'], 4),
+                "concentration_level": latest['concentration_level'],
+                "diversification_score": round(latest['diversification_score'], 4)
+            },
+            "trade_indicators": {
+                "china_rca": round(latest['china_rca'], 2),
+                "india_rca": round(latest['india_rca'], 2),
+                "rca_advantage": latest['rca_advantage'],
+                "trade_intensity_china": round(latest['trade_intensity_china'], 2),
+                "trade_intensity_india": round(latest['trade_intensity_india'], 2),
+                "india_opportunity_score": round(latest['india_opportunity_score'], 2)
+            },
+            "trends": {
+                "china_trend": latest['china_trend'],
+                "india_trend": latest['india_trend'],
+                "china_momentum": round(latest['china_momentum'], 2) if pd.notna(latest['china_momentum']) else 0,
+                "india_momentum": round(latest['india_momentum'], 2) if pd.notna(latest['india_momentum']) else 0,
+                "china_share_ma4": round(latest['china_share_ma4'], 2),
+                "india_share_ma4": round(latest['india_share_ma4'], 2)
+            },
+            "ntm_data": {
+                "ntm_count": int(latest['ntm_count']),
+                "ntm_severity": latest['ntm_severity'],
+                "has_sps": bool(latest['has_sps']),
+                "has_tbt": bool(latest['has_tbt']),
+                "has_export_restriction": bool(latest['has_export_restriction']),
+                "technical_measures": int(latest['technical_measure_count']),
+                "non_technical_measures": int(latest['non_technical_count']),
+                "ntm_codes": latest['ntm_codes'] if latest['ntm_codes'] else "None",
+                **measures
+            },
+            "trade_values": {
+                "us_import_china": int(latest['us_import_china']),
+                "us_import_india": int(latest['us_import_india']),
+                "us_import_world": int(latest['us_import_world'])
+            },
+            "historical_trend": {
+                "quarters": recent['date'].tolist(),
+                "china_shares": np.round(recent['china_share_us'].astype(float), 2).tolist(),
+                "india_shares": np.round(recent['india_share_us'].astype(float), 2).tolist(),
+                "risk_scores": np.round(recent['geopolitical_risk_score'].astype(float), 2).tolist()
+            }
+        }
+        
+        return context
+    
+    @property
+    def snapshot(self) -> LatestSnapshot:
+        """Latest-quarter view of every product, built on first use"""
+        if self._snapshot is None:
+            self._snapshot = LatestSnapshot(self.df)
+        return self._snapshot
+    
+    def append_quarters(self, rows: pd.DataFrame):
+        """Add newly arrived rows (in dataset mode they must also be in the dataset)"""
+        self.df = pd.concat([self.df, rows], ignore_index=True)
+        self._partitioned = None  # rediscover the files the new rows were written to
+        self._build_index()
+        if self._snapshot is not None:
+            self._snapshot.refresh(rows, self.df)
+    
+    def get_all_products_summary(self) -> pd.DataFrame:
+        """Get summary of all products (latest quarter, highest risk first; read-only)"""
+        return self.snapshot.summary
+    
+    def get_top_products(self, view: str, n: int = 5) -> pd.DataFrame:
+        """Top n products by risk ('risk') or India opportunity ('opportunity')"""
+        return self.snapshot.top(view, n)
+
+# ============================================================================
+# AGENT 2: RISK ASSESSMENT AGENT
+# ============================================================================
+
+class RiskAssessmentAgent:
+    """Agent responsible for analyzing and assessing trade risks"""
+    
+    # Outcomes per bin, indexed by the shared classification tables
+    CONCENTRATION_OUTCOMES = [
+        (30, "LOW", "Well-diversified market structure"),
+        (60, "MEDIUM", "Moderately concentrated - diversification needed"),
+        (90, "HIGH", "Highly concentrated market - limited alternatives available")
+    ]
+    DEPENDENCY_OUTCOMES = [
+        (20, "LOW", "Low China dependency ({china_share}%)"),
+        (50, "MEDIUM", "Moderate China exposure ({china_share}%)"),
+        (80, "HIGH", "High dependency on China ({china_share}%)"),
+        (95, "CRITICAL", "Critical dependency on China ({china_share}%)")
+    ]
+    RISK_OUTCOMES = [
+        ("LOW", "STABLE"),
+        ("MEDIUM", "MONITOR"),
+        ("HIGH", "URGENT")
+    ]
+    LIKELIHOOD_OUTCOMES = [
+        {"score": 3, "label": "Low (2-4/10)"},
+        {"score": 6, "label": "Medium (5-6/10)"},
+        {"score": 8, "label": "High (7-8/10)"}
+    ]
+    IMPACT_OUTCOMES = [
+        {"score": 3, "label": "Low (2-3/10)"},
+        {"score": 5, "label": "Medium (4-5/10)"},
+        {"score": 7, "label": "High (6-7/10)"},
+        {"score": 9, "label": "Critical (8-9/10)"}
+    ]
+    # (score, level) of the NTM and trend ladders, lowest first (array kernel)
+    NTM_OUTCOMES = [(10, "MINIMAL"), (30, "LOW"), (55, "MEDIUM"), (80, "HIGH")]
+    TREND_OUTCOMES = [(20, "IMPROVING"), (35, "STABLE"), (50, "CONCERN"), (70, "WORSENING")]
+    
+    # Weights of the component scores in the overall risk score
+    COMPONENT_WEIGHTS = {
+        "concentration": 0.3,
+        "dependency": 0.3,
+        "ntm_impact": 0.25,
+        "trend": 0.15
+    }
+    
+    def __init__(self, concentration_bins: Dict = CONCENTRATION_BINS,
+                 dependency_bins: Dict = DEPENDENCY_BINS,
+                 risk_bins: Dict = RISK_BINS,
+                 likelihood_bins: Dict = LIKELIHOOD_BINS,
+                 narrative_provider: Optional[NarrativeProvider] = None):
+        self.name = "⚠️ Risk Assessment Agent"
+        self.narrative_provider = narrative_provider or TemplateNarrativeProvider()
+        self.concentration_bins = concentration_bins
+        self.dependency_bins = dependency_bins
+        self.risk_bins = risk_bins
+        self.likelihood_bins = likelihood_bins
+    
+    def assess_risk(self, data_context: Dict) -> Dict:
+        """Perform comprehensive risk assessment"""
+        
+        current = data_context['current_metrics']
+        ntm = data_context['ntm_data']
+        trends = data_context['trends']
+        
+        # Calculate risk components
+        concentration_risk = self._assess_concentration(current)
+        dependency_risk = self._assess_dependency(current)
+        ntm_risk = self._assess_ntm_impact(ntm)
+        trend_risk = self._assess_trends(trends)
+        
+        # Overall risk calculation
+        weights = self.COMPONENT_WEIGHTS
+        overall_risk_score = (
+            concentration_risk['score'] * weights['concentration'] +
+            dependency_risk['score'] * weights['dependency'] +
+            ntm_risk['score'] * weights['ntm_impact'] +
+            trend_risk['score'] * weights['trend']
+        )
+        
+        # Determine risk level
+        risk_level, urgency = self.RISK_OUTCOMES[bin_index(overall_risk_score, self.risk_bins)]
+        
+        # Generate narrative
+        vulnerabilities = self._identify_vulnerabilities(
+            concentration_risk, dependency_risk, ntm_risk, trend_risk
+        )
+        
+        key_drivers = self._identify_key_drivers(
+            current, ntm, trends
+        )
+        narrative, degraded = self._generate_narrative(
+            data_context, risk_level, overall_risk_score, vulnerabilities, key_drivers
+        )
+        
+        assessment = {
+            "overall_risk_level": risk_level,
+            "overall_risk_score": round(overall_risk_score, 1),
+            "urgency": urgency,
+            "risk_components": {
+                "concentration": concentration_risk,
+                "dependency": dependency_risk,
+                "ntm_impact": ntm_risk,
+                "trend": trend_risk
+            },
+            "vulnerabilities": vulnerabilities,
+            "key_drivers": key_drivers,
+            "disruption_likelihood": self._calculate_disruption_likelihood(overall_risk_score),
+            "disruption_impact": self._calculate_disruption_impact(current, ntm),
+            "narrative": narrative
+        }
+        if degraded:
+            # Fallback text of a failed model call (not to be cached)
+            assessment["narrative_degraded"] = True
+        
+        return assessment
+    
+    def assess_risk_columns(self, hhi, china_share, ntm_count, ntm_severity,
+                            china_trend, china_momentum) -> pd.DataFrame:
+        """Score many product-quarters at once (array form of assess_risk)
+        
+        Takes raw columns (hhi_us_imports, china_share_us, ntm_count,
+        ntm_severity, china_trend, china_momentum) and rounds them like
+        DataRetrievalAgent does, so every row gets the scores, levels,
+        overall score, urgency and disruption likelihood / impact that
+        assess_risk gives for its data context. Levels are categoricals.
+        """
+        hhi = python_round(hhi, 4)
+        china_share = python_round(china_share, 2)
+        momentum = np.nan_to_num(python_round(china_momentum, 2), nan=0.0)
+        count = np.asarray(ntm_count, dtype=float)
+        
+        concentration = bin_codes(hhi, self.concentration_bins)
+        dependency = bin_codes(china_share, self.dependency_bins)
+        
+        # The if/elif ladders as first-match selects over outcome codes
+        ntm = np.select(
+            [label_mask(ntm_severity, "HIGH") | (count >= 30),
+             label_mask(ntm_severity, "MEDIUM") | (count >= 15),
+             count > 0],
+            [3, 2, 1], default=0)
+        increasing = label_mask(china_trend, "INCREASING")
+        trend = np.select(
+            [increasing & (momentum > 3), increasing,
+             label_mask(china_trend, "DECREASING") & (momentum < -3)],
+            [3, 2, 0], default=1)
+        
+        def scores(outcomes, codes):
+            return np.array([outcome[0] for outcome in outcomes])[codes]
+        
+        def levels(labels, codes):
+            return pd.Categorical.from_codes(codes, labels)
+        
+        weights = self.COMPONENT_WEIGHTS
+        overall = (
+            scores(self.CONCENTRATION_OUTCOMES, concentration) * weights['concentration'] +
+            scores(self.DEPENDENCY_OUTCOMES, dependency) * weights['dependency'] +
+            scores(self.NTM_OUTCOMES, ntm) * weights['ntm_impact'] +
+            scores(self.TREND_OUTCOMES, trend) * weights['trend']
+        )
+        risk = bin_codes(overall, self.risk_bins)
+        likelihood = bin_codes(overall, self.likelihood_bins)
+        
+        return pd.DataFrame({
+            "concentration_score": scores(self.CONCENTRATION_OUTCOMES, concentration),
+            "concentration_level": levels([o[1] for o in self.CONCENTRATION_OUTCOMES], concentration),
+            "dependency_score": scores(self.DEPENDENCY_OUTCOMES, dependency),
+            "dependency_level": levels([o[1] for o in self.DEPENDENCY_OUTCOMES], dependency),
+            "ntm_impact_score": scores(self.NTM_OUTCOMES, ntm),
+            "ntm_impact_level": levels([o[1] for o in self.NTM_OUTCOMES], ntm),
+            "trend_score": scores(self.TREND_OUTCOMES, trend),
+            "trend_level": levels([o[1] for o in self.TREND_OUTCOMES], trend),
+            "overall_risk_score": python_round(overall, 1),
+            "overall_risk_level": levels([o[0] for o in self.RISK_OUTCOMES], risk),
+            "urgency": levels([o[1] for o in self.RISK_OUTCOMES], risk),
+            "likelihood_score": np.array([o["score"] for o in self.LIKELIHOOD_OUTCOMES])[likelihood],
+            "impact_score": np.array([o["score"] for o in self.IMPACT_OUTCOMES])[dependency]
+        })
+    
+    def assess_risk_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """assess_risk_columns over the RISK_INPUT_COLUMNS of a frame (same index)"""
+        result = self.assess_risk_columns(*(df[col] for col in RISK_INPUT_COLUMNS))
+        result.index = df.index
+        return result
+    
+    def _assess_concentration(self, current: Dict) -> Dict:
+        """Assess market concentration risk"""
+        hhi = current['hhi']
+        
+        score, level, desc = self.CONCENTRATION_OUTCOMES[bin_index(hhi, self.concentration_bins)]
+        
+        return {
+            "score": score,
+            "level": level,
+            "description": desc,
+            "hhi_value": hhi
+        }
+    
+    def _assess_dependency(self, current: Dict) -> Dict:
+        """Assess China dependency risk"""
+        china_share = current['china_share']
+        
+        score, level, desc = self.DEPENDENCY_OUTCOMES[bin_index(china_share, self.dependency_bins)]
+        desc = desc.format(china_share=china_share)
+        
+        return {
+            "score": score,
+            "level": level,
+            "description": desc,
+            "china_share": china_share
+        }
+    
+    def _assess_ntm_impact(self, ntm: Dict) -> Dict:
+        """Assess NTM-related risks"""
+        count = ntm['ntm_count']
+        severity = ntm['ntm_severity']
+        
+        if severity == "HIGH" or count >= 30:
+            score = 80
+            level = "HIGH"
+            desc = f"{count} NTMs with {severity} severity - significant compliance burden"
+        elif severity == "MEDIUM" or count >= 15:
+            score = 55
+            level = "MEDIUM"
+            desc = f"{count} NTMs with {severity} severity - moderate barriers"
+        elif count > 0:
+            score = 30
+            level = "LOW"
+            desc = f"{count} NTMs - manageable compliance requirements"
+        else:
+            score = 10
+            level = "MINIMAL"
+            desc = "No significant NTM barriers"
+        
+        return {
+            "score": score,
+            "level": level,
+            "description": desc,
+            "ntm_count": count,
+            "has_sps": ntm['has_sps'],
+            "has_tbt": ntm['has_tbt']
+        }
+    
+    def _assess_trends(self, trends: Dict) -> Dict:
+        """Assess trend-based risks"""
+        china_trend = trends['china_trend']
+        momentum = trends['china_momentum']
+        
+        if china_trend == "INCREASING" and momentum > 3:
+            score = 70
+            level = "WORSENING"
+            desc = f"China share increasing rapidly (+{momentum}%)"
+        elif china_trend == "INCREASING":
+            score = 50
+            level = "CONCERN"
+            desc = "China share trending upward"
+        elif china_trend == "DECREASING" and momentum < -3:
+            score = 20
+            level = "IMPROVING"
+            desc = f"China share declining ({momentum}%)"
+        else:
+            score = 35
+            level = "STABLE"
+            desc = "Trade patterns relatively stable"
+        
+        return {
+            "score": score,
+            "level": level,
+            "description": desc,
+            "trend": china_trend,
+            "momentum": momentum
+        }
+    
+    def _identify_vulnerabilities(self, conc, dep, ntm, trend) -> List[str]:
+        """Identify key vulnerabilities"""
+        vulns = []
+        
+        if dep['level'] in ["CRITICAL", "HIGH"]:
+            vulns.append(f"🔴 {dep['description']}")
+        
+        if conc['level'] == "HIGH":
+            vulns.append(f"🔴 {conc['description']}")
+        
+        if ntm['level'] in ["HIGH", "MEDIUM"]:
+            vulns.append(f"🟡 {ntm['description']}")
+        
+        if trend['level'] in ["WORSENING", "CONCERN"]:
+            vulns.append(f"⚠️ {trend['description']}")
+        
+        return vulns if vulns else ["✅ No critical vulnerabilities identified"]
+    
+    def _identify_key_drivers(self, current, ntm, trends) -> List[str]:
+        """Identify key risk drivers"""
+        drivers = []
+        
+        if current['china_share'] > 50:
+            drivers.append("Concentration on single supplier (China)")
+        
+        if ntm['ntm_count'] > 20:
+            drivers.append(f"High regulatory burden ({ntm['ntm_count']} NTMs)")
+        
+        if ntm['has_tbt'] and ntm['has_sps']:
+            drivers.append("Multiple technical barriers (SPS + TBT)")
+        
+        if trends['china_trend'] == "INCREASING":
+            drivers.append("Increasing China market share trend")
+        
+        if current['hhi'] > 0.25:
+            drivers.append("Limited supplier diversification")
+        
+        return drivers if drivers else ["Diversified, stable market conditions"]
+    
+    def _calculate_disruption_likelihood(self, risk_score: float) -> Dict:
+        """Calculate likelihood of trade disruption"""
+        return dict(self.LIKELIHOOD_OUTCOMES[bin_index(risk_score, self.likelihood_bins)])
+    
+    def _calculate_disruption_impact(self, current, ntm) -> Dict:
+        """Calculate impact if disruption occurs"""
+        china_share = current['china_share']
+        
+        return dict(self.IMPACT_OUTCOMES[bin_index(china_share, self.dependency_bins)])
+    
+    def _generate_narrative(self, data_context, level, score, vulns, drivers) -> Tuple[str, bool]:
+        """Generate human-readable risk narrative: (text, degraded)"""
+        facts = {"level": level, "score": score, "vulnerabilities": vulns, "key_drivers": drivers}
+        return self.narrative_provider.narrate_marked('risk', data_context, facts)
+
+# ============================================================================
+# AGENT 3: STRATEGIC DIVERSIFICATION AGENT
+# ============================================================================
+
+class StrategicDiversificationAgent:
+    """Agent responsible for recommending diversification strategies"""
+    
+    def __init__(self, narrative_provider: Optional[NarrativeProvider] = None):
+        self.name = "🌐 Strategic Diversification Agent"
+        self.narrative_provider = narrative_provider or TemplateNarrativeProvider()
+    
+    def generate_recommendations(self, data_context: Dict, risk_assessment: Dict) -> Dict:
+        """Generate strategic diversification recommendations"""
+        
+        current = data_context['current_metrics']
+        indicators = data_context['trade_indicators']
+        risk_level = risk_assessment['overall_risk_level']
+        
+        # Analyze India opportunity
+        india_analysis = self._analyze_india_opportunity(current, indicators)
+        
+        # Analyze other opportunities
+        other_opportunities = self._identify_other_opportunities(current, indicators)
+        
+        # Generate prioritized strategies
+        strategies = self._prioritize_strategies(
+            india_analysis, other_opportunities, risk_level, current
+        )
+        
+        # Calculate expected outcomes
+        outcomes = self._calculate_expected_outcomes(strategies, current)
+        
+        # Implementation roadmap
+        roadmap = self._create_implementation_roadmap(strategies, risk_level)
+        summary, degraded = self._generate_summary(data_context, strategies, outcomes, risk_level)
+        
+        recommendations = {
+            "primary_recommendation": strategies[0] if strategies else None,
+            "all_strategies": strategies,
+            "india_opportunity": india_analysis,
+            "other_opportunities": other_opportunities,
+            "expected_outcomes": outcomes,
+            "implementation_roadmap": roadmap,
+            "timeline": self._estimate_timeline(risk_level),
+            "summary": summary
+        }
+        if degraded:
+            recommendations["summary_degraded"] = True
+        
+        return recommendations
+    
+    def _analyze_india_opportunity(self, current: Dict, indicators: Dict) -> Dict:
+        """Analyze India as diversification target"""
+        
+        india_share = current['india_share']
+        india_rca = indicators['india_rca']
+        opportunity_score = indicators['india_opportunity_score']
+        
+        # Determine feasibility
+        if india_rca > 1.5 and opportunity_score > 60:
+            feasibility = "HIGH"
+            priority = 1
+            rationale = f"India has strong comparative advantage (RCA: {india_rca}) and high opportunity score ({opportunity_score})"
+        elif india_rca > 1 and opportunity_score > 40:
+            feasibility = "MEDIUM"
+            priority = 2
+            rationale = f"India has moderate advantage (RCA: {india_rca}) with decent opportunity ({opportunity_score})"
+        else:
+            feasibility = "LOW"
+            priority = 3
+            rationale = f"Limited India advantage (RCA: {india_rca}), opportunity score: {opportunity_score}"
+        
+        # Calculate target share
+        current_india = india_share
+        china_share = current['china_share']
+        
+        if feasibility == "HIGH":
+            target_india_share = min(current_india + 15, 40)
+        elif feasibility == "MEDIUM":
+            target_india_share = min(current_india + 10, 30)
+        else:
+            target_india_share = min(current_india + 5, 20)
+        
+        return {
+            "feasibility": feasibility,
+            "priority": priority,
+            "current_share": round(current_india, 1),
+            "target_share": round(target_india_share, 1),
+            "increase": round(target_india_share - current_india, 1),
+            "india_rca": round(india_rca, 2),
+            "opportunity_score": round(opportunity_score, 1),
+            "rationale": rationale,
+            "barriers": self._identify_india_barriers(indicators, current),
+            "advantages": self._identify_india_advantages(india_rca, opportunity_score)
+        }
+    
+    def _identify_india_barriers(self, indicators, current) -> List[str]:
+        """Identify barriers to India diversification"""
+        barriers = []
+        
+        if indicators['india_rca'] < 1:
+            barriers.append("Lower comparative advantage vs global competitors")
+        
+        if current['india_share'] < 5:
+            barriers.append("Currently low market presence - needs supplier development")
+        
+        # Could add NTM barriers if we had India-specific NTMs
+        barriers.append("Compliance with US import regulations")
+        
+        return barriers if barriers else ["Minimal barriers identified"]
+    
+    def _identify_india_advantages(self, rca, opp_score) -> List[str]:
+        """Identify India's advantages"""
+        advantages = []
+        
+        if rca > 1.5:
+            advantages.append(f"Strong competitive advantage (RCA: {rca})")
+        elif rca > 1:
+            advantages.append(f"Competitive advantage present (RCA: {rca})")
+        
+        if opp_score > 60:
+            advantages.append("High diversification opportunity score")
+        
+        advantages.append("Democratic partner with stable trade relations")
+        advantages.append("Growing manufacturing capabilities")
+        
+        return advantages
+    
+    def _identify_other_opportunities(self, current, indicators) -> List[Dict]:
+        """Identify other diversification opportunities"""
+        opportunities = []
+        
+        other_share = current['other_share']
+        china_share = current['china_share']
+        
+        # ASEAN countries (proxy using "other" suppliers)
+        if other_share > 20:
+            opportunities.append({
+                "region": "ASEAN (Vietnam, Thailand, Malaysia)",
+                "potential": "MEDIUM-HIGH",
+                "current_share": round(other_share, 1),
+                "rationale": "Growing manufacturing hubs with established supply chains",
+                "timeline": "12-18 months"
+            })
+        
+        # Mexico/Latin America
+        if china_share > 40:
+            opportunities.append({
+                "region": "Mexico (Nearshoring)",
+                "potential": "MEDIUM",
+                "current_share": "Included in other",
+                "rationale": "USMCA benefits, reduced logistics costs, geographic proximity",
+                "timeline": "18-24 months"
+            })
+        
+        # Europe (for certain products)
+        opportunities.append({
+            "region": "European Union",
+            "potential": "LOW-MEDIUM",
+            "current_share": "Included in other",
+            "rationale": "High quality standards, technological expertise",
+            "timeline": "24+ months"
+        })
+        
+        return opportunities
+    
+    def _prioritize_strategies(self, india, other_opps, risk_level, current) -> List[Dict]:
+        """Prioritize diversification strategies"""
+        strategies = []
+        
+        china_share = current['china_share']
+        
+        # Strategy 1: India diversification
+        if india['feasibility'] in ["HIGH", "MEDIUM"]:
+            strategies.append({
+                "priority": 1,
+                "name": "India Sourcing Expansion",
+                "target": f"Increase India share from {india['current_share']}% to {india['target_share']}%",
+                "action": f"Shift {india['increase']}% of sourcing to Indian suppliers",
+                "timeline": "6-12 months" if india['feasibility'] == "HIGH" else "12-18 months",
+                "feasibility": india['feasibility'],
+                "expected_impact": f"Reduce China dependency to {round(china_share - india['increase'], 1)}%",
+                "implementation_steps": [
+                    "Identify and qualify Indian suppliers",
+                    "Pilot orders (5% volume)",
+                    "Quality validation and certification",
+                    "Gradual scale-up to target volume"
+                ]
+            })
+        
+        # Strategy 2: Multi-country diversification
+        if risk_level == "HIGH" and china_share > 60:
+            strategies.append({
+                "priority": 2,
+                "name": "Multi-Country Diversification",
+                "target": f"Distribute imports across 3-4 countries",
+                "action": "Reduce single-country exposure below 50%",
+                "timeline": "12-24 months",
+                "feasibility": "MEDIUM",
+                "expected_impact": "Lower HHI below 0.25 (competitive market)",
+                "implementation_steps": [
+                    "Develop ASEAN supplier network",
+                    "Explore nearshoring to Mexico",
+                    "Establish dual-sourcing arrangements",
+                    "Implement risk-hedging contracts"
+                ]
+            })
+        
+        # Strategy 3: Domestic/nearshoring
+        if risk_level == "HIGH":
+            strategies.append({
+                "priority": 3,
+                "name": "Nearshoring Initiative",
+                "target": "Establish North American supply base",
+                "action": "Develop Mexico/US manufacturing capacity",
+                "timeline": "18-36 months",
+                "feasibility": "MEDIUM-LOW",
+                "expected_impact": "Long-term supply chain resilience",
+                "implementation_steps": [
+                    "Partner with USMCA manufacturers",
+                    "Invest in regional capacity building",
+                    "Leverage government incentives",
+                    "Gradual transition (5-10% initially)"
+                ]
+            })
+        
+        return strategies
+    
+    def _calculate_expected_outcomes(self, strategies, current) -> Dict:
+        """Calculate expected outcomes of diversification"""
+        
+        if not strategies:
+            return {}
+        
+        primary = strategies[0]
+        china_share = current['china_share']
+        hhi_current = current['hhi']
+        
+        # Parse target reduction from primary strategy
+        if 'India' in primary['name']:
+            # Assuming India expansion
+            reduction = float(primary['target'].split()[-1].strip('%').split('to')[-1])
+            new_china_share = china_share - reduction
+        else:
+            new_china_share = china_share * 0.85  # Assume 15% reduction
+        
+        # Estimate new HHI (simplified)
+        new_hhi = hhi_current * 0.8  # Assume 20% reduction in concentration
+        
+        outcomes = {
+            "risk_reduction": {
+                "from": current['risk_level'],
+                "to": "MEDIUM" if current['risk_level'] == "HIGH" else "LOW",
+                "timeline": primary['timeline']
+            },
+            "china_dependency": {
+                "current": round(china_share, 1),
+                "target": round(new_china_share, 1),
+                "reduction": round(china_share - new_china_share, 1)
+            },
+            "market_concentration": {
+                "current_hhi": round(hhi_current, 3),
+                "target_hhi": round(new_hhi, 3),
+                "improvement": round((hhi_current - new_hhi) / hhi_current * 100, 1)
+            },
+            "cost_impact": {
+                "initial": "+5-8% (transition costs)",
+                "long_term": "Neutral (competitive pricing)",
+                "roi_period": "12-18 months"
+            }
+        }
+        
+        return outcomes
+    
+    def _create_implementation_roadmap(self, strategies, risk_level) -> List[Dict]:
+        """Create phased implementation roadmap"""
+        
+        if risk_level == "HIGH":
+            urgency = "IMMEDIATE"
+        elif risk_level == "MEDIUM":
+            urgency = "30 DAYS"
+        else:
+            urgency = "90 DAYS"
+        
+        roadmap = [
+            {
+                "phase": "Immediate (0-30 days)",
+                "actions": [
+                    "🔍 Conduct supplier audit in target countries",
+                    "📊 Establish baseline metrics and KPIs",
+                    "🤝 Engage with trade associations",
+                    "📋 Review and update procurement policies"
+                ]
+            },
+            {
+                "phase": "Short-term (30-90 days)",
+                "actions": [
+                    "🏭 Identify and qualify 3-5 alternative suppliers",
+                    "📦 Initiate pilot orders (5-10% volume)",
+                    "✅ Quality validation and compliance checks",
+                    "💼 Negotiate commercial terms"
+                ]
+            },
+            {
+                "phase": "Medium-term (3-12 months)",
+                "actions": [
+                    "📈 Scale pilot to 15-25% of volume",
+                    "🔄 Implement dual-sourcing strategy",
+                    "📉 Monitor cost and quality metrics",
+                    "🎯 Adjust targets based on results"
+                ]
+            },
+            {
+                "phase": "Long-term (12+ months)",
+                "actions": [
+                    "🌐 Achieve target diversification ratios",
+                    "🏆 Establish strategic partnerships",
+                    "📊 Continuous monitoring and optimization",
+                    "🔄 Periodic risk reassessment"
+                ]
+            }
+        ]
+        
+        return roadmap
+    
+    def _estimate_timeline(self, risk_level) -> str:
+        """Estimate overall timeline"""
+        if risk_level == "HIGH":
+            return "6-12 months (accelerated due to high risk)"
+        elif risk_level == "MEDIUM":
+            return "12-18 months (standard implementation)"
+        else:
+            return "18-24 months (gradual optimization)"
+    
+    def _generate_summary(self, data_context, strategies, outcomes, risk_level) -> Tuple[str, bool]:
+        """Generate executive summary: (text, degraded)"""
+        primary = strategies[0] if strategies else None
+        facts = {
+            "risk_level": risk_level,
+            "primary": {key: primary[key] for key in ['name', 'target', 'timeline', 'feasibility']}
+                       if primary else None,
+            "outcomes": outcomes
+        }
+        return self.narrative_provider.narrate_marked('summary', data_context, facts)
+
+# ============================================================================
+# AGENT ORCHESTRATOR
+# ============================================================================
+
+class AgentOrchestrator:
+    """Main orchestrator coordinating all agents
+    
+    With a `cache`, analyze_product results are memoized under
+    (hs_code, quarter, dataset version, agent config version). Each call
+    gets its own copy with a "cache" entry ({"hit", "cached_at"});
+    "timestamp" is when the analysis was computed and cached, not when it
+    was served. Analyses with a degraded (fallback) narrative are not cached.
+    """
+    
+    def __init__(self, df: pd.DataFrame, dataset: Optional[str] = None,
+                 ntm_index: Optional[NTMIntervalIndex] = None,
+                 cache: Optional[LRUResultCache] = None,
+                 narrative_provider: Optional[NarrativeProvider] = None):
+        self.data_agent = DataRetrievalAgent(df, dataset, ntm_index)
+        self.risk_agent = RiskAssessmentAgent(narrative_provider=narrative_provider)
+        self.diversification_agent = StrategicDiversificationAgent(narrative_provider)
+        self.cache = cache
+        # Versions are only needed for cache keys (hashing the table is not free)
+        self.dataset_version = self.data_agent.version() if cache is not None else None
+        self.config_version = self.agent_config_version() if cache is not None else None
+    
+    def append_quarters(self, rows: pd.DataFrame):
+        """Add newly arrived rows; cached analyses of the old data stop matching"""
+        self.data_agent.append_quarters(rows)
+        if self.cache is not None:
+            self.dataset_version = self.data_agent.version()
+    
+    def agent_config_version(self) -> str:
+        """Fingerprint of the agents' scoring configuration"""
+        risk = self.risk_agent
+        return fingerprint({
+            "agents": [type(agent).__name__ for agent in
+                       (self.data_agent, self.risk_agent, self.diversification_agent)],
+            "bins": [risk.concentration_bins, risk.dependency_bins, risk.risk_bins, risk.likelihood_bins],
+            "weights": risk.COMPONENT_WEIGHTS,
+            "narrative": [risk.narrative_provider.version(),
+                          self.diversification_agent.narrative_provider.version()],
+            "outcomes": [risk.CONCENTRATION_OUTCOMES, risk.DEPENDENCY_OUTCOMES, risk.RISK_OUTCOMES,
+                         risk.LIKELIHOOD_OUTCOMES, risk.IMPACT_OUTCOMES, risk.NTM_OUTCOMES,
+                         risk.TREND_OUTCOMES]
+        })
+    
+    def analyze_product(self, hs_code: str, quarter: Optional[str] = None) -> Dict:
+        """Complete analysis for a product (memoized when the orchestrator has a cache)"""
+        if self.cache is None:
+            return self._analyze_product(hs_code, quarter)
+        
+        # Key on the quarter actually analysed, so "latest" shares the entry
+        if quarter is None:
+            quarters = self.data_agent.get_quarters(hs_code)
+            quarter = quarters[-1] if len(quarters) else None
+        key = (str(hs_code), quarter, self.dataset_version, self.config_version)
+        
+        # Entries are pickled: a few KB each, and unpickling is a cheaper
+        # private copy for the caller than deepcopy
+        cached = self.cache.get(key)
+        if cached is None:
+            analysis = self._analyze_product(hs_code, quarter)
+            if "error" in analysis:
+                return analysis
+            if is_degraded(analysis):
+                # Template fallback of a failed model call: ask the model again next time
+                analysis["cache"] = {"hit": False, "cached_at": None}
+                return analysis
+            self.cache.put(key, pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL))
+        else:
+            analysis = pickle.loads(cached)
+        
+        analysis["cache"] = {"hit": cached is not None, "cached_at": analysis["timestamp"]}
+        return analysis
+    
+    def _analyze_product(self, hs_code: str, quarter: Optional[str] = None) -> Dict:
+        """Run the three agents for one product-quarter"""
+        
+        # Step 1: Retrieve data
+        data_context = self.data_agent.get_product_data(hs_code, quarter)
+        
+        if "error" in data_context:
+            return data_context
+        
+        # Step 2: Assess risk
+        risk_assessment = self.risk_agent.assess_risk(data_context)
+        
+        # Step 3: Generate recommendations
+        diversification_recs = self.diversification_agent.generate_recommendations(
+            data_context, risk_assessment
+        )
+        
+        return self.assemble(data_context, risk_assessment, diversification_recs)
+    
+    def assemble(self, data_context: Dict, risk_assessment: Dict, diversification_recs: Dict) -> Dict:
+        """Combine the three agents' outputs into one analysis"""
+        complete_analysis = {
+            "product_info": {
+                "hs_code": data_context['hs_code'],
+                "name": data_context['product_name'],
+                "quarter": data_context['quarter']
+            },
+            "data_context": data_context,
+            "risk_assessment": risk_assessment,
+            "diversification_recommendations": diversification_recs,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        return complete_analysis
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Trade API - Headless JSON Service for the Agents
+================================================
+Serves AgentOrchestrator over HTTP/JSON with the standard library only:
+
+    GET  /health                                 status, products, dataset version
+    GET  /analyze?hs_code=8542&quarter=2025-Q2   one analysis (latest quarter if omitted)
+    POST /analyze/batch                          {"items": [{"hs_code": ..., "quarter": ...}, ...]}
+    GET  /portfolio                              latest-quarter summary, highest risk first
+    GET  /portfolio?view=opportunity&n=5         top-n view ('risk' or 'opportunity')
+    GET  /stats                                  request counters
+
+The combined table is loaded once. Requests are handled on threads; agent
+work runs on a process pool whose workers each build their orchestrator
+(with an LRU result cache) once, at startup. On fork-based platforms the
+workers share the parent's loaded table copy-on-write.
+
+Usage:
+    python trade_api.py
+    python trade_api.py --input ../outputs/trade_ntm_combined.csv --port 8050 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from result_cache import DEFAULT_MAXSIZE, LRUResultCache
+from trade_agents import AgentOrchestrator
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFAULT_PORT = 8050
+
+# Largest batch accepted by /analyze/batch
+MAX_BATCH_SIZE = 1000
+
+# Seconds a request waits for its agent work
+REQUEST_TIMEOUT = 30
+
+# Per-process orchestrator: set in the parent before the pool forks, or by _init_worker
+_orchestrator = None
+
+def load_combined(input_file: str) -> pd.DataFrame:
+    """Combined trade + NTM table with string HS codes"""
+    df = pd.read_csv(input_file)
+    df['hs_code'] = df['hs_code'].astype(str).str.strip()
+    return df
+
+def _init_worker(input_file: str, cache_size: int, dataset_version: str):
+    """Pool initializer: the worker's orchestrator, unless inherited from the parent"""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = AgentOrchestrator(load_combined(input_file))
+    _orchestrator.cache = LRUResultCache(cache_size)
+    _orchestrator.dataset_version = dataset_version
+    _orchestrator.config_version = _orchestrator.agent_config_version()
+
+def _analyze_items(items: List[tuple]) -> List[Dict]:
+    """Worker task: analyses of (hs_code, quarter) pairs"""
+    return [_orchestrator.analyze_product(hs_code, quarter) for hs_code, quarter in items]
+
+def _json_default(value):
+    """JSON fallback for numpy scalars and anything else"""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+class AnalysisService:
+    """Loaded table, summary views and the worker pool behind the handlers"""
+
+    def __init__(self, input_file: str, workers: int = 1, cache_size: int = DEFAULT_MAXSIZE):
+        global _orchestrator
+        _orchestrator = AgentOrchestrator(load_combined(input_file))
+        self.orchestrator = _orchestrator
+        self.dataset_version = self.orchestrator.data_agent.version()
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(input_file, cache_size, self.dataset_version))
+        # Start the workers now, before the server's threads exist
+        list(self.pool.map(_analyze_items, [[]] * workers))
+        self.counters = {"requests": 0, "analyses": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def analyze(self, items: List[tuple]) -> List[Dict]:
+        """Analyses of (hs_code, quarter) pairs, split across the workers"""
+        size = -(-len(items) // self.workers)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        futures = [self.pool.submit(_analyze_items, chunk) for chunk in chunks]
+        results = [analysis for future in futures for analysis in future.result(REQUEST_TIMEOUT)]
+        self.count(analyses=len(results))
+        return results
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "products": len(self.orchestrator.data_agent.snapshot),
+            "dataset_version": self.dataset_version,
+            "workers": self.workers
+        }
+
+    def portfolio(self, view: Optional[str] = None, n: int = 5) -> str:
+        """Summary (or a top-n view) as a JSON array of records"""
+        data_agent = self.orchestrator.data_agent
+        summary = data_agent.get_all_products_summary() if view is None else data_agent.get_top_products(view, n)
+        return summary.to_json(orient='records')
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+class APIError(Exception):
+    """Client error with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class TradeAPIHandler(BaseHTTPRequestHandler):
+    """JSON routes over the server's AnalysisService"""
+
+    # Keep-alive, so load tests measure requests rather than connects
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes: don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, body):
+        payload = (body if isinstance(body, str) else json.dumps(body, default=_json_default)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, route):
+        self.service.count(requests=1)
+        try:
+            self._send(200, route())
+        except APIError as e:
+            self.service.count(errors=1)
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            self.service.count(errors=1)
+            logger.exception("Request failed")
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        routes = {
+            "/health": self.service.health,
+            "/analyze": lambda: self._analyze_one(params),
+            "/portfolio": lambda: self._portfolio(params),
+            "/stats": lambda: dict(self.service.counters)
+        }
+        self._handle(routes.get(url.path, self._not_found))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self._handle(self._analyze_batch if url.path == "/analyze/batch" else self._not_found)
+
+    def _not_found(self):
+        raise APIError(404, f"No route {self.command} {urlparse(self.path).path}")
+
+    def _analyze_one(self, params: Dict) -> Dict:
+        if not params.get("hs_code"):
+            raise APIError(400, "hs_code is required")
+        analysis = self.service.analyze([(params["hs_code"], params.get("quarter"))])[0]
+        if "error" in analysis:
+            raise APIError(404, analysis["error"])
+        return analysis
+
+    def _analyze_batch(self) -> Dict:
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            items = [(str(item["hs_code"]), item.get("quarter")) for item in request["items"]]
+        except (ValueError, KeyError, TypeError):
+            raise APIError(400, 'Expected {"items": [{"hs_code": ..., "quarter": ...}, ...]}')
+        if len(items) > MAX_BATCH_SIZE:
+            raise APIError(400, f"At most {MAX_BATCH_SIZE} items per batch, got {len(items)}")
+        return {"results": self.service.analyze(items) if items else []}
+
+    def _portfolio(self, params: Dict) -> str:
+        try:
+            return self.service.portfolio(params.get("view"), int(params.get("n", 5)))
+        except ValueError as e:
+            raise APIError(400, str(e))
+
+def make_server(service: AnalysisService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Threaded HTTP server bound to host:port, serving the service"""
+    server = ThreadingHTTPServer((host, port), TradeAPIHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the trade risk agents over HTTP/JSON")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Agent worker processes (default: one per CPU)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAXSIZE,
+                        help=f"Result cache entries per worker (default: {DEFAULT_MAXSIZE})")
+    args = parser.parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO)
+
+    service = AnalysisService(args.input, args.workers, args.cache_size)
+    server = make_server(service, args.host, args.port)
+    logger.info(f"🌐 Trade API on http://{args.host}:{server.server_port} "
+                f"({service.health()['products']} products, {args.workers} worker(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Weight Sensitivity - Risk Score Weights Swept over the Panel
+============================================================
+Scores the whole panel under thousands of alternative weight vectors for
+one of the composite scores:
+
+    geopolitical   compute_risk_scores' geopolitical_risk_score
+                   (RISK_SCORE_WEIGHTS: china_share, hhi, intensity)
+    opportunity    compute_risk_scores' india_opportunity_score
+                   (india_headroom, india_rca, china_dominance)
+    agent          RiskAssessmentAgent's overall risk score
+                   (COMPONENT_WEIGHTS, rescaled to their base sum)
+
+Weight vectors scale each base weight by a factor in [1 - spread,
+1 + spread]: a full grid (steps per weight), a Sobol sample (needs scipy)
+or uniform random draws. The score terms of every row are computed once;
+each chunk of weight vectors is then scored as (rows × settings) arrays,
+so nothing loops over rows. For every setting it reports:
+
+    flip_fraction     share of product-quarters whose risk level changes
+    upgrades / downgrades
+    rank_stability    mean over quarters of the Spearman correlation with
+                      the base ranking of the products
+    top_overlap       share of the base top-N products of the latest
+                      quarter still in the top N
+
+and for every product-quarter the share of settings that flip its level.
+
+Usage:
+    python weight_sensitivity.py --model agent
+    python weight_sensitivity.py --model geopolitical --method sobol --samples 4096 --spread 0.3
+    python weight_sensitivity.py --model agent --benchmark-products 5000
+"""
+
+import argparse
+import itertools
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from classification import RISK_BINS, bin_codes
+from compute_trade_indices import RISK_SCORE_WEIGHTS
+from trade_agents import RISK_INPUT_COLUMNS, RiskAssessmentAgent
+
+try:
+    from scipy.stats import qmc
+except ImportError:  # optional dependency, only needed for Sobol samples
+    qmc = None
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Swept weights, level bins and base-sum rescaling of each score
+SWEEP_MODELS = {
+    'geopolitical': {
+        'weights': ['china_share', 'hhi', 'intensity'],
+        'levels': RISK_BINS,
+        'normalize': False
+    },
+    'opportunity': {
+        'weights': ['india_headroom', 'india_rca', 'china_dominance'],
+        'levels': None,
+        'normalize': False
+    },
+    'agent': {
+        'weights': list(RiskAssessmentAgent.COMPONENT_WEIGHTS),
+        'levels': RISK_BINS,
+        'normalize': True
+    }
+}
+
+SAMPLING_METHODS = ['grid', 'sobol', 'random']
+
+# Score cells (rows × settings) computed per chunk
+CHUNK_CELLS = 20_000_000
+
+DEFAULT_TOP_N = 5
+
+def _require_scipy():
+    """Fail with an actionable message when scipy is missing"""
+    if qmc is None:
+        raise ImportError("Sobol samples need scipy: pip install scipy (or use --method grid / random)")
+
+def model_terms(df: pd.DataFrame, model: str):
+    """Per-row score terms (rows × weights) and base weights of a model"""
+    if model == 'agent':
+        agent = RiskAssessmentAgent()
+        scores = agent.assess_risk_columns(*(df[col] for col in RISK_INPUT_COLUMNS))
+        terms = np.column_stack([scores[f'{name}_score'].to_numpy(dtype=float)
+                                 for name in agent.COMPONENT_WEIGHTS])
+        return terms, np.array(list(agent.COMPONENT_WEIGHTS.values()), dtype=float)
+
+    w = RISK_SCORE_WEIGHTS
+    if model == 'geopolitical':
+        terms = np.column_stack([
+            df['china_share_us'].to_numpy(dtype=float),
+            df['hhi_us_imports'].to_numpy(dtype=float) * 100,
+            np.minimum(df['trade_intensity_china'].to_numpy(dtype=float), w['intensity_cap'])
+        ])
+    elif model == 'opportunity':
+        terms = np.column_stack([
+            100 - df['india_share_us'].to_numpy(dtype=float),
+            np.minimum(df['india_rca'].to_numpy(dtype=float), w['india_rca_cap']),
+            df['china_share_us'].to_numpy(dtype=float)
+        ])
+    else:
+        raise ValueError(f"Unknown model {model!r} (choose from {list(SWEEP_MODELS)})")
+    return terms, np.array([w[name] for name in SWEEP_MODELS[model]['weights']], dtype=float)
+
+def sample_weights(base: np.ndarray, method: str = 'grid', spread: float = 0.5, steps: int = 5,
+                   samples: int = 1024, normalize: bool = False, seed: Optional[int] = 0) -> np.ndarray:
+    """Weight vectors (settings × weights), each base weight scaled within ±spread
+
+    The base vector is always the first row. A Sobol sample is rounded up
+    to a power of two.
+    """
+    d = len(base)
+    if method == 'grid':
+        factors = np.array(list(itertools.product(np.linspace(1 - spread, 1 + spread, steps), repeat=d)))
+    elif method == 'sobol':
+        _require_scipy()
+        unit = qmc.Sobol(d, scramble=True, seed=seed).random_base2(int(np.ceil(np.log2(samples))))
+        factors = 1 - spread + 2 * spread * unit
+    elif method == 'random':
+        factors = np.random.default_rng(seed).uniform(1 - spread, 1 + spread, (samples, d))
+    else:
+        raise ValueError(f"Unknown sampling method {method!r} (choose from {SAMPLING_METHODS})")
+
+    weights = np.vstack([base, base * factors])
+    if normalize:
+        weights = weights / weights.sum(axis=1, keepdims=True) * base.sum()
+    return weights
+
+def score_settings(terms: np.ndarray, weights: np.ndarray, model: str) -> np.ndarray:
+    """Scores of every row under every weight vector (rows × settings)"""
+    # Terms added one at a time in the formulas' order, so the base weights reproduce them exactly
+    scores = terms[:, :1] * weights[:, 0]
+    for j in range(1, terms.shape[1]):
+        scores = scores + terms[:, j:j + 1] * weights[:, j]
+    if model == 'agent':
+        return scores
+    return np.minimum(np.round(scores, 2), 100)
+
+def _spearman_by_group(scores: np.ndarray, base_ranks: np.ndarray, groups: np.ndarray,
+                       starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Spearman correlation with the base ranks within each group (groups × settings)"""
+    ranks = pd.DataFrame(scores).groupby(groups).rank().to_numpy()
+    # Average ranks of a group of n rows have mean (n + 1) / 2
+    center = (np.repeat(sizes, sizes)[:, None] + 1) / 2
+    centered = ranks - center
+    base_centered = base_ranks[:, None] - center
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.add.reduceat(centered * base_centered, starts) /
+                np.sqrt(np.add.reduceat(centered ** 2, starts) * np.add.reduceat(base_centered ** 2, starts)))
+
+def sweep(df: pd.DataFrame, model: str = 'agent', method: str = 'grid', spread: float = 0.5,
+          steps: int = 5, samples: int = 1024, top_n: int = DEFAULT_TOP_N,
+          seed: Optional[int] = 0) -> Dict[str, pd.DataFrame]:
+    """Sensitivity of a model's levels and rankings to its weights
+
+    Returns 'settings' (one row per weight vector, the base first) and
+    'rows' (hs_code, date, base score and level, share of settings that
+    flip the level). Level columns are left out for models without levels.
+    """
+    config = SWEEP_MODELS[model]
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    terms, base = model_terms(df, model)
+    weights = sample_weights(base, method, spread, steps, samples, config['normalize'], seed)
+
+    groups = pd.factorize(df['date'], sort=True)[0]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(df)])
+    latest = groups == groups.max()
+    levels = config['levels']
+
+    base_scores = score_settings(terms, base[None, :], model)[:, 0]
+    base_ranks = pd.Series(base_scores).groupby(groups).rank().to_numpy()
+    base_top = np.zeros(latest.sum(), dtype=bool)
+    base_top[np.argsort(-base_scores[latest], kind='stable')[:top_n]] = True
+    if levels is not None:
+        base_levels = bin_codes(base_scores, levels)
+
+    settings = {name: [] for name in ['flip_fraction', 'upgrades', 'downgrades', 'rank_stability', 'top_overlap']}
+    flips = np.zeros(len(df))
+    chunk = max(1, CHUNK_CELLS // max(len(df), 1))
+    for start in range(0, len(weights), chunk):
+        scores = score_settings(terms, weights[start:start + chunk], model)
+
+        if levels is not None:
+            moved = bin_codes(scores, levels).astype(np.int16) - base_levels[:, None]
+            settings['flip_fraction'].append((moved != 0).mean(axis=0))
+            settings['upgrades'].append((moved > 0).mean(axis=0))
+            settings['downgrades'].append((moved < 0).mean(axis=0))
+            flips += (moved != 0).sum(axis=1)
+
+        rho = _spearman_by_group(scores, base_ranks, groups, starts, sizes)
+        settings['rank_stability'].append(np.nanmean(rho, axis=0))
+        top = np.argsort(-scores[latest], axis=0, kind='stable')[:top_n]
+        settings['top_overlap'].append(base_top[top].mean(axis=0))
+
+    table = pd.DataFrame(weights, columns=config['weights'])
+    for name, parts in settings.items():
+        if parts:
+            table[name] = np.concatenate(parts)
+
+    rows = df[['hs_code', 'date']].copy()
+    rows['base_score'] = base_scores
+    if levels is not None:
+        rows['base_level'] = np.asarray(levels['labels'])[base_levels]
+        rows['flip_share'] = flips / len(weights)
+    return {'settings': table, 'rows': rows}
+
+def weight_effects(settings: pd.DataFrame, weight_names, metric: str) -> pd.Series:
+    """Correlation of each weight with a metric across the settings"""
+    return settings[weight_names].corrwith(settings[metric]).round(3)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the risk score weights over the panel")
+    parser.add_argument('--input', default=os.path.join(REPO_DIR, 'outputs', 'trade_ntm_combined.csv'))
+    parser.add_argument('--model', choices=list(SWEEP_MODELS), default='agent')
+    parser.add_argument('--method', choices=SAMPLING_METHODS, default='grid')
+    parser.add_argument('--spread', type=float, default=0.5, help="Weight factors in [1 - spread, 1 + spread]")
+    parser.add_argument('--steps', type=int, default=9, help="Grid points per weight (default: 9)")
+    parser.add_argument('--samples', type=int, default=4096, help="Sobol / random weight vectors")
+    parser.add_argument('--top-n', type=int, default=DEFAULT_TOP_N)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="CSV of every weight setting and its metrics")
+    parser.add_argument('--benchmark-products', type=int, help="Sweep a synthetic panel instead (timing)")
+    args = parser.parse_args()
+
+    if args.benchmark_products:
+        from benchmark_retrieval import make_combined
+        df = make_combined(args.benchmark_products, 80)
+    else:
+        df = pd.read_csv(args.input)
+        df['hs_code'] = df['hs_code'].astype(str).str.strip()
+
+    start = time.perf_counter()
+    result = sweep(df, args.model, args.method, args.spread, args.steps, args.samples, args.top_n, args.seed)
+    elapsed = time.perf_counter() - start
+    settings, rows = result['settings'], result['rows']
+    names = SWEEP_MODELS[args.model]['weights']
+
+    print("\n⚖️  WEIGHT SENSITIVITY")
+    print("=" * 60)
+    print(f"   Model: {args.model}  base weights "
+          f"{dict(zip(names, settings.loc[0, names].round(3)))}")
+    print(f"   {len(settings):,} weight settings ({args.method}, ±{args.spread:.0%}) × "
+          f"{len(rows):,} product-quarters in {elapsed:.2f}s")
+
+    metrics = ['flip_fraction', 'rank_stability', 'top_overlap']
+    if SWEEP_MODELS[args.model]['levels'] is None:
+        metrics = metrics[1:]
+    print(f"\n   {'':<16} {'mean':>8} {'p5':>8} {'p95':>8} {'worst':>8}")
+    for metric in metrics:
+        values = settings[metric]
+        worst = values.max() if metric == 'flip_fraction' else values.min()
+        print(f"   {metric:<16} {values.mean():>8.3f} {values.quantile(0.05):>8.3f} "
+              f"{values.quantile(0.95):>8.3f} {worst:>8.3f}")
+
+    key = metrics[0]
+    print(f"\n   Correlation of each weight with {key}:")
+    for name, value in weight_effects(settings, names, key).items():
+        print(f"      {name:<16} {value:>7.3f}")
+
+    print(f"\n   Settings with the {'most flips' if key == 'flip_fraction' else 'least stable ranking'}:")
+    worst = settings.nlargest(5, key) if key == 'flip_fraction' else settings.nsmallest(5, key)
+    print(worst.round(3).to_string(index=False))
+
+    if 'flip_share' in rows:
+        latest = rows[rows['date'] == rows['date'].max()]
+        print(f"\n   Most fragile levels in {latest['date'].iloc[0]} (share of settings that flip them):")
+        print(latest.nlargest(args.top_n, 'flip_share').round(3).to_string(index=False))
+
+    if args.output:
+        settings.to_csv(args.output, index=False)
+        print(f"\n   ✓ Saved {len(settings):,} settings to {args.output}")
+
+if __name__ == "__main__":
+    main()